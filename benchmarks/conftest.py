@@ -0,0 +1,85 @@
+"""
+Fixtures for the pytest-benchmark suite. Run from the project root:
+python -m pytest benchmarks --benchmark-only
+
+Benchmarks run against a throwaway home directory and a local stub of
+ipapi.co and sunrise-sunset.org, so results never depend on the network or
+on the caches of the machine they run on.
+"""
+
+import os
+import json
+import logging
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Before anything from src is imported: config, caches and logs go here
+HOME = tempfile.mkdtemp(prefix="iftar-bench-")
+os.environ["HOME"] = HOME
+os.environ["USERPROFILE"] = HOME
+
+import pytest
+from src.location_finder import Location
+from src.sunset_finder import SunsetFinder
+
+LOCATION = Location(lat=31.5204, lng=74.3587, city="Lahore", country="Pakistan", timezone="Asia/Karachi")
+PUBLIC_IP = "203.0.113.7"
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers like ipapi.co (under /ipapi) and api.sunrise-sunset.org (under /sunrise-sunset)"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, keep-alive
+    # responses stall on delayed ACKs and the timings measure TCP, not the client
+    disable_nagle_algorithm = True
+    finder = SunsetFinder(offline=True)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path == "/ipapi/json/":
+            self._send(json.dumps({"ip": PUBLIC_IP, "latitude": LOCATION.lat, "longitude": LOCATION.lng,
+                                   "city": LOCATION.city, "country_name": LOCATION.country,
+                                   "timezone": LOCATION.timezone}))
+        elif url.path == "/ipapi/ip/":
+            self._send(PUBLIC_IP, "text/plain")
+        elif url.path == "/ipapi/latlong":
+            self._send(f"{LOCATION.lat},{LOCATION.lng}", "text/plain")
+        elif url.path == "/sunrise-sunset/json":
+            location = Location(lat=float(query["lat"]), lng=float(query["lng"]),
+                                timezone=query.get("tzid", ""))
+            self._send(json.dumps(self.finder.compute_sunset(location, query.get("date"))))
+        else:
+            self._send(json.dumps({"status": "NOT_FOUND"}), status=404)
+
+    def _send(self, body: str, content_type: str = "application/json", status: int = 200):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope="session", autouse=True)
+def quiet_logs():
+    # Console logging would dominate the timings, keep warnings only
+    logging.getLogger("iftar_clock").setLevel(logging.WARNING)
+
+@pytest.fixture(scope="session")
+def stub_server():
+    """Base URL of the local stub API server"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def location():
+    return LOCATION
@@ -0,0 +1,21 @@
+"""Throughput of the batch sunset API (N locations x M dates)"""
+
+import random
+import pytest
+from datetime import date
+from src.location_finder import Location
+from src.sunset_batch import compute_sunset_matrix, date_range, seconds_until_sunset
+
+def random_locations(count):
+    """Random locations between the polar circles"""
+    rng = random.Random(42)
+    return [Location(lat=rng.uniform(-60, 60), lng=rng.uniform(-180, 180)) for _ in range(count)]
+
+@pytest.mark.parametrize("locations,dates", [(10, 366), (1000, 30), (5000, 1), (5000, 30)])
+def test_sunset_matrix(benchmark, locations, dates):
+    benchmark.extra_info["sunsets"] = locations * dates
+    result = benchmark(compute_sunset_matrix, random_locations(locations), date_range(date(2026, 1, 1), dates))
+    assert result.shape == (locations, dates)
+
+def test_seconds_until_sunset(benchmark):
+    benchmark(seconds_until_sunset, random_locations(5000))
@@ -0,0 +1,38 @@
+"""Per-tick cost of the countdown display"""
+
+import pytest
+from src.sunset_calculator import SunsetCalculator
+from src.timezones import now_local
+
+@pytest.fixture
+def table_calculator(location):
+    calculator = SunsetCalculator()
+    calculator.build_table(location)
+    calculator._arm_countdown()
+    return calculator
+
+@pytest.fixture
+def legacy_calculator(location):
+    """Calculator on the datetime-based path, counting down to the end of today"""
+    calculator = SunsetCalculator()
+    calculator.on_refresh_needed = lambda: None
+    calculator.sunset = now_local().replace(hour=23, minute=59, second=59)
+    return calculator
+
+def test_format_remaining_time(benchmark, table_calculator):
+    benchmark(table_calculator.format_remaining_time)
+
+def test_format_remaining_time_legacy(benchmark, legacy_calculator):
+    benchmark(legacy_calculator.format_remaining_time)
+
+def test_next_display_change(benchmark, table_calculator):
+    benchmark(table_calculator.next_display_change)
+
+def test_remaining_seconds(benchmark, table_calculator):
+    benchmark(table_calculator.remaining_seconds)
+
+def test_get_remaining_time(benchmark, table_calculator):
+    benchmark(table_calculator.get_remaining_time)
+
+def test_get_remaining_time_legacy(benchmark, legacy_calculator):
+    benchmark(legacy_calculator.get_remaining_time)
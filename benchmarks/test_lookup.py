@@ -0,0 +1,24 @@
+"""Offline location lookups: city search, nearest city and timezone"""
+
+import pytest
+from src.city_index import get_city_index
+from src.timezone_index import get_timezone_index
+
+@pytest.fixture(scope="module")
+def city_index():
+    # As the city picker does before the first keystroke
+    return get_city_index().prepare()
+
+def test_city_prefix_search(benchmark, city_index):
+    assert benchmark(city_index.search, "lah", 10)[0].name == "Lahore"
+
+def test_city_fuzzy_search(benchmark, city_index):
+    assert benchmark(city_index.search, "karachy", 10)[0].name == "Karachi"
+
+def test_nearest_city(benchmark, city_index, location):
+    city, distance = benchmark(city_index.nearest, location.lat, location.lng)
+    assert city.country_code == "PK" and distance < 20
+
+def test_timezone_at(benchmark, location):
+    index = get_timezone_index()
+    assert benchmark(index.zone_at, location.lat, location.lng) == "Asia/Karachi"
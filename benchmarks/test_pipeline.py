@@ -0,0 +1,81 @@
+"""Startup and data pipeline: cache I/O, construction, response parsing, table generation"""
+
+import os
+import pytest
+from datetime import date, timedelta
+from src.http_client import HttpClient
+from src.location_finder import Location, LocationFinder
+from src.prayer_times import METHODS, PrayerTimetable
+from src.sunset_cache import SunsetCache
+from src.sunset_calculator import SunsetCalculator
+from src.sunset_finder import SunsetFinder
+from src.sunset_table import SunsetTable
+
+# Cached sunsets: empty, one location for a year, a full cache of 16 locations
+CACHE_SIZES = [0, 365, 16 * 365]
+
+def _fill_cache(path: str, records: int) -> SunsetCache:
+    cache = SunsetCache(path)
+    start = date(date.today().year, 1, 1)
+    for n in range(0, records, 365):
+        location = Location(lat=30.0 + n / 365, lng=70.0)
+        table = SunsetTable.for_year(location, start.year)
+        days = [start + timedelta(days=i) for i in range(min(365, records - n))]
+        cache.put_many(location, [(day, table.sunset(day)) for day in days])
+    cache.dirty = True
+    cache.save()
+    return cache
+
+@pytest.fixture(params=CACHE_SIZES, ids=lambda size: f"{size}_records")
+def cache_file(request):
+    path = os.path.join(os.path.expanduser('~'), 'iftar_clock.json')
+    if os.path.exists(path):
+        os.remove(path)
+    _fill_cache(path, request.param)
+    yield path
+    if os.path.exists(path):
+        os.remove(path)
+
+@pytest.fixture
+def api_client():
+    # No response cache: every call goes to the stub server
+    return HttpClient(cache_dir=None)
+
+def test_calculator_cold_start(benchmark, cache_file):
+    benchmark(SunsetCalculator)
+
+def test_load_data(benchmark, cache_file):
+    cache = SunsetCache(cache_file)
+    benchmark(cache.load)
+
+def test_save_data(benchmark, cache_file):
+    cache = SunsetCache(cache_file)
+    cache.load()
+
+    def mark_dirty():
+        cache.dirty = True
+
+    benchmark.pedantic(cache.save, setup=mark_dirty, rounds=20)
+
+def test_get_sunset_datetime(benchmark, stub_server, api_client, location):
+    finder = SunsetFinder(offline=False, api_url=f"{stub_server}/sunrise-sunset/json", client=api_client)
+    data = finder.fetch_sunset(location, "2026-03-01")
+    assert data is not None
+    benchmark(finder.get_sunset_datetime, data)
+
+def test_fetch_sunset_from_api(benchmark, stub_server, api_client, location):
+    finder = SunsetFinder(offline=False, api_url=f"{stub_server}/sunrise-sunset/json", client=api_client)
+    assert benchmark(finder.fetch_sunset, location, "2026-03-01") is not None
+
+def test_location_lookup(benchmark, stub_server, api_client):
+    finder = LocationFinder(api_url=f"{stub_server}/ipapi", client=api_client, config={})
+    location, ip = benchmark(finder._lookup_location)
+    assert location.city == "Lahore"
+
+def test_year_table(benchmark, location):
+    table = benchmark(SunsetTable.for_year, location, 2026)
+    assert len(table) == 365
+
+def test_prayer_timetable_year(benchmark, location):
+    timetable = benchmark(PrayerTimetable.for_year, location, 2026, METHODS["MWL"])
+    assert len(timetable) == 365
@@ -0,0 +1,98 @@
+"""
+Regenerate the bundled offline data in src/data (maintainers only).
+
+    pip install geonamescache timezonefinder
+    python build_data.py cities      # cities15000.tsv.gz and countries.tsv from GeoNames
+    python build_data.py timezones   # timezones.bin grid, takes several minutes
+
+Neither package is needed to run the clock; they are only the sources the
+bundled files are built from.
+"""
+
+import os
+import io
+import sys
+import gzip
+import json
+import unicodedata
+from src.city_index import CITIES_FILE, COUNTRIES_FILE
+from src.timezone_index import TIMEZONES_FILE, TimezoneIndex
+
+# Timezone grid: 0.05 degree latitude bands, 1/160 degree columns, sampled every
+# 0.1 degree and refined by bisection wherever the zone changes
+ROWS = 3600
+COLUMNS_PER_DEGREE = 160
+SAMPLE_COLUMNS = 16
+
+def build_cities():
+    import geonamescache
+    data_dir = os.path.join(os.path.dirname(geonamescache.__file__), "data")
+    with open(os.path.join(data_dir, "cities15000.json"), encoding="utf-8") as f:
+        cities = sorted(json.load(f).values(), key=lambda city: -city["population"])
+    with open(os.path.join(data_dir, "countries.json"), encoding="utf-8") as f:
+        countries = json.load(f)
+
+    out = io.StringIO()
+    out.write("# Cities with a population of 15000 or more. Source: GeoNames (https://www.geonames.org), CC BY 4.0\n")
+    out.write("# name\tasciiname (empty if same as name)\tlatitude\tlongitude\tcountry code\tpopulation\ttimezone\n")
+    count = 0
+    for city in cities:
+        if not city["timezone"]:
+            continue
+        name = city["name"].replace("\t", " ")
+        ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+        out.write(f"{name}\t{'' if ascii_name == name else ascii_name}\t{city['latitude']:.4f}\t"
+                  f"{city['longitude']:.4f}\t{city['countrycode']}\t{city['population']}\t{city['timezone']}\n")
+        count += 1
+    # mtime=0 keeps the file byte-identical between builds of the same data
+    with gzip.GzipFile(CITIES_FILE, "wb", compresslevel=9, mtime=0) as f:
+        f.write(out.getvalue().encode("utf-8"))
+    with open(COUNTRIES_FILE, "w", encoding="utf-8") as f:
+        f.write("# ISO 3166 code and country name. Source: GeoNames (https://www.geonames.org), CC BY 4.0\n")
+        for _, country in sorted(countries.items()):
+            f.write(f"{country['iso']}\t{country['name']}\n")
+    print(f"Wrote {count} cities to {CITIES_FILE}")
+
+def build_timezones():
+    from timezonefinder import TimezoneFinder
+    finder = TimezoneFinder()
+    columns = 360 * COLUMNS_PER_DEGREE
+
+    def zone(lat, column):
+        lng = -180.0 + (column + 0.5) / COLUMNS_PER_DEGREE
+        return finder.timezone_at(lng=lng, lat=lat) or ""
+
+    bands = []
+    for row in range(ROWS):
+        lat = -90.0 + (row + 0.5) * 180.0 / ROWS
+        samples = list(range(0, columns, SAMPLE_COLUMNS))
+        zones = [zone(lat, column) for column in samples]
+        runs = [(0, zones[0])]
+        for i in range(1, len(samples)):
+            if zones[i] == zones[i - 1]:
+                continue
+            # Narrow the change down to one column
+            lo, hi = samples[i - 1], samples[i]
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if zone(lat, mid) == zones[i - 1]:
+                    lo = mid
+                else:
+                    hi = mid
+            between = zone(lat, hi)
+            if between != runs[-1][1]:
+                runs.append((hi, between))
+            if zones[i] != runs[-1][1]:
+                runs.append((samples[i], zones[i]))
+        bands.append(runs)
+        if row % 100 == 0:
+            print(f"Band {row}/{ROWS}")
+    TimezoneIndex.write(TIMEZONES_FILE, bands, COLUMNS_PER_DEGREE)
+    print(f"Wrote {sum(map(len, bands))} runs to {TIMEZONES_FILE}")
+
+if __name__ == "__main__":
+    targets = {"cities": build_cities, "timezones": build_timezones}
+    if len(sys.argv) != 2 or sys.argv[1] not in targets:
+        print(__doc__)
+        sys.exit(2)
+    targets[sys.argv[1]]()
@@ -44,6 +44,8 @@ def main():
         "--onefile",   # Single executable file
         "--noconfirm", # Overwrite existing build
         "--add-data", f"LICENSE{os.pathsep}.",  # Include license file
+        "--collect-data", "tzdata",  # Zone database for zoneinfo (Windows has none)
+        "--add-data", f"src/data{os.pathsep}src/data",  # Bundled city index
         "--clean",     # Clean PyInstaller cache
         "main.py"
     ]
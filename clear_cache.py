@@ -21,13 +21,21 @@ def main():
         try:
             with open(cache_file, 'r') as f:
                 data = json.load(f)
-                print(f"\nCurrent cache contains {len(data)} entries:")
-                for day, sunset in data.items():
+                if data.get("version") in (2, 3):
+                    # {"version": 3, "locations": {"lat,lng": {"sunsets": {"YYYY-MM-DD": [iso, crc32]}}}}
+                    # (version 2 stored the bare iso string)
+                    entries = [(f"{key} {day}", record[0] if isinstance(record, list) else record)
+                               for key, entry in data.get("locations", {}).items()
+                               for day, record in sorted(entry.get("sunsets", {}).items())]
+                else:
+                    entries = [(f"Day {day}", sunset) for day, sunset in data.items()]
+                print(f"\nCurrent cache contains {len(entries)} entries:")
+                for label, sunset in entries:
                     try:
                         dt = datetime.fromisoformat(sunset)
-                        print(f"  Day {day}: {sunset} ({dt.strftime('%Y-%m-%d %H:%M:%S %Z')})")
+                        print(f"  {label}: {sunset} ({dt.strftime('%Y-%m-%d %H:%M:%S %Z')})")
                     except:
-                        print(f"  Day {day}: {sunset} (Invalid format)")
+                        print(f"  {label}: {sunset} (Invalid format)")
         except Exception as e:
             print(f"Error reading cache: {e}")
         
@@ -44,7 +52,7 @@ def main():
                 
                 # Write empty cache
                 with open(cache_file, 'w') as f:
-                    json.dump({}, f)
+                    json.dump({"version": 3, "locations": {}, "quarantine": {}}, f)
                 
                 print(f"\nCache cleared successfully!")
                 print(f"Backup saved to: {backup_file}")
@@ -77,8 +77,9 @@ def main():
         
         # Dump saved data
         print("\nSaved sunset data:")
-        for day, sunset in calculator.sunsets.items():
-            print(f"Day {day}: {sunset}")
+        for key, entry in calculator.cache.locations.items():
+            for day, (sunset, crc) in sorted(entry["sunsets"].items()):
+                print(f"{key} {day}: {sunset} (crc {crc:08x})")
     except Exception as e:
         print(f"Error testing sunset calculator: {e}")
         import traceback
@@ -0,0 +1,14 @@
+"""
+Export a suhoor and iftar timetable for one or many sites
+Examples:
+    python export_timetable.py --from 2026-02-18 --to 2026-03-19 -o ramadan.csv
+    python export_timetable.py --lat 24.86 --lng 67.00 --tz Asia/Karachi --city Karachi -o karachi.ics
+    python export_timetable.py --city "London, CA" --format jsonl
+    python export_timetable.py --sites offices.csv --from 2026-01-01 --to 2035-12-31 --format jsonl
+"""
+
+import sys
+from src.timetable_export import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,62 @@
+from src import startup_profile
 import sys
 import os
+import argparse
 import traceback
 
+parser = argparse.ArgumentParser(description="Iftar Clock: countdown to sunset")
+parser.add_argument("--serve", action="store_true",
+                    help="run headless, serving the countdown over HTTP instead of showing the clock")
+parser.add_argument("--publish", action="store_true",
+                    help="run headless, publishing the countdown in shared memory for the clocks on this host")
+parser.add_argument("--host", default="127.0.0.1", help="address the server listens on (default: 127.0.0.1)")
+parser.add_argument("--port", type=int, default=8765, help="port the server listens on (default: 8765)")
+parser.add_argument("--profile-startup", nargs="?", type=float, const=startup_profile.DEFAULT_BUDGET,
+                    metavar="BUDGET",
+                    help="print the startup timeline and exit after the first frame; fails if the first "
+                         f"paint takes longer than BUDGET seconds (default: {startup_profile.DEFAULT_BUDGET})")
+args = parser.parse_args()
+if args.profile_startup is not None:
+    startup_profile.enable(args.profile_startup)
+
 # Try to import and initialize our logger first
 try:
     from src.logger import logger
     logger.info("Starting iftar-clock application")
+    startup_profile.mark("logger ready")
 except Exception as ex:
     print(f"Failed to initialize logger: {ex}")
     print(traceback.format_exc())
     sys.exit(1)
 
+# Headless mode: no Tk, just the HTTP countdown server
+if args.serve:
+    try:
+        from src.countdown_server import serve
+        serve(args.host, args.port)
+    except Exception as e:
+        logger.critical("Fatal error in countdown server")
+        logger.exception(str(e))
+        sys.exit(1)
+    sys.exit(0)
+
+# Headless mode: host-wide producer of the shared countdown state
+if args.publish:
+    try:
+        from src.shared_state import publish
+        publish()
+    except Exception as e:
+        logger.critical("Fatal error in countdown publisher")
+        logger.exception(str(e))
+        sys.exit(1)
+    sys.exit(0)
+
 # Try to run the application
 try:
     import tkinter as tk
+    startup_profile.mark("tkinter imported")
     from src.iftar_app import main
+    startup_profile.mark("src.iftar_app imported")
     
     # Print some environment information
     logger.info(f"Python version: {sys.version}")
@@ -22,7 +64,9 @@ try:
     logger.info(f"Current directory: {os.getcwd()}")
     
     if __name__ == "__main__":
-        main()
+        within_budget = main()
+        if startup_profile.enabled:
+            sys.exit(0 if within_budget else 1)
 except Exception as e:
     logger.critical("Fatal error in main script")
     logger.exception(str(e))
@@ -0,0 +1,266 @@
+"""
+Offline city index for finding a location by name or coordinates.
+
+The bundled GeoNames extract (cities of 15000 people or more) is loaded once
+into parallel arrays ordered by population. Names are searched by prefix with
+a bisect over the sorted folded names, falling back to trigram matching for
+typos and partial words; the nearest city to a coordinate comes from a static
+KD-tree over unit vectors, so distances are right across the antimeridian and
+near the poles. Every city carries its IANA timezone, so a picked city gives a
+complete Location without any network request.
+"""
+
+import os
+import gzip
+import bisect
+import unicodedata
+import numpy as np
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from src.location_finder import Location
+from src.logger import logger
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CITIES_FILE = os.path.join(DATA_DIR, "cities15000.tsv.gz")
+COUNTRIES_FILE = os.path.join(DATA_DIR, "countries.tsv")
+# Points per KD-tree leaf, searched with one vectorized distance computation
+LEAF_SIZE = 16
+# Share of the query's trigrams a name must contain to count as a fuzzy match
+MIN_TRIGRAM_SCORE = 0.5
+EARTH_RADIUS_KM = 6371.0
+
+@dataclass(frozen=True)
+class City:
+    name: str
+    country: str
+    country_code: str
+    lat: float
+    lng: float
+    population: int
+    timezone: str
+
+    def to_location(self) -> Location:
+        return Location(lat=self.lat, lng=self.lng, city=self.name, country=self.country, timezone=self.timezone)
+
+    def label(self) -> str:
+        """Name shown in pickers, e.g. "Lahore, Pakistan" """
+        return f"{self.name}, {self.country}"
+
+def fold(text: str) -> str:
+    """Lowercase ASCII form of a name for matching: "São Paulo" -> "sao paulo" """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+def _trigrams(key: str) -> List[str]:
+    padded = f"  {key} "
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+def _unit_vectors(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    lat, lng = np.radians(lat), np.radians(lng)
+    return np.column_stack((np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)))
+
+class CityIndex:
+    """
+    Array-backed city table with name search and nearest-city lookup.
+
+    Row i of every array is the i-th most populous city, so sorting matches by
+    row number ranks them by population.
+    """
+
+    def __init__(self, names: List[str], keys: List[str], lat: np.ndarray, lng: np.ndarray,
+                 population: np.ndarray, country_ids: np.ndarray, countries: List[Tuple[str, str]],
+                 zone_ids: np.ndarray, zones: List[str]):
+        self.names = names
+        self.lat = lat
+        self.lng = lng
+        self.population = population
+        self.country_ids = country_ids
+        # (code, name) and zone names, referenced by the small integer ids above
+        self.countries = countries
+        self.zone_ids = zone_ids
+        self.zones = zones
+
+        # Prefix search: folded names in sorted order and the row of each
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._keys = keys
+        self._sorted_keys = [keys[i] for i in order]
+        self._sorted_rows = np.array(order, dtype=np.int32)
+        self._trigram_index: Optional[Dict[str, np.ndarray]] = None
+        self._build_tree()
+
+    @classmethod
+    def load(cls, path: str = CITIES_FILE, countries_path: str = COUNTRIES_FILE) -> "CityIndex":
+        """
+        Load the bundled city file
+        Args:
+            path (str): Gzipped GeoNames-style TSV: name, ASCII name, lat, lng, country code, population, timezone
+            countries_path (str): TSV of country code and name
+
+        Returns:
+            CityIndex: The index
+        """
+        country_names = {}
+        with open(countries_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.startswith("#"):
+                    code, name = line.rstrip("\n").split("\t")
+                    country_names[code] = name
+
+        names, keys, coords, population, country_ids, zone_ids = [], [], [], [], [], []
+        country_lookup: Dict[str, int] = {}
+        zone_lookup: Dict[str, int] = {}
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("#"):
+                    continue
+                name, ascii_name, lat, lng, code, people, zone = line.rstrip("\n").split("\t")
+                names.append(name)
+                keys.append(fold(ascii_name or name))
+                coords.append((float(lat), float(lng)))
+                population.append(int(people))
+                country_ids.append(country_lookup.setdefault(code, len(country_lookup)))
+                zone_ids.append(zone_lookup.setdefault(zone, len(zone_lookup)))
+
+        coords = np.array(coords, dtype=np.float64).reshape(-1, 2)
+        countries = [(code, country_names.get(code, code)) for code in country_lookup]
+        logger.debug(f"Loaded {len(names)} cities from {path}")
+        return cls(names, keys, coords[:, 0], coords[:, 1], np.array(population, dtype=np.int64),
+                   np.array(country_ids, dtype=np.uint16), countries,
+                   np.array(zone_ids, dtype=np.uint16), list(zone_lookup))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def city(self, row: int) -> City:
+        """The city in one row"""
+        code, country = self.countries[self.country_ids[row]]
+        return City(self.names[row], country, code, float(self.lat[row]), float(self.lng[row]),
+                    int(self.population[row]), self.zones[self.zone_ids[row]])
+
+    def search(self, query: str, limit: int = 10) -> List[City]:
+        """
+        Find cities by name, most populous first
+        Args:
+            query (str): Name or beginning of a name, optionally followed by ", country"
+                (name or ISO code), e.g. "lah", "London, CA", "Hyderabad, Pakistan"
+            limit (int): Maximum number of results
+
+        Returns:
+            List[City]: Prefix matches, then fuzzy (trigram) matches if there are too few
+        """
+        name, _, country = query.partition(",")
+        key, country = fold(name), fold(country)
+        if not key:
+            return []
+        allowed = self._country_filter(country) if country else None
+
+        lo = bisect.bisect_left(self._sorted_keys, key)
+        hi = bisect.bisect_left(self._sorted_keys, key + "\x7f", lo)
+        rows = np.sort(self._sorted_rows[lo:hi])
+        if allowed is not None:
+            rows = rows[allowed[rows]]
+        found = rows[:limit].tolist()
+
+        if len(found) < limit:
+            for row in self._fuzzy_rows(key):
+                if len(found) == limit:
+                    break
+                if row not in found and (allowed is None or allowed[row]):
+                    found.append(row)
+        return [self.city(row) for row in found]
+
+    def _country_filter(self, country: str) -> np.ndarray:
+        """Mask of the rows in countries whose code is, or whose name starts with, the folded text"""
+        ids = [i for i, (code, name) in enumerate(self.countries)
+               if code.lower() == country or fold(name).startswith(country)]
+        return np.isin(self.country_ids, ids)
+
+    def prepare(self) -> "CityIndex":
+        """
+        Build the trigram postings for fuzzy search now rather than on the first
+        fuzzy query, so a picker can do it on a worker thread before the user types
+        Returns:
+            CityIndex: This index
+        """
+        if self._trigram_index is None:
+            postings: Dict[str, List[int]] = {}
+            for row, name_key in enumerate(self._keys):
+                for trigram in _trigrams(name_key):
+                    postings.setdefault(trigram, []).append(row)
+            self._trigram_index = {trigram: np.array(rows, dtype=np.int32) for trigram, rows in postings.items()}
+        return self
+
+    def _fuzzy_rows(self, key: str) -> List[int]:
+        """Rows whose names share most of the query's trigrams, best match first"""
+        self.prepare()
+        query = _trigrams(key)
+        hits = [self._trigram_index[t] for t in query if t in self._trigram_index]
+        if not hits:
+            return []
+        counts = np.bincount(np.concatenate(hits), minlength=len(self))
+        rows = np.flatnonzero(counts >= max(1, MIN_TRIGRAM_SCORE * len(query)))
+        # Most shared trigrams first, then most populous (lowest row)
+        return rows[np.lexsort((rows, -counts[rows]))].tolist()
+
+    def _build_tree(self):
+        """Static KD-tree: points reordered so every subtree is a contiguous slice split at its middle"""
+        points = _unit_vectors(self.lat, self.lng)
+        perm = np.arange(len(points))
+        axes = np.zeros(len(points), dtype=np.int8)
+        stack = [(0, len(points))]
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                continue
+            segment = points[perm[lo:hi]]
+            axis = int(np.argmax(segment.max(axis=0) - segment.min(axis=0)))
+            perm[lo:hi] = perm[lo:hi][np.argsort(segment[:, axis], kind="stable")]
+            mid = (lo + hi) // 2
+            axes[mid] = axis
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+        self._tree_points = points[perm]
+        self._tree_rows = perm
+        self._tree_axes = axes
+
+    def nearest(self, lat: float, lng: float) -> Tuple[City, float]:
+        """
+        The city closest to a coordinate
+        Args:
+            lat (float): Latitude in degrees
+            lng (float): Longitude in degrees
+
+        Returns:
+            Tuple[City, float]: The city and its great-circle distance in km
+        """
+        query = _unit_vectors(np.array([lat]), np.array([lng]))[0]
+        points, axes = self._tree_points, self._tree_axes
+        best, best_index = np.inf, -1
+        stack = [(0, len(points), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if bound >= best:
+                continue
+            if hi - lo <= LEAF_SIZE:
+                distances = ((points[lo:hi] - query) ** 2).sum(axis=1)
+                i = int(np.argmin(distances))
+                if distances[i] < best:
+                    best, best_index = float(distances[i]), lo + i
+                continue
+            mid = (lo + hi) // 2
+            distance = float(((points[mid] - query) ** 2).sum())
+            if distance < best:
+                best, best_index = distance, mid
+            diff = float(query[axes[mid]] - points[mid, axes[mid]])
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # Far side pushed first so the near side is searched first
+            stack.append((*far, diff * diff))
+            stack.append((*near, bound))
+        chord = np.sqrt(best)
+        return self.city(int(self._tree_rows[best_index])), float(2 * EARTH_RADIUS_KM * np.arcsin(min(1.0, chord / 2)))
+
+@lru_cache(maxsize=1)
+def get_city_index() -> CityIndex:
+    """The bundled city index, loaded on first use"""
+    return CityIndex.load()
@@ -0,0 +1,81 @@
+import os
+import json
+from typing import Any, Dict
+from src.logger import logger
+
+CONFIG_DIR = os.path.join(os.path.expanduser('~'), '.iftar_clock')
+CONFIG_FILE = os.path.join(CONFIG_DIR, 'config.json')
+
+# Settings used when the config file doesn't override them
+DEFAULTS: Dict[str, Any] = {
+    # Pinned location, e.g. {"lat": 31.55, "lng": 74.34, "city": "Lahore", "timezone": "Asia/Karachi"}.
+    # When set, no network lookup is made to find the location.
+    "location": None,
+    # City name such as "Lahore" or "London, CA", resolved offline from the bundled
+    # city index when no location is pinned
+    "city": None,
+    # How long a resolved location is trusted before checking whether the public IP changed
+    "location_ttl_hours": 24,
+    # Where computed sunset tables are kept: "json" (~/iftar_clock.json) or "mmap"
+    # (~/.iftar_clock/sunsets.bin, a binary store shared by every clock process on the host)
+    "cache_backend": "json",
+    # Local time ("HH:MM") after which the countdown switches to tomorrow's sunset
+    "switchover_time": "20:00",
+    # Days after today whose sunsets are computed or fetched ahead in the background
+    "prefetch_days": 2,
+    # Twilight angles for Fajr and Isha: MWL, ISNA, Egypt, Makkah (Umm al-Qura), Karachi,
+    # Tehran, Gulf, Kuwait, Qatar, Singapore or Turkey
+    "prayer_method": "MWL",
+    # "iftar" counts down to sunset only; "dual" counts down to whichever comes
+    # next of the end of suhoor (Fajr) and iftar (Maghrib)
+    "countdown_mode": "iftar",
+    # Collect tick, network and disk timings from startup (also IFTAR_METRICS=1);
+    # otherwise collection starts when "Show metrics" is first opened
+    "metrics": False,
+}
+
+def load_config() -> Dict[str, Any]:
+    """
+    Load user settings from ~/.iftar_clock/config.json
+    Returns: Dictionary of settings with defaults filled in
+    """
+    config = dict(DEFAULTS)
+    try:
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r') as f:
+                user_config = json.load(f)
+            config.update(user_config)
+            logger.info(f"Loaded config from {CONFIG_FILE}: {sorted(user_config)}")
+    except Exception as e:
+        logger.error(f"Error loading config from {CONFIG_FILE}, using defaults: {e}")
+    return config
+
+def save_config(updates: Dict[str, Any]) -> bool:
+    """
+    Merge settings into ~/.iftar_clock/config.json, written atomically
+    Args:
+        updates (Dict): Settings to change; a value of None removes the setting
+
+    Returns:
+        bool: True if the file was written
+    """
+    try:
+        user_config: Dict[str, Any] = {}
+        if os.path.exists(CONFIG_FILE):
+            with open(CONFIG_FILE, 'r') as f:
+                user_config = json.load(f)
+        for key, value in updates.items():
+            if value is None:
+                user_config.pop(key, None)
+            else:
+                user_config[key] = value
+        os.makedirs(CONFIG_DIR, exist_ok=True)
+        tmp_file = CONFIG_FILE + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(user_config, f, indent=2)
+        os.replace(tmp_file, CONFIG_FILE)
+        logger.info(f"Saved config to {CONFIG_FILE}: {sorted(updates)}")
+        return True
+    except Exception as e:
+        logger.error(f"Error saving config to {CONFIG_FILE}: {e}")
+        return False
@@ -0,0 +1,97 @@
+import time
+from typing import Optional
+
+# What a countdown is counting down to
+IFTAR = "iftar"
+SUHOOR = "suhoor"
+
+class CountdownState:
+    """
+    Precomputed countdown to the current target instant.
+
+    The target (sunset being counted down to) and the switch instant (when the
+    target must be re-selected, e.g. at sunset, the evening switchover or
+    midnight) are stored once as epoch floats and translated to the monotonic
+    clock, so a tick costs one `time.monotonic()` read and a subtraction.
+    `resync` re-anchors the monotonic values to the wall clock, which keeps the
+    countdown honest across system sleep or clock adjustments.
+    """
+
+    __slots__ = ("target_epoch", "switch_epoch", "is_tomorrow", "event", "_target_mono", "_switch_mono")
+
+    def __init__(self):
+        self.target_epoch: Optional[float] = None
+        self.switch_epoch = 0.0
+        self.is_tomorrow = False
+        self.event = IFTAR
+        self._target_mono: Optional[float] = None
+        self._switch_mono = float("-inf")  # Not armed: expired straight away
+
+    def arm(self, target_epoch: Optional[float], switch_epoch: float, is_tomorrow: bool = False,
+            event: str = IFTAR):
+        """
+        Set a new countdown
+        Args:
+            target_epoch (float, optional): Instant to count down to, None for no countdown
+            switch_epoch (float): Instant after which the state must be re-armed
+            is_tomorrow (bool): Whether the target is tomorrow's sunset
+            event (str): IFTAR for a sunset target, SUHOOR for the end of suhoor (Fajr)
+        """
+        self.target_epoch = target_epoch
+        self.switch_epoch = switch_epoch
+        self.is_tomorrow = is_tomorrow
+        self.event = event
+        self.resync()
+
+    def resync(self):
+        """Re-anchor the monotonic deadlines to the wall clock"""
+        offset = time.monotonic() - time.time()
+        self._target_mono = None if self.target_epoch is None else self.target_epoch + offset
+        self._switch_mono = self.switch_epoch + offset
+
+    def expired(self) -> bool:
+        """True once the switch instant has passed and the state needs re-arming"""
+        return time.monotonic() >= self._switch_mono
+
+    def label(self) -> str:
+        """Title shown above the countdown"""
+        if self.event == SUHOOR:
+            return "Suhoor ends in"
+        return "Tomorrow's Iftar in" if self.is_tomorrow else "Iftar in"
+
+    def remaining_seconds(self) -> Optional[float]:
+        """Seconds left until the target, None if there is no countdown"""
+        target = self._target_mono
+        if target is None:
+            return None
+        return target - time.monotonic()
+
+class CountdownText:
+    """Display string for a countdown, only rebuilt when the shown minute changes"""
+
+    __slots__ = ("_minutes", "_tomorrow", "_text")
+
+    def __init__(self):
+        self._minutes: Optional[int] = None
+        self._tomorrow = False
+        self._text = "--:--"
+
+    def render(self, remaining: Optional[float], tomorrow: bool = False) -> str:
+        """
+        Format remaining seconds as "HH:MM", prefixed with "T " for tomorrow's sunset
+        Args:
+            remaining (float, optional): Seconds left, None if there is no countdown
+            tomorrow (bool): Whether the target is tomorrow's sunset
+
+        Returns:
+            str: The display string, "--:--" without a countdown
+        """
+        if remaining is None:
+            return "--:--"
+        minutes = int(remaining // 60)
+        if minutes != self._minutes or tomorrow != self._tomorrow:
+            text = f"{minutes // 60:02d}:{minutes % 60:02d}"
+            self._text = "T " + text if tomorrow else text
+            self._minutes = minutes
+            self._tomorrow = tomorrow
+        return self._text
@@ -0,0 +1,257 @@
+"""
+Headless countdown daemon serving sunset data over a small HTTP/JSON API.
+
+One instance computes the sunset tables and keeps them in memory; thin clients
+and signage on the LAN poll it instead of each running their own lookups.
+
+Endpoints (GET only):
+    /countdown                       current target and time remaining
+    /sunset?date=YYYY-MM-DD          Fajr, sunrise and sunset for one day
+    /sunsets?from=YYYY-MM-DD&to=...  the same for a range of days
+
+Per-day responses are serialized once when the tables are (re)built and the
+countdown response at most once per second, so a request costs little more
+than parsing its request line. Connections are kept alive (HTTP/1.1), except
+after a non-GET request or one that carries a body, since bodies aren't read.
+
+Refreshes run on an executor thread while requests are answered on the event
+loop; the calculator's lock keeps the two from re-arming the countdown at the
+same time, and the event loop never waits for a refresh to finish.
+"""
+
+import json
+import time
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+from src.sunset_calculator import SunsetCalculator
+from src.sunset_table import SunsetTable
+from src.logger import logger
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# How often the tables are refreshed (location, next year's table, prefetch window)
+REFRESH_INTERVAL = 3600
+# Idle keep-alive connections are closed after this many seconds
+KEEP_ALIVE_TIMEOUT = 30
+# A request's headers must arrive within this many seconds of its request line
+HEADER_TIMEOUT = 10
+# Longest range /sunsets will return
+MAX_RANGE_DAYS = 366
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           503: "Service Unavailable"}
+
+def _error(message: str) -> bytes:
+    return json.dumps({"error": message}).encode("utf-8")
+
+class CountdownServer:
+    """asyncio HTTP server answering from a SunsetCalculator's in-memory tables"""
+
+    def __init__(self, calculator: Optional[SunsetCalculator] = None,
+                 host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 refresh_interval: float = REFRESH_INTERVAL):
+        self.calculator = calculator or SunsetCalculator()
+        self.host = host
+        self.port = port
+        self.refresh_interval = refresh_interval
+        # Serialized {"date", "fajr", "sunrise", "sunset"} objects per day
+        self._days: Dict[date, bytes] = {}
+        self._location = b"null"
+        self._countdown_second: Optional[int] = None
+        self._countdown_body = b""
+        self.requests_served = 0
+
+    def _rebuild(self):
+        """Serialize every day of the calculator's tables, called after each refresh"""
+        days = {}
+        calculator = self.calculator
+        for table in (calculator.table, calculator.next_table):
+            if table is not None:
+                days.update(self._serialize_table(table))
+        if calculator.table is not None:
+            location = calculator.table.location
+            self._location = json.dumps({"lat": location.lat, "lng": location.lng, "city": location.city,
+                                         "country": location.country, "timezone": location.timezone}).encode("utf-8")
+        self._days = days
+        self._countdown_second = None
+        logger.info(f"Serving {len(days)} days of sunset data")
+
+    @staticmethod
+    def _serialize_table(table: SunsetTable) -> Dict[date, bytes]:
+        days = {}
+        for i in range(len(table)):
+            day = table.start + timedelta(days=i)
+            record = {"date": day.isoformat()}
+            for event in ("fajr", "sunrise", "sunset"):
+                value = getattr(table, event)(day)
+                record[event] = value.isoformat() if value else None
+            days[day] = json.dumps(record).encode("utf-8")
+        return days
+
+    async def _refresh(self):
+        """Refresh the calculator on a worker thread, then swap in the new responses"""
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self.calculator.refresh)
+            self._rebuild()
+        except Exception as e:
+            logger.exception(f"Error refreshing sunset data: {e}")
+
+    async def _refresh_periodically(self):
+        while True:
+            await self._refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    def _countdown(self) -> bytes:
+        """Countdown response, rebuilt at most once per second"""
+        second = int(time.time())
+        if second != self._countdown_second:
+            calculator = self.calculator
+            # Only re-arms the countdown when no refresh holds the calculator's lock,
+            # and never rebuilds tables (that is left to the next refresh)
+            remaining = calculator.remaining_seconds()
+            countdown = calculator.countdown
+            target = None
+            if remaining is not None and countdown.target_epoch is not None:
+                # route() only answers /countdown once the table is built
+                target = datetime.fromtimestamp(countdown.target_epoch, calculator.table.tz).isoformat()
+            self._countdown_body = json.dumps({
+                "remaining_seconds": int(remaining) if remaining is not None else None,
+                "display": calculator.format_remaining_time(),
+                "event": countdown.event,
+                "target": target,
+                "is_tomorrow": countdown.is_tomorrow,
+                "switch_at": countdown.switch_epoch,
+            }).encode("utf-8")
+            self._countdown_second = second
+        return self._countdown_body
+
+    def route(self, target: str) -> Tuple[int, bytes]:
+        """
+        Answer one request
+        Args:
+            target (str): Request target, path and query string
+
+        Returns:
+            Tuple[int, bytes]: Status code and JSON body
+        """
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        if url.path == "/countdown":
+            if self.calculator.table is None:
+                return 503, _error("sunset data is not ready yet")
+            return 200, self._countdown()
+
+        if url.path == "/sunset":
+            try:
+                day = date.fromisoformat(query["date"][0]) if "date" in query else date.today()
+            except ValueError:
+                return 400, _error("date must be YYYY-MM-DD")
+            body = self._days.get(day)
+            if body is None:
+                return 404, _error(f"no sunset data for {day}")
+            return 200, body
+
+        if url.path == "/sunsets":
+            try:
+                start = date.fromisoformat(query["from"][0])
+                end = date.fromisoformat(query["to"][0])
+            except (KeyError, ValueError):
+                return 400, _error("from and to must be YYYY-MM-DD")
+            days = (end - start).days + 1
+            if not 0 < days <= MAX_RANGE_DAYS:
+                return 400, _error(f"range must cover 1 to {MAX_RANGE_DAYS} days")
+            records = [self._days.get(start + timedelta(days=i)) for i in range(days)]
+            if any(record is None for record in records):
+                return 404, _error(f"no sunset data for part of {start}..{end}")
+            return 200, b'{"location":' + self._location + b',"sunsets":[' + b",".join(records) + b"]}"
+
+        return 404, _error(f"unknown path {url.path}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it or goes idle"""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                keep_alive = len(parts) == 3 and parts[2] == "HTTP/1.1"
+                try:
+                    connection, has_body = await asyncio.wait_for(self._read_headers(reader), HEADER_TIMEOUT)
+                except asyncio.TimeoutError:
+                    # A client that stalls mid-request doesn't get to hold the connection
+                    break
+                if connection is not None:
+                    keep_alive = connection
+                if has_body:
+                    # The unread body would be parsed as the next request
+                    keep_alive = False
+
+                if len(parts) != 3:
+                    status, body = 400, _error("malformed request line")
+                    keep_alive = False
+                elif parts[0] != "GET":
+                    status, body = 405, _error("only GET is supported")
+                    keep_alive = False
+                else:
+                    status, body = self.route(parts[1])
+                self.requests_served += 1
+
+                writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n%s\r\n"
+                             % (status, REASONS[status].encode("ascii"), len(body),
+                                b"Connection: keep-alive\r\n" if keep_alive else b"Connection: close\r\n") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.exception(f"Error serving request: {e}")
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Tuple[Optional[bool], bool]:
+        """
+        Read a request's headers; only Connection matters, request bodies aren't accepted
+        Returns:
+            Tuple[Optional[bool], bool]: Keep-alive as asked by the Connection header
+            (None if absent), and whether the request declares a body
+        """
+        connection = None
+        has_body = False
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return connection, has_body
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "connection":
+                if value in ("close", "keep-alive"):
+                    connection = value == "keep-alive"
+            elif name == "transfer-encoding" or (name == "content-length" and value != "0"):
+                has_body = True
+
+    async def serve(self):
+        """Serve until cancelled; requests get 503/404 until the first refresh has loaded the data"""
+        server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        logger.info(f"Countdown server listening on http://{self.host}:{self.port}")
+        refresher = asyncio.ensure_future(self._refresh_periodically())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            refresher.cancel()
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """Run the countdown server in the foreground"""
+    try:
+        asyncio.run(CountdownServer(host=host, port=port).serve())
+    except KeyboardInterrupt:
+        logger.info("Countdown server stopped")
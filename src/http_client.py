@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple, Union
+from src.logger import logger
+
+if TYPE_CHECKING:
+    import requests
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.iftar_clock', 'http_cache')
+# Cached responses are deleted once this old, and the oldest ones beyond this many
+CACHE_MAX_AGE = 30 * 86400
+CACHE_MAX_ENTRIES = 256
+# Validator headers kept with cached responses, by lowercase name, in the spelling they are stored under
+VALIDATOR_HEADERS = {"etag": "ETag", "last-modified": "Last-Modified"}
+
+@dataclass
+class HttpResponse:
+    """Response returned by HttpClient, either fresh from the network or from the cache"""
+    status_code: int
+    text: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    from_cache: bool = False
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+def clock() -> float:
+    """Wall-clock time used for cache freshness, replaceable in tests"""
+    return time.time()
+
+class HttpClient:
+    """
+    Connection-pooled HTTP client shared by the finders.
+
+    Every request has a timeout, transient failures are retried with bounded
+    exponential backoff, and successful responses can be kept in an on-disk
+    cache with a TTL. Stale cache entries are revalidated with a conditional
+    request (ETag / Last-Modified) and served as a last resort when the
+    network is unavailable. The cache is pruned by age and entry count
+    whenever a new response is stored.
+    """
+
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = (3.05, 10),
+                 retries: int = 2, backoff: float = 0.5, max_backoff: float = 4.0,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR, pool_size: int = 4):
+        """
+        Args:
+            timeout: Default (connect, read) timeout in seconds for each attempt
+            retries (int): Extra attempts after the first one fails
+            backoff (float): Delay before the first retry, doubled after each attempt
+            max_backoff (float): Upper bound for a single retry delay
+            cache_dir (str, optional): Directory for cached responses, None disables caching
+            pool_size (int): Keep-alive connections kept per host
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cache_dir = cache_dir
+
+        # requests is slow to import, so it is only loaded once a client is needed
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        logger.debug(f"HttpClient initialized (timeout={timeout}, retries={retries}, cache={cache_dir})")
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, cache_ttl: float = 0,
+            timeout: Union[float, Tuple[float, float], None] = None) -> Optional[HttpResponse]:
+        """
+        Perform a GET request
+        Args:
+            url (str): Request URL
+            params (Dict, optional): Query parameters
+            cache_ttl (float): Seconds a 200 response stays fresh in the cache (0 disables caching)
+            timeout (optional): Per-call timeout overriding the client default
+
+        Returns:
+            HttpResponse: The final response, or None if every attempt failed
+        """
+        cache_path = self._cache_path(url, params) if cache_ttl and self.cache_dir else None
+        cached = self._read_cache(cache_path) if cache_path else None
+
+        if cached and clock() - cached["fetched_at"] < cache_ttl:
+            logger.debug(f"HTTP cache hit for {url}")
+            return self._cached_response(cached)
+
+        headers = {}
+        if cached:
+            if cached["headers"].get("ETag"):
+                headers["If-None-Match"] = cached["headers"]["ETag"]
+            if cached["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = cached["headers"]["Last-Modified"]
+
+        response = self._request(url, params, headers, timeout or self.timeout)
+
+        if response is None:
+            if cached:
+                logger.warning(f"Network unavailable, serving stale cache for {url}")
+                return self._cached_response(cached)
+            return None
+
+        if response.status_code == 304 and cached:
+            logger.debug(f"HTTP cache revalidated for {url}")
+            cached["fetched_at"] = clock()
+            self._write_cache(cache_path, cached)
+            return self._cached_response(cached)
+
+        result = HttpResponse(
+            status_code=response.status_code,
+            text=response.text,
+            # Header names are case-insensitive; servers may send "etag" or "last-modified"
+            headers={VALIDATOR_HEADERS[k.lower()]: v for k, v in response.headers.items()
+                     if k.lower() in VALIDATOR_HEADERS},
+        )
+        if cache_path and response.status_code == 200:
+            self._write_cache(cache_path, {
+                "url": url,
+                "fetched_at": clock(),
+                "status_code": result.status_code,
+                "headers": result.headers,
+                "text": result.text,
+            })
+            self._prune_cache()
+        return result
+
+    def _request(self, url, params, headers, timeout) -> Optional["requests.Response"]:
+        """
+        Send the request, retrying connection errors, timeouts and transient statuses.
+        Other request errors (bad URL, redirect loop, undecodable body) are not retried
+        and count as a failed request.
+        """
+        import requests
+        response = None
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                logger.warning(f"GET {url} returned {response.status_code} (attempt {attempt + 1})")
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                logger.warning(f"GET {url} failed (attempt {attempt + 1}): {e}")
+            except requests.RequestException as e:
+                logger.error(f"GET {url} failed: {e}")
+                return None
+
+            if attempt < self.retries:
+                time.sleep(min(self.backoff * (2 ** attempt), self.max_backoff))
+
+        if response is None:
+            logger.error(f"GET {url} failed after {self.retries + 1} attempts")
+        return response
+
+    def _cache_path(self, url: str, params: Optional[Dict[str, Any]]) -> str:
+        key = url + "?" + "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    @staticmethod
+    def _cached_response(entry: Dict[str, Any]) -> HttpResponse:
+        return HttpResponse(entry["status_code"], entry["text"], entry["headers"], from_cache=True)
+
+    @staticmethod
+    def _read_cache(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable HTTP cache entry {path}: {e}")
+            return None
+
+    def _prune_cache(self):
+        """Delete cache entries older than CACHE_MAX_AGE, then the oldest beyond CACHE_MAX_ENTRIES"""
+        try:
+            entries = []
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.is_file():
+                        entries.append((entry.stat().st_mtime, entry.path))
+            entries.sort(reverse=True)
+            cutoff = clock() - CACHE_MAX_AGE
+            for i, (mtime, path) in enumerate(entries):
+                if i >= CACHE_MAX_ENTRIES or mtime < cutoff:
+                    os.remove(path)
+        except OSError as e:
+            logger.warning(f"Failed to prune HTTP cache {self.cache_dir}: {e}")
+
+    @staticmethod
+    def _write_cache(path: str, entry: Dict[str, Any]):
+        """Write a cache entry atomically so readers never see a partial file"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write HTTP cache entry {path}: {e}")
+
+_default_client: Optional[HttpClient] = None
+_default_client_lock = threading.Lock()
+
+def get_default_client() -> HttpClient:
+    """Shared HttpClient used when a finder isn't given its own"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
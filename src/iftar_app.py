@@ -1,12 +1,20 @@
 import tkinter as tk
 import tkinter.ttk as ttk
 import random
+import logging
 import time
 from datetime import datetime
 import traceback
-from src.sunset_calculator import SunsetCalculator
+from src.shared_state import SharedCountdown
+from src.refresh_worker import RefreshWorker
+from src.scheduler import TkScheduler
+from src import startup_profile
+from src.metrics import metrics
 from src.logger import logger
 
+# Matches listed while typing in the city picker
+CITY_RESULTS = 12
+
 class IftarApp:
     def __init__(self, root):
         logger.info("Starting Iftar Clock application")
@@ -43,25 +51,31 @@ class IftarApp:
         # Initialize sunset calculator
         logger.debug("Initializing SunsetCalculator")
         try:
-            self.sunset_calculator = SunsetCalculator()
-            logger.info("SunsetCalculator initialized successfully")
+            # A host-wide producer (main.py --publish) spares this instance all network and disk I/O
+            self.sunset_calculator = SharedCountdown.attach()
+            if self.sunset_calculator is None:
+                from src.sunset_calculator import SunsetCalculator
+                self.sunset_calculator = SunsetCalculator()
+            logger.info(f"{type(self.sunset_calculator).__name__} initialized successfully")
         except Exception as e:
             logger.critical("Failed to initialize SunsetCalculator")
             logger.exception(str(e))
             self.show_error("Failed to initialize application")
             return
         
+        # Network and disk work runs in the background, never on the Tk thread
+        self.refresh_worker = RefreshWorker(self.root)
+        self.refresh_future = None
+        self.sunset_calculator.on_refresh_needed = self.request_refresh
+        startup_profile.mark("sunset calculator ready")
+        
+        # Show the countdown from cached data before anything is fetched or computed
+        if self.sunset_calculator.load_first_frame():
+            self.update_clock()
+        
         # Get initial sunset data
         logger.info("Fetching initial sunset data")
-        try:
-            self.sunset_calculator.fetch_and_save_sunset()
-            
-            # Try to get and display the time immediately
-            self.update_clock_immediately()
-        except Exception as e:
-            logger.error("Failed to fetch initial sunset data")
-            logger.exception(str(e))
-            self.time_var.set("ERROR")
+        self.request_refresh()
             
         # Start timer to update display
         logger.debug("Starting update timer")
@@ -152,16 +166,27 @@ class IftarApp:
         self.root.update_idletasks()
     
     def start_timer(self):
-        """Start timer to update clock every second"""
-        try:
-            self.update_clock()
-        except Exception as e:
-            logger.error("Error in update_clock")
-            logger.exception(str(e))
-            
-        # Make sure timer keeps running
-        self.root.after(1000, self.start_timer)  # Update every second
+        """Register the timed jobs that keep the display up to date"""
+        self.scheduler = TkScheduler(self.root)
+        
+        # The countdown, its color and the visibility check all run when the
+        # displayed minute changes, so they share one job and a single wakeup
+        self.scheduler.add_job("display", self.on_display_change, self.next_display_change)
+        
+        # Refetch sunset data every hour
+        self.scheduler.every("hourly_refresh", 3600, self.hourly_refresh)
+    
+    def on_display_change(self):
+        """Run everything that happens when the displayed minute changes"""
+        self.update_clock()
+        self.change_color()
+        self.check_visibility()
+    
+    def next_display_change(self, now):
+        """Epoch time at which the countdown text will next change"""
+        return self.sunset_calculator.next_display_change(now)
     
+    @metrics.timed("iftar_update_clock_seconds")
     def update_clock(self):
         """Update the countdown display"""
         logger.debug("Updating clock display")
@@ -170,43 +195,39 @@ class IftarApp:
             current_value = self.time_var.get()
             
             if time_str != current_value:
-                logger.info(f"Updating clock from {current_value} to {time_str}")
+                logger.info("Updating clock from %s to %s", current_value, time_str)
             
             # Check if we need to update the title label (if showing tomorrow's time)
             if time_str.startswith("T "):
                 self.title_label.config(text="Tomorrow's Iftar in")
                 time_str = time_str[2:]  # Remove the T prefix for display
             else:
-                self.title_label.config(text="Iftar in")
+                # "Iftar in", or "Suhoor ends in" in the dual countdown mode
+                self.title_label.config(text=self.sunset_calculator.countdown.label())
             
             self.time_var.set(time_str)
-            
-            # Change color if seconds are 0 (minute change)
-            now = datetime.now()
-            if now.second == 0:
-                new_color = self.get_random_color()
-                logger.debug(f"Changing color to {new_color}")
-                self.time_label.config(fg=new_color)
-            
-            # Refetch sunset data every hour
-            if now.minute == 0 and now.second == 0:
-                logger.info("Hourly update: Fetching new sunset data")
-                self.sunset_calculator.fetch_and_save_sunset()
-                
-            # Log periodically to show the app is running
-            if now.second % 30 == 0:
-                logger.info(f"Clock running: {now.strftime('%H:%M:%S')} - Iftar in: {time_str}")
-                
-            # Make sure the window is visible
-            if now.second % 10 == 0 and not self.root.winfo_viewable():
-                logger.warning("Window not visible, trying to make it visible")
-                self.make_window_visible()
-                
         except Exception as e:
             logger.error("Error updating clock")
             logger.exception(str(e))
             self.time_var.set("ERROR")
     
+    def change_color(self):
+        """Give the countdown a new color when the minute changes"""
+        new_color = self.get_random_color()
+        logger.debug("Changing color to %s", new_color)
+        self.time_label.config(fg=new_color)
+    
+    def check_visibility(self):
+        """Log that the app is running and make sure the window is visible"""
+        logger.info("Clock running: %s - Iftar in: %s", datetime.now().strftime('%H:%M:%S'), self.time_var.get())
+        if not self.root.winfo_viewable():
+            logger.warning("Window not visible, trying to make it visible")
+            self.make_window_visible()
+    
+    def hourly_refresh(self):
+        logger.info("Hourly update: Fetching new sunset data")
+        self.request_refresh()
+    
     def make_window_visible(self):
         """Attempt to make the window visible again"""
         try:
@@ -227,10 +248,15 @@ class IftarApp:
     def add_context_menu(self):
         """Add context menu on right-click"""
         logger.debug("Adding context menu")
-        menu = tk.Menu(self.root, tearoff=0)
+        menu = self.menu = tk.Menu(self.root, tearoff=0)
         menu.add_command(label="Refresh", command=self.refresh_data)
+        # A shared-memory reader shows the publisher's countdown, whose location it can't change
+        reader = isinstance(self.sunset_calculator, SharedCountdown)
+        menu.add_command(label="Choose city...", command=self.choose_city,
+                         state="disabled" if reader else "normal")
         menu.add_command(label="Toggle Border", command=self.toggle_border)
         menu.add_command(label="Show logs", command=self.show_logs)
+        menu.add_command(label="Show metrics", command=self.show_metrics)
         menu.add_separator()
         menu.add_command(label="Exit", command=self.exit_app)
         
@@ -256,12 +282,14 @@ class IftarApp:
         self.make_window_visible()
     
     def start_move(self, event):
-        logger.debug(f"Starting window move from {self.root.winfo_x()},{self.root.winfo_y()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Starting window move from %s,%s", self.root.winfo_x(), self.root.winfo_y())
         self.x = event.x
         self.y = event.y
     
     def stop_move(self, event):
-        logger.debug(f"Window moved to {self.root.winfo_x()},{self.root.winfo_y()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Window moved to %s,%s", self.root.winfo_x(), self.root.winfo_y())
         self.x = None
         self.y = None
     
@@ -272,19 +300,139 @@ class IftarApp:
         y = self.root.winfo_y() + deltay
         self.root.geometry(f"+{x}+{y}")
     
+    def request_refresh(self, force=False, error_callback=None):
+        """Refresh sunset data on the background worker unless a refresh is already running"""
+        if self.refresh_future and not self.refresh_future.done():
+            logger.debug("Sunset refresh already in progress")
+            return
+        self.refresh_future = self.refresh_worker.submit(
+            lambda: self.refresh_calculator(force),
+            callback=self.on_refresh_done,
+            error_callback=error_callback or self.on_refresh_failed
+        )
+    
+    def refresh_calculator(self, force=False):
+        """
+        Refresh sunset data on the worker thread
+        Args:
+            force (bool): Drop cached sunsets and location first
+            
+        Returns:
+            The calculator to use from now on: a local one once the shared-memory producer is gone
+        """
+        calculator = self.sunset_calculator
+        if isinstance(calculator, SharedCountdown) and calculator.stale:
+            from src.sunset_calculator import SunsetCalculator
+            logger.warning("Shared countdown producer stopped publishing, computing the countdown locally")
+            calculator = SunsetCalculator()
+        calculator.refresh(force=force)
+        return calculator
+    
+    def on_refresh_done(self, calculator):
+        """Called on the Tk thread once background sunset data is ready"""
+        logger.info("Sunset data refreshed")
+        if calculator is not self.sunset_calculator:
+            self.sunset_calculator.close()
+            calculator.on_refresh_needed = self.request_refresh
+            self.sunset_calculator = calculator
+            self.menu.entryconfig("Choose city...", state="normal")
+        self.update_clock()
+        # The sunset may have moved, so the next display change has too
+        self.scheduler.reschedule("display")
+    
+    def on_refresh_failed(self, error):
+        """Called on the Tk thread when a background refresh raised"""
+        logger.error(f"Failed to refresh sunset data: {error}")
+        self.time_var.set("ERROR")
+    
     def refresh_data(self):
         """Force refresh of sunset data"""
         logger.info("Manually refreshing sunset data")
-        try:
-            # Clear cached data
-            self.sunset_calculator.sunsets = {}
-            self.sunset_calculator.fetch_and_save_sunset()
-            self.update_clock_immediately()  # Update clock right away
-            logger.info("Manual refresh completed")
-        except Exception as e:
-            logger.error("Error during manual refresh")
-            logger.exception(str(e))
+        
+        def on_error(error):
+            self.on_refresh_failed(error)
             self.show_error("Failed to refresh data")
+        
+        self.request_refresh(force=True, error_callback=on_error)
+    
+    def choose_city(self):
+        """Search the bundled city index and pin the picked city as the location"""
+        from src.city_index import get_city_index
+        logger.info("Opening city picker")
+        # Loaded and prepared on the worker thread; the dialog stays responsive meanwhile
+        loaded = []
+        results = []
+        
+        top = tk.Toplevel(self.root)
+        top.title("Choose city")
+        top.geometry("320x280")
+        top.attributes("-topmost", True)
+        
+        query = tk.StringVar()
+        entry = tk.Entry(top, textvariable=query)
+        entry.pack(fill="x", padx=10, pady=(10, 5))
+        listbox = tk.Listbox(top)
+        listbox.pack(fill="both", expand=True, padx=10)
+        
+        def update_results(*args):
+            listbox.delete(0, tk.END)
+            if not loaded:
+                results.clear()
+                listbox.insert(tk.END, "Loading cities...")
+                return
+            results[:] = loaded[0].search(query.get(), limit=CITY_RESULTS)
+            for city in results:
+                listbox.insert(tk.END, city.label())
+        
+        def on_loaded(index):
+            loaded.append(index)
+            if top.winfo_exists():
+                update_results()
+        
+        def on_failed(error):
+            if top.winfo_exists():
+                listbox.delete(0, tk.END)
+                listbox.insert(tk.END, "City list unavailable")
+        
+        def pick(event=None):
+            selection = listbox.curselection()
+            if not results:
+                return
+            city = results[selection[0] if selection else 0]
+            top.destroy()
+            self.set_location(city.to_location())
+        
+        def detect():
+            top.destroy()
+            self.set_location(None)
+        
+        query.trace_add("write", update_results)
+        entry.bind("<Return>", pick)
+        listbox.bind("<Double-Button-1>", pick)
+        buttons = tk.Frame(top)
+        buttons.pack(pady=5)
+        tk.Button(buttons, text="Use city", command=pick).pack(side="left", padx=5)
+        tk.Button(buttons, text="Detect automatically", command=detect).pack(side="left", padx=5)
+        entry.focus_set()
+        update_results()
+        self.refresh_worker.submit(lambda: get_city_index().prepare(), callback=on_loaded, error_callback=on_failed)
+    
+    def set_location(self, location):
+        """
+        Pin a location in the config (None goes back to IP-based detection) and refresh
+        Args:
+            location (Location, optional): The location to use
+        """
+        from dataclasses import asdict
+        from src.config import save_config
+        pinned = asdict(location) if location is not None else None
+        logger.info(f"Setting location to {pinned or 'automatic detection'}")
+        save_config({"location": pinned, "city": None})
+        # The location finder shares this dict and only reads the config file at startup
+        config = self.sunset_calculator.config
+        config["location"] = pinned
+        config["city"] = None
+        self.refresh_data()
     
     def show_logs(self):
         """Show the log file"""
@@ -302,9 +450,37 @@ class IftarApp:
         else:  # Linux
             subprocess.call(['xdg-open', log_dir])
     
+    def show_metrics(self):
+        """Show collected metrics and save them next to the logs"""
+        import os
+        if not metrics.enabled:
+            # Nothing is recorded until now; reopen the window later for numbers
+            metrics.enable()
+        log_dir = os.path.join(os.path.expanduser('~'), '.iftar_clock')
+        try:
+            with open(os.path.join(log_dir, 'metrics.json'), 'w') as f:
+                f.write(metrics.to_json())
+            with open(os.path.join(log_dir, 'metrics.prom'), 'w') as f:
+                f.write(metrics.to_prometheus())
+            logger.info(f"Saved metrics snapshot to {log_dir}")
+        except OSError as e:
+            logger.warning(f"Failed to save metrics snapshot: {e}")
+        
+        top = tk.Toplevel(self.root)
+        top.title("Metrics")
+        top.geometry("520x360")
+        text = tk.Text(top, wrap="none", font=("Courier", 9))
+        text.insert("1.0", metrics.to_prometheus() if metrics.histograms or metrics.counters
+                    else "Metrics collection started, reopen this window to see timings.")
+        text.config(state="disabled")
+        text.pack(fill="both", expand=True)
+        tk.Button(top, text="Close", command=top.destroy).pack(pady=5)
+    
     def exit_app(self):
         """Exit the application"""
         logger.info("Application shutting down")
+        self.scheduler.cancel_all()
+        self.refresh_worker.shutdown()
         self.root.destroy()
     
     def show_error(self, message):
@@ -344,6 +520,12 @@ def main():
         # Now show the main window
         root.deiconify()
         root.lift()
+        root.update_idletasks()
+        startup_profile.mark(f"first paint ({app.time_var.get()})")
+        if startup_profile.enabled:
+            within_budget = startup_profile.report()
+            app.exit_app()
+            return within_budget
         
         logger.info("Entering main event loop")
         root.mainloop()
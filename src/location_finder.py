@@ -1,8 +1,18 @@
-import requests
-from dataclasses import dataclass
+import os
+import json
+import math
+import time
+from dataclasses import dataclass, asdict
 from typing import Optional, Tuple
+from src.config import CONFIG_DIR, DEFAULTS, load_config
+from src.http_client import HttpClient, get_default_client
+from src.metrics import metrics
+from src.timezone_index import zone_at
 from src.logger import logger
 
+# A bare lat/lng location is named after the nearest bundled city within this distance
+NEAREST_CITY_KM = 30
+
 @dataclass
 class Location:
     lat: float
@@ -11,6 +21,11 @@ class Location:
     country: str = "Unknown"
     timezone: str = ""
     
+    def __post_init__(self):
+        # A location without a zone gets one from the bundled boundary index, no API round trip
+        if not self.timezone:
+            self.timezone = zone_at(self.lat, self.lng) or ""
+    
     @classmethod
     def from_lat_lng_string(cls, lat_lng: str):
         """Create Location from a 'lat,lng' formatted string"""
@@ -32,11 +47,53 @@ class Location:
         logger.error(f"Invalid lat_lng string format: {lat_lng}")
         return None
 
+def parse_location_ttl(value) -> float:
+    """
+    Parse the configured location lifetime
+    Args:
+        value (float): Hours a resolved location is trusted for
+        
+    Returns:
+        float: The lifetime in seconds, the default one if the value is invalid
+    """
+    try:
+        hours = float(value)
+        if math.isfinite(hours) and hours >= 0:
+            return hours * 3600
+    except (TypeError, ValueError):
+        pass
+    logger.warning(f"Invalid location_ttl_hours {value!r}, using {DEFAULTS['location_ttl_hours']}")
+    return float(DEFAULTS["location_ttl_hours"]) * 3600
+
 class LocationFinder:
-    def __init__(self):
-        self.api_url = "https://ipapi.co"
+    def __init__(self, api_url: str = "https://ipapi.co", client: Optional[HttpClient] = None,
+                 config: Optional[dict] = None):
+        """
+        Args:
+            api_url (str): ipapi.co base URL (overridable for a local stub server)
+            client (HttpClient, optional): HTTP client, defaults to the shared one
+            config (dict, optional): Settings, defaults to the user's config file
+        """
+        self.api_url = api_url
+        # The shared client (and requests) is only created on the first request
+        self._client = client
+        self.config = config if config is not None else load_config()
+        self.ttl = parse_location_ttl(self.config.get("location_ttl_hours", DEFAULTS["location_ttl_hours"]))
+        self.cache_file = os.path.join(CONFIG_DIR, 'location.json')
+        
+        self._location: Optional[Location] = None
+        self._resolved_at = 0.0
+        self._ip: Optional[str] = None
+        # (configured name, location) of the last "city" setting resolved
+        self._city: Optional[Tuple[str, Location]] = None
         logger.info("LocationFinder initialized")
     
+    @property
+    def client(self) -> HttpClient:
+        if self._client is None:
+            self._client = get_default_client()
+        return self._client
+    
     def get_lat_lng(self) -> Optional[str]:
         """
         Get latitude,longitude string from the API
@@ -45,8 +102,11 @@ class LocationFinder:
         logger.debug("Fetching lat/lng from API")
         try:
             logger.debug(f"Making request to {self.api_url}/latlong")
-            response = requests.get(f"{self.api_url}/latlong")
-            if response.status_code == 200:
+            response = self.client.get(f"{self.api_url}/latlong")
+            if response is None:
+                logger.error("Error getting lat/lng: no response")
+                return None
+            elif response.status_code == 200:
                 result = response.text.strip()
                 logger.info(f"Successfully got lat/lng: {result}")
                 return result
@@ -57,40 +117,179 @@ class LocationFinder:
             logger.exception(f"Exception in get_lat_lng: {e}")
             return None
     
-    def get_current_location(self) -> Optional[Location]:
+    def get_current_location(self, force_refresh: bool = False) -> Optional[Location]:
         """
         Get full location information for current IP
+        Args:
+            force_refresh (bool): Ignore cached locations and query the API
+            
         Returns: Location object or None if failed
         """
-        logger.info("Getting current location")
-        # First try to get lat,lng
-        lat_lng = self.get_lat_lng()
-        if lat_lng:
-            # Then get full location information
-            try:
-                logger.debug(f"Making request to {self.api_url}/json/")
-                response = requests.get(f"{self.api_url}/json/")
-                if response.status_code == 200:
-                    data = response.json()
-                    logger.debug(f"Received location data: {data}")
-                    location = Location(
-                        lat=float(data.get('latitude', 0)),
-                        lng=float(data.get('longitude', 0)),
-                        city=data.get('city', 'Unknown'),
-                        country=data.get('country_name', 'Unknown'),
-                        timezone=data.get('timezone', '')
-                    )
-                    logger.info(f"Location found: {location.city}, {location.country} ({location.lat}, {location.lng})")
-                    return location
-                else:
-                    logger.warning(f"Error response from API: {response.status_code}")
-                    # Fallback to just creating a location from the lat,lng
-                    logger.info("Falling back to lat/lng only location")
-                    return Location.from_lat_lng_string(lat_lng)
-            except Exception as e:
-                logger.exception(f"Exception in get_current_location: {e}")
-                # Fallback to just creating a location from the lat,lng
-                logger.info("Falling back to lat/lng only location due to exception")
-                return Location.from_lat_lng_string(lat_lng)
+        logger.debug("Getting current location")
+        pinned = self.get_pinned_location()
+        if pinned:
+            return pinned
+        
+        if not force_refresh:
+            if self._location and time.time() - self._resolved_at < self.ttl:
+                return self._location
+            
+            if self._location is None:
+                self._load_cached_location()
+            if self._location:
+                if time.time() - self._resolved_at < self.ttl:
+                    logger.info(f"Using cached location: {self._location.city}, {self._location.country}")
+                    return self._location
+                # Cached location expired: keep it if we are still behind the same public IP
+                ip = self.get_public_ip()
+                if ip and ip == self._ip:
+                    logger.info("Public IP unchanged, keeping cached location")
+                    self._save_location(self._location, ip)
+                    return self._location
+        
+        location, ip = self._lookup_location()
+        if location:
+            self._save_location(location, ip)
+            return location
+        
+        if self._location:
+            logger.warning("Location lookup failed, using last known location")
+            return self._location
         logger.error("Failed to get location")
         return None
+    
+    def get_pinned_location(self) -> Optional[Location]:
+        """Location pinned in the config file, or the configured city, if any"""
+        pinned = self.config.get("location")
+        if not pinned:
+            return self.get_configured_city()
+        try:
+            return Location(
+                lat=float(pinned["lat"]),
+                lng=float(pinned["lng"]),
+                city=pinned.get("city", "Unknown"),
+                country=pinned.get("country", "Unknown"),
+                timezone=pinned.get("timezone", "")
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Invalid pinned location in config: {pinned} ({e})")
+            return None
+    
+    def get_configured_city(self) -> Optional[Location]:
+        """The "city" setting resolved from the bundled city index, no network request"""
+        name = self.config.get("city")
+        if not name:
+            return None
+        if self._city is None or self._city[0] != name:
+            # The index takes a moment to load, so the answer is kept per configured name
+            from src.city_index import get_city_index
+            matches = get_city_index().search(name, limit=1)
+            if not matches:
+                logger.error(f"City {name!r} from the config is not in the city index")
+                return None
+            self._city = (name, matches[0].to_location())
+            logger.info(f"Configured city {name!r} resolved to {matches[0].label()} ({matches[0].timezone})")
+        return self._city[1]
+    
+    def get_last_known_location(self) -> Optional[Location]:
+        """Pinned or last resolved location without any network request, it may be out of date"""
+        pinned = self.get_pinned_location()
+        if pinned:
+            return pinned
+        if self._location is None:
+            self._load_cached_location()
+        return self._location
+    
+    def get_public_ip(self) -> Optional[str]:
+        """Public IP address as seen by ipapi.co, None if it can't be determined"""
+        try:
+            with metrics.timer("iftar_location_fetch_seconds", endpoint="ip"):
+                response = self.client.get(f"{self.api_url}/ip/", timeout=3)
+        except Exception as e:
+            logger.warning(f"Error getting public IP: {e}")
+            return None
+        if response is not None and response.status_code == 200:
+            return response.text.strip()
+        return None
+    
+    def clear_cache(self):
+        """Forget the resolved location so the next lookup queries the API"""
+        logger.info("Clearing cached location")
+        self._location = None
+        self._resolved_at = 0.0
+        self._ip = None
+        try:
+            if os.path.exists(self.cache_file):
+                os.remove(self.cache_file)
+        except OSError as e:
+            logger.warning(f"Failed to remove location cache: {e}")
+    
+    def _lookup_location(self) -> Tuple[Optional[Location], Optional[str]]:
+        """Resolve the location with a single ipapi.co request, returns (location, ip)"""
+        try:
+            logger.debug(f"Making request to {self.api_url}/json/")
+            with metrics.timer("iftar_location_fetch_seconds", endpoint="json"):
+                response = self.client.get(f"{self.api_url}/json/")
+            if response is not None and response.status_code == 200:
+                data = response.json()
+                logger.debug(f"Received location data: {data}")
+                location = Location(
+                    lat=float(data['latitude']),
+                    lng=float(data['longitude']),
+                    city=data.get('city') or 'Unknown',
+                    country=data.get('country_name') or 'Unknown',
+                    timezone=data.get('timezone') or ''
+                )
+                logger.info(f"Location found: {location.city}, {location.country} ({location.lat}, {location.lng})")
+                return location, data.get('ip')
+            logger.warning(f"Error response from API: {response.status_code if response is not None else 'no response'}")
+        except Exception as e:
+            logger.exception(f"Exception in get_current_location: {e}")
+        
+        # Fallback to just creating a location from the lat,lng
+        logger.info("Falling back to lat/lng only location")
+        lat_lng = self.get_lat_lng()
+        location = Location.from_lat_lng_string(lat_lng) if lat_lng else None
+        return (self._name_from_nearest_city(location) if location else None), None
+    
+    @staticmethod
+    def _name_from_nearest_city(location: Location) -> Location:
+        """Fill in the city and country of a lat/lng-only location from the bundled city index"""
+        try:
+            from src.city_index import get_city_index
+            city, km = get_city_index().nearest(location.lat, location.lng)
+        except Exception as e:
+            logger.warning(f"Could not look up the nearest city: {e}")
+            return location
+        if km <= NEAREST_CITY_KM:
+            location.city, location.country = city.name, city.country
+            logger.info(f"Named location after {city.label()}, {km:.1f} km away")
+        return location
+    
+    def _load_cached_location(self):
+        """Load the last resolved location from disk"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r') as f:
+                    data = json.load(f)
+                self._location = Location(**data["location"])
+                self._resolved_at = float(data["resolved_at"])
+                self._ip = data.get("ip")
+                logger.debug(f"Loaded cached location: {self._location}")
+        except Exception as e:
+            logger.warning(f"Ignoring invalid location cache: {e}")
+            self._location = None
+    
+    def _save_location(self, location: Location, ip: Optional[str]):
+        """Remember a resolved location in memory and on disk"""
+        self._location = location
+        self._resolved_at = time.time()
+        self._ip = ip
+        try:
+            with metrics.timer("iftar_disk_write_seconds", file="location"):
+                tmp_file = self.cache_file + ".tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump({"location": asdict(location), "ip": ip, "resolved_at": self._resolved_at}, f)
+                os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            logger.warning(f"Failed to save location cache: {e}")
@@ -1,8 +1,14 @@
 import os
+import queue
+import atexit
 import logging
-from datetime import datetime
+import logging.handlers
 from typing import Optional
 
+# Rotate the log file once it reaches this size, keeping a few old files around
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
 class IftarLogger:
     """Custom logger for the Iftar Clock application"""
     
@@ -16,10 +22,11 @@ class IftarLogger:
         return cls._instance
     
     def _initialize_logger(self):
-        """Initialize the logger with console and file handlers"""
-        # Create logger
+        """Initialize the logger with console and file handlers behind a queue"""
+        # Create logger; set IFTAR_LOG_LEVEL=DEBUG for verbose troubleshooting logs
         self.logger = logging.getLogger("iftar_clock")
-        self.logger.setLevel(logging.DEBUG)
+        level = os.environ.get("IFTAR_LOG_LEVEL", "INFO").upper()
+        self.logger.setLevel(getattr(logging, level, logging.INFO))
         
         # Create formatter
         formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -29,43 +36,54 @@ class IftarLogger:
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
         
-        # Create file handler
-        log_dir = os.path.join(os.path.expanduser('~'), '.iftar_clock')
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, f"iftar_clock_{datetime.now().strftime('%Y%m%d')}.log")
-        file_handler = logging.FileHandler(log_file)
+        # Create size-rotated file handler
+        self.log_dir = os.path.join(os.path.expanduser('~'), '.iftar_clock')
+        os.makedirs(self.log_dir, exist_ok=True)
+        log_file = os.path.join(self.log_dir, "iftar_clock.log")
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
         
-        # Add handlers to logger
-        self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
+        # The logger only enqueues records; a listener thread does the console and file I/O
+        log_queue = queue.SimpleQueue()
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self.listener = logging.handlers.QueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+        self.listener.start()
+        atexit.register(self.listener.stop)
         
         self.logger.info("Logger initialized")
     
-    def debug(self, message: str):
-        """Log debug message"""
-        self.logger.debug(message)
+    def isEnabledFor(self, level: int) -> bool:
+        """Check whether a message of this level would be logged, to guard costly messages"""
+        return self.logger.isEnabledFor(level)
+    
+    def debug(self, message: str, *args):
+        """Log debug message, %-style args are only formatted if it is emitted"""
+        self.logger.debug(message, *args)
     
-    def info(self, message: str):
+    def info(self, message: str, *args):
         """Log info message"""
-        self.logger.info(message)
+        self.logger.info(message, *args)
     
-    def warning(self, message: str):
+    def warning(self, message: str, *args):
         """Log warning message"""
-        self.logger.warning(message)
+        self.logger.warning(message, *args)
     
-    def error(self, message: str):
+    def error(self, message: str, *args):
         """Log error message"""
-        self.logger.error(message)
+        self.logger.error(message, *args)
     
-    def critical(self, message: str):
+    def critical(self, message: str, *args):
         """Log critical message"""
-        self.logger.critical(message)
+        self.logger.critical(message, *args)
     
-    def exception(self, message: str):
+    def exception(self, message: str, *args):
         """Log exception message with traceback"""
-        self.logger.exception(message)
+        self.logger.exception(message, *args)
 
 # Create a global logger instance for easy import
 logger = IftarLogger()
@@ -0,0 +1,157 @@
+"""
+In-process timing and counter metrics, exported as Prometheus text or JSON.
+
+Collection is off unless IFTAR_METRICS=1 is set, the config enables it, or
+the "Show metrics" menu entry turns it on. While off, `timer`, `timed`,
+`inc` and `observe` return after a single flag check.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import nullcontext
+from functools import wraps
+from typing import Any, Callable, Dict, Tuple
+from src.logger import logger
+
+# Histogram upper bounds in seconds, from a fast tick to a slow network call
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+_DISABLED = nullcontext()
+
+def _key(name: str, labels: Dict[str, Any]) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _label_text(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels] + ([extra] if extra else [])
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class Histogram:
+    """Latency distribution with Prometheus-style cumulative buckets"""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+class Metrics:
+    """Registry of counters and latency histograms"""
+
+    def __init__(self):
+        self.enabled = os.environ.get("IFTAR_METRICS", "") not in ("", "0")
+        self.started = time.time()
+        self.counters: Dict[MetricKey, float] = {}
+        self.histograms: Dict[MetricKey, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        if not self.enabled:
+            logger.info("Metrics collection enabled")
+            self.enabled = True
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Record a duration in a histogram"""
+        if not self.enabled:
+            return
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def timer(self, name: str, **labels):
+        """Context manager timing its block into a histogram"""
+        if not self.enabled:
+            return _DISABLED
+        return _Timer(self, name, labels)
+
+    def timed(self, name: str, **labels) -> Callable:
+        """Decorator timing each call of a function into a histogram"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current values as plain data"""
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [{"name": name, "labels": dict(labels), "count": h.count, "sum": h.total,
+                           "max": h.max, "mean": h.total / h.count if h.count else 0.0}
+                          for (name, labels), h in sorted(self.histograms.items())]
+        return {"enabled": self.enabled, "started": self.started, "uptime": time.time() - self.started,
+                "counters": counters, "histograms": histograms}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} counter")
+                    seen.add(name)
+                lines.append(f"{name}{_label_text(labels)} {value}")
+            for (name, labels), h in sorted(self.histograms.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} histogram")
+                    seen.add(name)
+                for bound, count in zip(BUCKETS, h.buckets):
+                    lines.append(f"{name}_bucket{_label_text(labels, 'le=' + json.dumps(str(bound)))} {count}")
+                lines.append(f"{name}_bucket{_label_text(labels, 'le=' + json.dumps('+Inf'))} {h.count}")
+                lines.append(f"{name}_sum{_label_text(labels)} {h.total}")
+                lines.append(f"{name}_count{_label_text(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics: Metrics, name: str, labels: Dict[str, Any]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+# Global registry for easy import
+metrics = Metrics()
@@ -0,0 +1,196 @@
+"""
+Prayer times for fasting: Fajr, sunrise, Maghrib and Isha.
+
+Fajr and Isha are the instants the sun is a method-specific angle below the
+horizon (or, for some methods, Isha is a fixed interval after Maghrib).
+Timetables are computed for a whole run of days in one vectorized pass with
+the solar position engine and kept in a small cache, so a Ramadan timetable
+or a year of suhoor and iftar times costs one computation per location.
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Optional
+from src.location_finder import Location
+from src import solar_position, timezones
+from src.logger import logger
+
+# Events of a timetable, in the order they happen during a day
+EVENTS = ("fajr", "sunrise", "maghrib", "isha")
+
+@dataclass(frozen=True)
+class CalculationMethod:
+    """Twilight angles (degrees below the horizon) used by a calculation authority"""
+    name: str
+    fajr_angle: float
+    # Isha by angle, or by a fixed delay after Maghrib when isha_minutes is set
+    isha_angle: Optional[float] = None
+    isha_minutes: Optional[float] = None
+    # Some authorities add a precautionary delay to sunset
+    maghrib_minutes: float = 0.0
+
+METHODS: Dict[str, CalculationMethod] = {
+    "MWL": CalculationMethod("Muslim World League", 18.0, isha_angle=17.0),
+    "ISNA": CalculationMethod("Islamic Society of North America", 15.0, isha_angle=15.0),
+    "Egypt": CalculationMethod("Egyptian General Authority of Survey", 19.5, isha_angle=17.5),
+    "Makkah": CalculationMethod("Umm al-Qura University, Makkah", 18.5, isha_minutes=90.0),
+    "Karachi": CalculationMethod("University of Islamic Sciences, Karachi", 18.0, isha_angle=18.0),
+    "Tehran": CalculationMethod("Institute of Geophysics, University of Tehran", 17.7, isha_angle=14.0),
+    "Gulf": CalculationMethod("Gulf Region", 19.5, isha_minutes=90.0),
+    "Kuwait": CalculationMethod("Kuwait", 18.0, isha_angle=17.5),
+    "Qatar": CalculationMethod("Qatar", 18.0, isha_minutes=90.0),
+    "Singapore": CalculationMethod("Majlis Ugama Islam Singapura", 20.0, isha_angle=18.0),
+    "Turkey": CalculationMethod("Diyanet İşleri Başkanlığı, Turkey", 18.0, isha_angle=17.0),
+}
+# Used when the config doesn't name a method, or names an unknown one
+DEFAULT_METHOD = "MWL"
+# Timetables kept in memory, e.g. this year and next for a couple of methods
+TIMETABLE_CACHE_SIZE = 8
+
+def get_method(name: Optional[str]) -> CalculationMethod:
+    """
+    Look up a calculation method by its key
+    Args:
+        name (str, optional): Key in METHODS such as "ISNA" (case-insensitive)
+
+    Returns:
+        CalculationMethod: The method, or the default if the name is empty or unknown
+    """
+    if name:
+        for key, method in METHODS.items():
+            if key.lower() == name.lower():
+                return method
+        logger.warning(f"Unknown prayer calculation method {name}, using {DEFAULT_METHOD}")
+    return METHODS[DEFAULT_METHOD]
+
+def _twilight_limit(twilight: np.ndarray, night: np.ndarray, angle: float, anchor: np.ndarray,
+                    direction: int) -> np.ndarray:
+    """
+    High-latitude adjustment ("angle-based" rule): when the sun never gets deep
+    enough, or twilight would last longer than angle/60 of the night, use that
+    fraction of the night measured from sunrise/sunset instead
+    """
+    portion = night * angle / 60.0
+    limit = anchor + direction * portion
+    with np.errstate(invalid="ignore"):
+        too_long = np.abs(twilight - anchor) > portion
+    return np.where(np.isnan(twilight) | too_long, limit, twilight)
+
+class PrayerTimetable:
+    """
+    Fajr, sunrise, Maghrib and Isha for one location and method over a run of days.
+
+    Like SunsetTable, instants are float64 epoch seconds in parallel arrays
+    indexed by day offset from `start`, with the UTC offset at each instant
+    precomputed. NaN marks an event that doesn't happen even after the
+    high-latitude adjustment (polar day/night).
+    """
+
+    def __init__(self, location: Location, start: date, method: CalculationMethod,
+                 epochs: Dict[str, np.ndarray]):
+        self.location = location
+        self.start = start
+        self.method = method
+        self._start_ordinal = start.toordinal()
+        self.tz = timezones.get_zone(location.timezone)
+        self.epochs = epochs
+        self.offsets = {event: timezones.utc_offsets(self.tz, values) for event, values in epochs.items()}
+
+    @classmethod
+    def for_range(cls, location: Location, start: date, days: int,
+                  method: CalculationMethod = METHODS[DEFAULT_METHOD]) -> "PrayerTimetable":
+        """
+        Compute the timetable for `days` consecutive days in one vectorized pass
+        Args:
+            location (Location): Location to compute for
+            start (date): First day of the timetable
+            days (int): Number of days
+            method (CalculationMethod): Twilight angles to use
+
+        Returns:
+            PrayerTimetable: The computed timetable
+        """
+        logger.debug(f"Computing {method.name} prayer times for {location.lat}, {location.lng} "
+                     f"from {start} ({days} days)")
+        # Padded by a day on each side: Fajr depends on the night before, Isha on the night after
+        epoch_days = solar_position.to_epoch_days(start) + np.arange(-1, days + 1)
+        lat, lng = location.lat, location.lng
+        sunrise = solar_position.sunrise_utc(epoch_days, lat, lng)
+        sunset = solar_position.sunset_utc(epoch_days, lat, lng)
+        night_before = sunrise[1:-1] - sunset[:-2]
+        night_after = sunrise[2:] - sunset[1:-1]
+        sunrise, sunset, epoch_days = sunrise[1:-1], sunset[1:-1], epoch_days[1:-1]
+
+        fajr = solar_position.sun_event_utc(epoch_days, lat, lng, 90.0 + method.fajr_angle, rising=True)
+        fajr = _twilight_limit(fajr, night_before, method.fajr_angle, sunrise, -1)
+        maghrib = sunset + method.maghrib_minutes * 60.0
+        if method.isha_minutes is not None:
+            isha = maghrib + method.isha_minutes * 60.0
+        else:
+            isha = solar_position.sun_event_utc(epoch_days, lat, lng, 90.0 + method.isha_angle, rising=False)
+            isha = _twilight_limit(isha, night_after, method.isha_angle, sunset, 1)
+        return cls(location, start, method, {"fajr": fajr, "sunrise": sunrise, "maghrib": maghrib, "isha": isha})
+
+    @classmethod
+    def for_year(cls, location: Location, year: int,
+                 method: CalculationMethod = METHODS[DEFAULT_METHOD]) -> "PrayerTimetable":
+        """Compute the timetable for every day (365/366) of a calendar year"""
+        start = date(year, 1, 1)
+        return cls.for_range(location, start, (date(year + 1, 1, 1) - start).days, method)
+
+    @property
+    def end(self) -> date:
+        """Last day covered by the timetable"""
+        return self.start + timedelta(days=len(self) - 1)
+
+    def __len__(self) -> int:
+        return len(self.epochs["maghrib"])
+
+    def __contains__(self, day: date) -> bool:
+        return 0 <= day.toordinal() - self._start_ordinal < len(self)
+
+    def index(self, day: date) -> int:
+        """Array index for a day, raises KeyError if the timetable doesn't cover it"""
+        i = day.toordinal() - self._start_ordinal
+        if not 0 <= i < len(self):
+            raise KeyError(f"{day} is outside timetable range {self.start}..{self.end}")
+        return i
+
+    def event(self, event: str, day: date) -> Optional[datetime]:
+        """
+        One prayer time as an aware local datetime
+        Args:
+            event (str): "fajr", "sunrise", "maghrib" or "isha"
+            day (date): The day
+
+        Returns:
+            datetime: The time, None if the event doesn't happen that day
+        """
+        i = self.index(day)
+        seconds = self.epochs[event][i]
+        if np.isnan(seconds):
+            return None
+        return timezones.to_local_datetime(float(seconds), float(self.offsets[event][i]), self.tz)
+
+    def times(self, day: date) -> Dict[str, Optional[datetime]]:
+        """All prayer times of a day, keyed by event name"""
+        return {event: self.event(event, day) for event in EVENTS}
+
+@lru_cache(maxsize=TIMETABLE_CACHE_SIZE)
+def _cached_year(lat: float, lng: float, timezone: str, year: int, method: CalculationMethod) -> PrayerTimetable:
+    return PrayerTimetable.for_year(Location(lat=lat, lng=lng, timezone=timezone), year, method)
+
+def timetable_for_year(location: Location, year: int, method: Optional[str] = None) -> PrayerTimetable:
+    """
+    Cached whole-year timetable for a location
+    Args:
+        location (Location): Location to compute for
+        year (int): Calendar year
+        method (str, optional): Key in METHODS, the default method if not given
+
+    Returns:
+        PrayerTimetable: The timetable, computed on the first request only
+    """
+    return _cached_year(location.lat, location.lng, location.timezone, year, get_method(method))
@@ -0,0 +1,71 @@
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from src.logger import logger
+
+class RefreshWorker:
+    """
+    Runs blocking refresh jobs (network, parsing, disk) off the Tk event loop.
+
+    Jobs execute one at a time on a background thread. Their results are put on
+    a queue that is drained from the Tk thread with `root.after`, so callbacks
+    may safely touch widgets. The queue is only polled while jobs are pending.
+    """
+
+    def __init__(self, root, poll_interval_ms: int = 100):
+        self.root = root
+        self.poll_interval_ms = poll_interval_ms
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="iftar-refresh")
+        self.results: "queue.Queue" = queue.Queue()
+        self._pending = 0
+        self._polling = False
+        logger.debug("RefreshWorker initialized")
+
+    def submit(self, job: Callable[[], Any],
+               callback: Optional[Callable[[Any], None]] = None,
+               error_callback: Optional[Callable[[BaseException], None]] = None) -> Future:
+        """
+        Run a job in the background
+        Args:
+            job (Callable): Function to run on the worker thread
+            callback (Callable, optional): Called on the Tk thread with the job's result
+            error_callback (Callable, optional): Called on the Tk thread with the job's exception
+
+        Returns:
+            Future: Future of the job
+        """
+        future = self.executor.submit(job)
+        self._pending += 1
+        future.add_done_callback(lambda f: self.results.put((f, callback, error_callback)))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval_ms, self._poll)
+        return future
+
+    def _poll(self):
+        """Deliver finished jobs' results on the Tk thread"""
+        while True:
+            try:
+                future, callback, error_callback = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            try:
+                error = future.exception()
+                if error is not None:
+                    logger.error(f"Background job failed: {error}")
+                    if error_callback:
+                        error_callback(error)
+                elif callback:
+                    callback(future.result())
+            except Exception as e:
+                logger.exception(f"Error in background job callback: {e}")
+
+        if self._pending > 0:
+            self.root.after(self.poll_interval_ms, self._poll)
+        else:
+            self._polling = False
+
+    def shutdown(self):
+        """Stop accepting jobs; a running job is abandoned rather than waited for"""
+        self.executor.shutdown(wait=False)
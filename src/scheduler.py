@@ -0,0 +1,98 @@
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from src.logger import logger
+
+# Extra delay so a job wakes just after its due instant rather than just before it
+WAKE_SLACK = 0.005
+# Delay used when next_due returns an instant that has already passed
+MIN_INTERVAL = 0.5
+
+@dataclass
+class _Job:
+    name: str
+    func: Callable[[], None]
+    next_due: Callable[[float], float]
+    due: float = 0.0
+    after_id: Optional[str] = None
+
+class TkScheduler:
+    """
+    Runs timed jobs on the Tk event loop.
+
+    Each job sleeps until the exact wall-clock instant its `next_due` function
+    returns instead of polling on a fixed tick. Delays are recomputed from the
+    current time on every wakeup, so late or early timer callbacks never
+    accumulate drift: an early wakeup simply re-arms for the remaining time.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.jobs: Dict[str, _Job] = {}
+
+    def add_job(self, name: str, func: Callable[[], None], next_due: Callable[[float], float]):
+        """
+        Register a job, replacing any job with the same name
+        Args:
+            name (str): Job name
+            func (Callable): Function to run on the Tk thread
+            next_due (Callable): Given the current epoch time, returns the epoch time
+                of the next run
+        """
+        self.cancel(name)
+        job = _Job(name, func, next_due)
+        self.jobs[name] = job
+        self._arm(job, time.time())
+        logger.debug(f"Scheduled job {name}")
+
+    def every(self, name: str, interval: float, func: Callable[[], None]):
+        """Register a job that runs on wall-clock multiples of `interval` seconds"""
+        self.add_job(name, func, lambda now: (math.floor(now / interval) + 1) * interval)
+
+    def cancel(self, name: str):
+        """Remove a job if it is scheduled"""
+        job = self.jobs.pop(name, None)
+        if job and job.after_id:
+            self.root.after_cancel(job.after_id)
+
+    def cancel_all(self):
+        for name in list(self.jobs):
+            self.cancel(name)
+
+    def reschedule(self, name: str):
+        """Recompute a job's due time now, e.g. after the data it depends on changed"""
+        job = self.jobs.get(name)
+        if job:
+            if job.after_id:
+                self.root.after_cancel(job.after_id)
+            self._arm(job, time.time())
+
+    def _arm(self, job: _Job, now: float):
+        try:
+            job.due = job.next_due(now)
+            if job.due <= now:
+                job.due = now + MIN_INTERVAL
+        except Exception as e:
+            logger.exception(f"Error computing next run of job {job.name}: {e}")
+            job.due = now + 60
+        self._sleep_until_due(job, now)
+
+    def _sleep_until_due(self, job: _Job, now: float):
+        delay_ms = max(0, math.ceil((job.due - now + WAKE_SLACK) * 1000))
+        job.after_id = self.root.after(delay_ms, self._run, job)
+
+    def _run(self, job: _Job):
+        if self.jobs.get(job.name) is not job:
+            return
+        now = time.time()
+        if now < job.due:
+            # Woke up early (timer granularity or a clock change), sleep the rest
+            self._sleep_until_due(job, now)
+            return
+        try:
+            job.func()
+        except Exception as e:
+            logger.exception(f"Error in scheduled job {job.name}: {e}")
+        if self.jobs.get(job.name) is job:
+            self._arm(job, time.time())
@@ -0,0 +1,313 @@
+"""
+Host-wide countdown state in a shared-memory segment.
+
+One producer process (`python main.py --publish`) resolves the location,
+computes the sunset tables and publishes the upcoming countdown states and the
+next days' Fajr, sunrise and sunset instants. Clock instances started on the
+same host find the segment and read from it instead of doing their own
+network and disk I/O.
+
+Layout (little endian, fixed size):
+    header   magic b"IFSM", version u16, reserved u16, sequence u64,
+             published at f64, first day ordinal i32, day count u16, state count u16
+    states   MAX_STATES x (target epoch f64, switch epoch f64, is_tomorrow u8, is_suhoor u8, padding)
+    days     SHARED_DAYS x (fajr, sunrise, sunset epoch f64)
+NaN marks a missing target or an event that doesn't happen that day.
+
+The sequence number is odd while the producer is writing; readers retry until
+they see the same even sequence before and after copying the segment.
+
+A producer that stops republishing is taken to be gone: readers first look for
+a segment from a restarted producer, and otherwise report themselves stale so
+the clock falls back to computing its own countdown.
+"""
+
+import math
+import time
+import struct
+from datetime import date, datetime, timedelta
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+from src.countdown import IFTAR, SUHOOR, CountdownState, CountdownText
+from src.timezones import local_zone
+from src.logger import logger
+
+SEGMENT_NAME = "iftar_clock_state"
+MAGIC = b"IFSM"
+STATE_VERSION = 1
+HEADER = struct.Struct("<4sHHQdiHH")
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = 8
+STATE = struct.Struct("<dd??6x")
+DAY = struct.Struct("<ddd")
+# Three switches a day (sunset, switchover, midnight; two in the dual mode): four days of countdowns
+MAX_STATES = 12
+SHARED_DAYS = 7
+SEGMENT_SIZE = HEADER.size + MAX_STATES * STATE.size + SHARED_DAYS * DAY.size
+# How often the producer refreshes its data and republishes
+PUBLISH_INTERVAL = 3600
+# How often a reader looks again when the segment has no current state
+STALE_RETRY = 60
+# A segment not republished for this long belongs to a producer that is gone
+STALE_AFTER = 3 * PUBLISH_INTERVAL
+
+SharedSnapshot = Tuple[float, List[Tuple[Optional[float], float, bool, str]], int, List[Tuple[float, float, float]]]
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without taking ownership of it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the segment with the resource
+        # tracker, which would unlink it when this process exits
+        segment = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(segment._name, "shared_memory")
+        except Exception:
+            pass
+        return segment
+
+def _nan_if_none(value: Optional[float]) -> float:
+    return math.nan if value is None else value
+
+class SharedStatePublisher:
+    """Producer side: owns the segment and keeps it up to date from a SunsetCalculator"""
+
+    def __init__(self, calculator=None, name: str = SEGMENT_NAME):
+        if calculator is None:
+            from src.sunset_calculator import SunsetCalculator
+            calculator = SunsetCalculator()
+        self.calculator = calculator
+        self.name = name
+        self.segment: Optional[shared_memory.SharedMemory] = None
+        self._sequence = 0
+
+    def open(self):
+        """Create the segment, or take over one left behind by a producer that crashed"""
+        try:
+            self.segment = shared_memory.SharedMemory(name=self.name, create=True, size=SEGMENT_SIZE)
+        except FileExistsError:
+            segment = _attach_segment(self.name)
+            if segment.size < SEGMENT_SIZE:
+                segment.close()
+                raise RuntimeError(f"Shared memory segment {self.name} exists with an unexpected size")
+            self.segment = segment
+            self._sequence = SEQUENCE.unpack_from(segment.buf, SEQUENCE_OFFSET)[0] & ~1
+        logger.info(f"Publishing countdown state in shared memory segment {self.name}")
+
+    def close(self):
+        """Unlink the segment; attached readers keep their mapping until they close it"""
+        if self.segment is None:
+            return
+        self.segment.close()
+        try:
+            self.segment.unlink()
+        except FileNotFoundError:
+            pass
+        self.segment = None
+
+    def _day_epochs(self, day: date) -> Tuple[float, float, float]:
+        calculator = self.calculator
+        for table in (calculator.table, calculator.next_table):
+            if table is not None and day in table:
+                i = table.index(day)
+                return (float(table.fajr_epoch[i]), float(table.sunrise_epoch[i]), float(table.sunset_epoch[i]))
+        return (math.nan, math.nan, math.nan)
+
+    def publish(self):
+        """Write the upcoming countdown states and the next days' events to the segment"""
+        if self.calculator.table is None:
+            logger.error("No sunset table to publish")
+            return
+        states = self.calculator.upcoming_countdowns(MAX_STATES)
+        today = date.today()
+        days = [self._day_epochs(today + timedelta(days=i)) for i in range(SHARED_DAYS)]
+
+        buf = self.segment.buf
+        # Odd while writing: readers retry until it is even again
+        writing = self._sequence + 1
+        SEQUENCE.pack_into(buf, SEQUENCE_OFFSET, writing)
+        HEADER.pack_into(buf, 0, MAGIC, STATE_VERSION, 0, writing, time.time(),
+                         today.toordinal(), len(days), len(states))
+        offset = HEADER.size
+        for state in states:
+            STATE.pack_into(buf, offset, _nan_if_none(state.target_epoch), state.switch_epoch,
+                           state.is_tomorrow, state.event == SUHOOR)
+            offset += STATE.size
+        offset = HEADER.size + MAX_STATES * STATE.size
+        for epochs in days:
+            DAY.pack_into(buf, offset, *epochs)
+            offset += DAY.size
+        # The even sequence is the very last store, after every field it guards
+        self._sequence = writing + 1
+        SEQUENCE.pack_into(buf, SEQUENCE_OFFSET, self._sequence)
+        logger.info(f"Published {len(states)} countdown states and {len(days)} days")
+
+    def run(self, interval: float = PUBLISH_INTERVAL):
+        """Refresh and republish until interrupted"""
+        self.open()
+        try:
+            while True:
+                try:
+                    self.calculator.refresh()
+                    # Cover every day the published states and events can reach
+                    self.calculator.prefetch(days=SHARED_DAYS)
+                    self.publish()
+                except Exception as e:
+                    logger.exception(f"Error publishing countdown state: {e}")
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            logger.info("Countdown publisher stopped")
+        finally:
+            self.close()
+
+class SharedCountdown:
+    """
+    Reader side: a countdown driven by the producer's segment.
+
+    Provides the parts of SunsetCalculator that IftarApp uses, so a clock can
+    run from it without resolving its location or touching the network or disk.
+    """
+
+    def __init__(self, segment: shared_memory.SharedMemory, name: str = SEGMENT_NAME):
+        self.segment = segment
+        self.name = name
+        self.countdown = CountdownState()
+        self.sunset: Optional[datetime] = None
+        self.on_refresh_needed = None
+        # True once the producer has stopped publishing and no newer segment was found
+        self.stale = False
+        self._display = CountdownText()
+
+    @classmethod
+    def attach(cls, name: str = SEGMENT_NAME) -> Optional["SharedCountdown"]:
+        """Attach to the producer's segment, None if no producer is running"""
+        try:
+            segment = _attach_segment(name)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not attach to shared countdown state: {e}")
+            return None
+        if segment.size < SEGMENT_SIZE or bytes(segment.buf[:len(MAGIC)]) != MAGIC:
+            logger.warning(f"Ignoring shared memory segment {name} with unknown format")
+            segment.close()
+            return None
+        reader = cls(segment, name)
+        reader.refresh()
+        if reader.stale:
+            # Left behind by a producer that crashed
+            logger.warning(f"Ignoring shared countdown state {name} that is no longer published")
+            reader.close()
+            return None
+        logger.info(f"Attached to shared countdown state {name}")
+        return reader
+
+    def snapshot(self) -> SharedSnapshot:
+        """
+        Consistent copy of the segment
+        Returns:
+            SharedSnapshot: Publish time, (target, switch, is_tomorrow, event) states,
+            first day ordinal and (fajr, sunrise, sunset) epochs per day
+        """
+        buf = self.segment.buf
+        while True:
+            before = SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0]
+            data = bytes(buf[:SEGMENT_SIZE])
+            if before % 2 == 0 and SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0] == before:
+                break
+            time.sleep(0)
+        _, version, _, _, published, start, day_count, state_count = HEADER.unpack_from(data, 0)
+        states = []
+        for i in range(min(state_count, MAX_STATES)):
+            target, switch, tomorrow, suhoor = STATE.unpack_from(data, HEADER.size + i * STATE.size)
+            states.append((None if math.isnan(target) else target, switch, tomorrow, SUHOOR if suhoor else IFTAR))
+        days_offset = HEADER.size + MAX_STATES * STATE.size
+        days = [DAY.unpack_from(data, days_offset + i * DAY.size) for i in range(min(day_count, SHARED_DAYS))]
+        return published, states, start, days
+
+    def refresh(self, force: bool = False):
+        """Pick the current countdown from the segment; reads memory only"""
+        published, states, _, _ = self.snapshot()
+        now = time.time()
+        if now - published > STALE_AFTER and self._reattach(published):
+            published, states, _, _ = self.snapshot()
+        state = CountdownState()
+        current = next((state for state in states if state[1] > now), None)
+        self.stale = current is None or now - published > STALE_AFTER
+        if current is None:
+            logger.warning(f"Shared countdown state is out of date (published {datetime.fromtimestamp(published)})")
+            state.arm(None, now + STALE_RETRY)
+        else:
+            state.arm(*current)
+        target = state.target_epoch
+        self.sunset = datetime.fromtimestamp(target, local_zone()) if target is not None else None
+        self.countdown = state
+
+    def _reattach(self, published: float) -> bool:
+        """
+        Map the segment by name again, in case a restarted producer created a new one
+        Args:
+            published (float): Publish time of the segment mapped now
+
+        Returns:
+            bool: True if a more recently published segment replaced it
+        """
+        try:
+            segment = _attach_segment(self.name)
+        except Exception:
+            return False
+        if (segment.size < SEGMENT_SIZE or bytes(segment.buf[:len(MAGIC)]) != MAGIC
+                or HEADER.unpack_from(segment.buf, 0)[4] <= published):
+            segment.close()
+            return False
+        logger.info(f"Re-attached to shared countdown state {self.name} from a new producer")
+        self.segment.close()
+        self.segment = segment
+        return True
+
+    def load_first_frame(self) -> bool:
+        """The segment already holds the current countdown, True if there is one"""
+        return self.countdown.target_epoch is not None
+
+    def events(self, day: date) -> Optional[Tuple[Optional[datetime], ...]]:
+        """(fajr, sunrise, sunset) for a published day as local datetimes, None if not published"""
+        _, _, start, days = self.snapshot()
+        i = day.toordinal() - start
+        if not 0 <= i < len(days):
+            return None
+        return tuple(None if math.isnan(epoch) else datetime.fromtimestamp(epoch, local_zone())
+                     for epoch in days[i])
+
+    def remaining_seconds(self) -> Optional[float]:
+        """Seconds until the sunset being counted down to, None if there is none"""
+        if self.countdown.expired():
+            self.refresh()
+            if self.stale and self.on_refresh_needed:
+                # Lets the clock replace this reader with a local calculator
+                self.on_refresh_needed()
+        remaining = self.countdown.remaining_seconds()
+        if remaining is not None and remaining > 0:
+            return remaining
+        return None
+
+    def format_remaining_time(self) -> str:
+        """Format remaining time for display"""
+        return self._display.render(self.remaining_seconds(), self.countdown.is_tomorrow)
+
+    def next_display_change(self, now: Optional[float] = None) -> float:
+        """When the string returned by format_remaining_time will next change"""
+        now = time.time() if now is None else now
+        self.countdown.resync()
+        remaining = self.remaining_seconds()
+        if remaining is None:
+            return self.countdown.switch_epoch
+        return min(now + (remaining % 60 or 60), self.countdown.switch_epoch)
+
+    def close(self):
+        self.segment.close()
+
+def publish(interval: float = PUBLISH_INTERVAL):
+    """Run the shared-memory producer in the foreground"""
+    SharedStatePublisher().run(interval)
@@ -0,0 +1,131 @@
+"""
+Offline solar position engine.
+
+Implements the NOAA solar calculator equations (Meeus, "Astronomical
+Algorithms") with NumPy so that sunrise, sunset and twilight instants can be
+computed locally for any date and coordinate without an HTTP round trip.
+All functions broadcast over their array arguments, so the same code serves a
+single day for one location as well as whole years for many locations.
+"""
+
+import numpy as np
+from datetime import date, datetime, timezone
+from typing import Optional
+
+# Zenith angles (degrees) for the events we care about
+SUNSET_ZENITH = 90.833  # Upper limb on the horizon, including refraction
+CIVIL_TWILIGHT_ZENITH = 96.0
+ASTRONOMICAL_TWILIGHT_ZENITH = 108.0
+
+# Julian day of the Unix epoch (1970-01-01T00:00:00Z)
+_UNIX_EPOCH_JD = 2440587.5
+_UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_SECONDS_PER_DAY = 86400.0
+
+
+def to_epoch_days(days) -> np.ndarray:
+    """
+    Convert dates to integer days since the Unix epoch
+    Args:
+        days: date, datetime64 or int (days since epoch), scalar or sequence
+
+    Returns:
+        np.ndarray: int64 array of days since 1970-01-01
+    """
+    if isinstance(days, date):
+        return np.asarray(days.toordinal() - _UNIX_EPOCH_ORDINAL, dtype=np.int64)
+    arr = np.asarray(days)
+    if arr.dtype == object:
+        return np.asarray([d.toordinal() - _UNIX_EPOCH_ORDINAL for d in arr.ravel()],
+                          dtype=np.int64).reshape(arr.shape)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[D]").astype(np.int64)
+    return arr.astype(np.int64)
+
+
+def _solar_params(jd: np.ndarray):
+    """Return (declination in radians, equation of time in minutes) for a Julian day"""
+    t = (jd - 2451545.0) / 36525.0
+
+    mean_long = np.mod(280.46646 + t * (36000.76983 + t * 0.0003032), 360.0)
+    mean_anom = np.radians(357.52911 + t * (35999.05029 - 0.0001537 * t))
+    ecc = 0.016708634 - t * (0.000042037 + 0.0000001267 * t)
+
+    center = (np.sin(mean_anom) * (1.914602 - t * (0.004817 + 0.000014 * t))
+              + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * t)
+              + np.sin(3 * mean_anom) * 0.000289)
+    omega = np.radians(125.04 - 1934.136 * t)
+    apparent_long = np.radians(mean_long + center - 0.00569 - 0.00478 * np.sin(omega))
+
+    mean_obliq = 23.0 + (26.0 + (21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60.0) / 60.0
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+
+    declination = np.arcsin(np.sin(obliq) * np.sin(apparent_long))
+
+    y = np.tan(obliq / 2.0) ** 2
+    l0 = np.radians(mean_long)
+    eq_time = 4.0 * np.degrees(
+        y * np.sin(2 * l0)
+        - 2 * ecc * np.sin(mean_anom)
+        + 4 * ecc * y * np.sin(mean_anom) * np.cos(2 * l0)
+        - 0.5 * y * y * np.sin(4 * l0)
+        - 1.25 * ecc * ecc * np.sin(2 * mean_anom)
+    )
+    return declination, eq_time
+
+
+def _event_minutes(jd, lat_rad, lng, zenith_cos, rising):
+    """Minutes after 00:00 UTC of the event for the day starting at Julian day jd"""
+    declination, eq_time = _solar_params(jd)
+    cos_ha = ((zenith_cos - np.sin(lat_rad) * np.sin(declination))
+              / (np.cos(lat_rad) * np.cos(declination)))
+    # |cos_ha| > 1 means the sun never reaches the zenith angle that day
+    with np.errstate(invalid="ignore"):
+        hour_angle = np.degrees(np.arccos(cos_ha))
+    noon = 720.0 - 4.0 * lng - eq_time
+    return np.where(rising, noon - 4.0 * hour_angle, noon + 4.0 * hour_angle)
+
+
+def sun_event_utc(days, lat, lng, zenith: float = SUNSET_ZENITH, rising: bool = False) -> np.ndarray:
+    """
+    Compute the UTC instant at which the sun crosses a zenith angle
+    Args:
+        days: Dates (see to_epoch_days), broadcast against lat/lng
+        lat: Latitude(s) in degrees, north positive
+        lng: Longitude(s) in degrees, east positive
+        zenith (float): Zenith angle in degrees (default: sunset)
+        rising (bool): True for the morning crossing, False for the evening one
+
+    Returns:
+        np.ndarray: Event times as float seconds since the Unix epoch,
+        NaN where the event does not happen (polar day/night)
+    """
+    day = to_epoch_days(days)
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    lat_rad = np.radians(lat)
+    zenith_cos = np.cos(np.radians(zenith))
+
+    jd_midnight = day + _UNIX_EPOCH_JD
+    # First pass at local solar noon, second pass refined at the event itself
+    minutes = _event_minutes(jd_midnight + 0.5 - lng / 360.0, lat_rad, lng, zenith_cos, rising)
+    minutes = _event_minutes(jd_midnight + minutes / 1440.0, lat_rad, lng, zenith_cos, rising)
+
+    return day * _SECONDS_PER_DAY + minutes * 60.0
+
+
+def sunset_utc(days, lat, lng) -> np.ndarray:
+    """Sunset instant(s) as seconds since the Unix epoch"""
+    return sun_event_utc(days, lat, lng, SUNSET_ZENITH, rising=False)
+
+
+def sunrise_utc(days, lat, lng) -> np.ndarray:
+    """Sunrise instant(s) as seconds since the Unix epoch"""
+    return sun_event_utc(days, lat, lng, SUNSET_ZENITH, rising=True)
+
+
+def epoch_to_datetime(seconds: float) -> Optional[datetime]:
+    """Convert an epoch-seconds value to an aware UTC datetime, None for NaN"""
+    if seconds is None or np.isnan(seconds):
+        return None
+    return datetime.fromtimestamp(float(seconds), tz=timezone.utc)
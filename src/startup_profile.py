@@ -0,0 +1,51 @@
+"""
+Startup timeline for `main.py --profile-startup`.
+
+Records named marks from process start to the first painted frame and prints
+them with the heavy modules that were already imported at first paint, so an
+eager import or a slow first frame shows up as a regression.
+"""
+
+import sys
+import time
+from typing import List, Tuple
+
+# Imported by main.py before anything else: close enough to interpreter start
+START = time.perf_counter()
+# First paint slower than this fails the --profile-startup run
+DEFAULT_BUDGET = 1.5
+# Modules that should only be imported after the first frame
+HEAVY_MODULES = ("requests", "numpy", "PIL", "pystray")
+
+enabled = False
+budget = DEFAULT_BUDGET
+marks: List[Tuple[str, float]] = []
+
+def enable(startup_budget: float = DEFAULT_BUDGET):
+    """Turn on profiling; the app exits after its first frame and prints the report"""
+    global enabled, budget
+    enabled = True
+    budget = startup_budget
+
+def mark(label: str):
+    """Record a point on the startup timeline"""
+    if enabled:
+        marks.append((label, time.perf_counter() - START))
+
+def report() -> bool:
+    """
+    Print the timeline
+    Returns:
+        bool: True if the first paint was within the budget
+    """
+    print("Startup timeline:")
+    previous = 0.0
+    for label, elapsed in marks:
+        print(f"  {elapsed * 1000:8.1f} ms  (+{(elapsed - previous) * 1000:7.1f} ms)  {label}")
+        previous = elapsed
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    print(f"Heavy modules imported before first paint: {', '.join(loaded) or 'none'}")
+    total = marks[-1][1] if marks else 0.0
+    within = total <= budget
+    print(f"First paint after {total * 1000:.1f} ms (budget {budget * 1000:.0f} ms): {'OK' if within else 'OVER BUDGET'}")
+    return within
@@ -0,0 +1,72 @@
+"""
+Batch sunset computation for many locations at once.
+
+Used by server-side dashboards that show a countdown for every office: the
+sunsets of N locations over M dates are computed as one N x M NumPy matrix
+instead of N x M calls to SunsetFinder.fetch_sunset.
+"""
+
+import time
+import numpy as np
+from datetime import date, timedelta
+from typing import Optional, Sequence
+from src.location_finder import Location
+from src import solar_position
+from src.logger import logger
+
+# Locations per vectorized pass; bounds the temporaries to a few MB per year of dates
+DEFAULT_CHUNK_SIZE = 1024
+
+
+def compute_sunset_matrix(locations: Sequence[Location], dates: Sequence[date],
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """
+    Compute sunset instants for every (location, date) pair
+    Args:
+        locations (Sequence[Location]): N locations
+        dates (Sequence[date]): M dates
+        chunk_size (int): Number of locations computed per vectorized pass
+
+    Returns:
+        np.ndarray: N x M float64 array of sunsets as seconds since the Unix epoch,
+        NaN where the sun does not set on that day
+    """
+    lat = np.fromiter((loc.lat for loc in locations), dtype=np.float64, count=len(locations))
+    lng = np.fromiter((loc.lng for loc in locations), dtype=np.float64, count=len(locations))
+    days = solar_position.to_epoch_days(list(dates))
+    logger.debug(f"Computing sunset matrix for {len(lat)} locations x {len(days)} dates")
+
+    result = np.empty((len(lat), len(days)), dtype=np.float64)
+    for start in range(0, len(lat), chunk_size):
+        stop = start + chunk_size
+        result[start:stop] = solar_position.sunset_utc(
+            days[np.newaxis, :], lat[start:stop, np.newaxis], lng[start:stop, np.newaxis]
+        )
+    return result
+
+
+def date_range(start: date, days: int) -> list:
+    """List of `days` consecutive dates starting at `start`"""
+    return [start + timedelta(days=i) for i in range(days)]
+
+
+def seconds_until_sunset(locations: Sequence[Location], now: Optional[float] = None) -> np.ndarray:
+    """
+    Countdown to the next sunset for every location
+    Args:
+        locations (Sequence[Location]): N locations
+        now (float, optional): Current time as epoch seconds (defaults to time.time())
+
+    Returns:
+        np.ndarray: N float64 seconds until each location's next sunset, NaN if
+        none within the next two days
+    """
+    now = time.time() if now is None else now
+    # Yesterday..tomorrow in UTC covers today's local sunset at every longitude
+    today = solar_position.epoch_to_datetime(now).date()
+    matrix = compute_sunset_matrix(locations, date_range(today - timedelta(days=1), 3))
+    remaining = matrix - now
+    remaining[~(remaining > 0)] = np.inf
+    remaining = remaining.min(axis=1)
+    remaining[np.isinf(remaining)] = np.nan
+    return remaining
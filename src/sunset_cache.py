@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import zlib
+import tempfile
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+from src.location_finder import Location
+from src.metrics import metrics
+from src.logger import logger
+
+CACHE_VERSION = 3
+
+# Locations closer than ~1 km share sunset entries
+KEY_PRECISION = 2
+# Locations kept in the cache, least recently used ones are evicted first
+MAX_LOCATIONS = 16
+
+class SunsetCache:
+    """
+    Versioned on-disk cache of sunset times keyed by (rounded lat/lng, date).
+
+    File layout (version 3):
+        {"version": 3,
+         "locations": {"31.55,74.34": {"last_used": <epoch>,
+                                       "sunsets": {"2026-03-01": ["<ISO datetime>", <crc32>]}}},
+         "quarantine": {"31.55,74.34 2026-03-02": <record that failed its check>}}
+
+    Records are validated once, when written, and carry a CRC32 of their
+    location, date and value. Loading only checks that each record is a
+    [value, crc] pair; the checksum is verified when the record is read, and one
+    that is malformed or fails its checksum is moved to "quarantine" instead of
+    failing the whole file, so startup cost stays small as the cache grows.
+
+    Writes go to a temporary file that is renamed over the cache, so a crash
+    never leaves a half-written file behind; a file that can't be read as a cache
+    at all is renamed to "<path>.corrupt" and the cache starts empty. Version 2
+    records are checksummed on load, and version 1 files (a flat dict keyed by
+    day-of-year) are migrated the first time a location is bound to them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.locations: Dict[str, Dict[str, Any]] = {}
+        # Entries from a version 1 file, waiting for the location they belong to
+        self.legacy: Dict[str, str] = {}
+        self.quarantine: Dict[str, Any] = {}
+        self.dirty = False
+
+    @staticmethod
+    def location_key(location: Location) -> str:
+        """Cache key for a location: lat/lng rounded to KEY_PRECISION decimals"""
+        return f"{location.lat:.{KEY_PRECISION}f},{location.lng:.{KEY_PRECISION}f}"
+
+    def __len__(self) -> int:
+        return sum(len(entry["sunsets"]) for entry in self.locations.values())
+
+    @staticmethod
+    def checksum(key: str, day: str, value: str) -> int:
+        """CRC32 tying a record's value to its location key and date"""
+        return zlib.crc32(f"{key}|{day}|{value}".encode("utf-8"))
+
+    def load(self):
+        """Load the cache file without validating records, migrating older versions"""
+        self.locations = {}
+        self.legacy = {}
+        self.quarantine = {}
+        if not os.path.exists(self.path):
+            logger.info("No cached data file exists yet")
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self._read(data)
+        except Exception as e:
+            logger.exception(f"Error loading sunset data, starting with an empty cache: {e}")
+            self.locations = {}
+            self.legacy = {}
+            self.quarantine = {}
+            self._move_aside()
+            return
+        logger.info(f"Loaded {len(self)} sunset records for {len(self.locations)} locations")
+
+    def _read(self, data: Any):
+        """Take over the contents of a parsed cache file, raises if it isn't a cache"""
+        if not isinstance(data, dict):
+            raise ValueError(f"expected a JSON object, found {type(data).__name__}")
+        version = data.get("version")
+        if version == CACHE_VERSION:
+            locations = data.get("locations", {})
+            if not isinstance(locations, dict):
+                raise ValueError(f"expected locations to be an object, found {type(locations).__name__}")
+            quarantine = data.get("quarantine")
+            if isinstance(quarantine, dict) and quarantine:
+                # Already kept in one saved file for inspection: not written again
+                logger.info(f"Cache file holds {len(quarantine)} quarantined records, dropped on the next save")
+            for key, entry in locations.items():
+                self._read_entry(key, entry)
+        elif version == 2:
+            # Version 2 stored bare ISO strings: validate them once and add checksums
+            for key, entry in data.get("locations", {}).items():
+                sunsets = {}
+                for day, value in entry["sunsets"].items():
+                    if self._parse(value):
+                        sunsets[day] = [value, self.checksum(key, day, value)]
+                    else:
+                        self.quarantine[f"{key} {day}"] = value
+                self.locations[key] = {"last_used": entry.get("last_used", 0.0), "sunsets": sunsets}
+            self.dirty = True
+        else:
+            # Version 1: {"<day of year>": "<ISO datetime>"}; the date is part of the value
+            for sunset_str in data.values():
+                sunset = self._parse(sunset_str)
+                if sunset:
+                    self.legacy[sunset.date().isoformat()] = sunset_str
+            logger.info(f"Found {len(self.legacy)} sunset records in the old cache format")
+
+    def _read_entry(self, key: str, entry: Any):
+        """Take over one version 3 location entry, quarantining whatever isn't shaped like a record"""
+        sunsets = entry.get("sunsets") if isinstance(entry, dict) else None
+        if not isinstance(sunsets, dict):
+            logger.warning(f"Quarantining malformed cache entry for {key}")
+            self.quarantine[key] = entry
+            self.dirty = True
+            return
+        for day in [day for day, record in sunsets.items() if not self._well_formed(record)]:
+            logger.warning(f"Quarantining malformed cached sunset for {key} on {day}")
+            self.quarantine[f"{key} {day}"] = sunsets.pop(day)
+            self.dirty = True
+        last_used = entry.get("last_used")
+        if not isinstance(last_used, (int, float)):
+            last_used = 0.0
+        self.locations[key] = {"last_used": last_used, "sunsets": sunsets}
+
+    @staticmethod
+    def _well_formed(record: Any) -> bool:
+        """Whether a record is a [value, crc32] pair; its checksum is checked when it is read"""
+        return (isinstance(record, list) and len(record) == 2 and isinstance(record[0], str)
+                and isinstance(record[1], int) and not isinstance(record[1], bool))
+
+    def _move_aside(self):
+        """Rename an unreadable cache file so it is kept for inspection and not read again"""
+        corrupt_path = self.path + ".corrupt"
+        try:
+            os.replace(self.path, corrupt_path)
+            logger.warning(f"Moved unreadable sunset cache to {corrupt_path}")
+        except OSError as e:
+            logger.error(f"Could not move unreadable sunset cache {self.path} aside: {e}")
+
+    def _quarantine(self, key: str, day: str, reason: str):
+        """Move a record that failed validation out of the way, it is dropped on the next save"""
+        record = self.locations[key]["sunsets"].pop(day)
+        logger.warning(f"Quarantining cached sunset for {key} on {day} ({reason}): {record}")
+        self.quarantine[f"{key} {day}"] = record
+        self.dirty = True
+
+    def bind_legacy(self, location: Location):
+        """Move migrated version 1 entries under the location they were fetched for"""
+        if not self.legacy:
+            return
+        key = self.location_key(location)
+        logger.info(f"Migrating {len(self.legacy)} old cache records to {key}")
+        sunsets = self._entry(location)["sunsets"]
+        for day, value in self.legacy.items():
+            sunsets[day] = [value, self.checksum(key, day, value)]
+        self.legacy = {}
+        self.dirty = True
+
+    def get(self, location: Location, day: date) -> Optional[datetime]:
+        """Cached sunset for a location and day, None on a miss or a corrupt record"""
+        key = self.location_key(location)
+        entry = self.locations.get(key)
+        if entry is None:
+            return None
+        day_key = day.isoformat()
+        record = entry["sunsets"].get(day_key)
+        if record is None:
+            return None
+
+        # Records are only checked when they are used
+        try:
+            value, crc = record
+            valid = crc == self.checksum(key, day_key, value)
+        except (TypeError, ValueError):
+            valid = False
+        sunset = self._parse(value) if valid else None
+        if sunset is None:
+            self._quarantine(key, day_key, "checksum mismatch" if not valid else "unparseable")
+            return None
+        entry["last_used"] = time.time()
+        return sunset
+
+    def put(self, location: Location, day: date, sunset: datetime):
+        """Store a sunset; call save() to persist"""
+        self.put_many(location, [(day, sunset)])
+
+    def put_many(self, location: Location, items: Iterable[Tuple[date, datetime]]):
+        """Store several (day, sunset) pairs for one location"""
+        key = self.location_key(location)
+        sunsets = self._entry(location)["sunsets"]
+        for day, sunset in items:
+            day_key, value = day.isoformat(), sunset.isoformat()
+            sunsets[day_key] = [value, self.checksum(key, day_key, value)]
+        self.dirty = True
+
+    def clear(self):
+        """Forget every cached sunset"""
+        self.locations = {}
+        self.legacy = {}
+        self.quarantine = {}
+        self.dirty = True
+
+    def evict(self, today: Optional[date] = None):
+        """Drop entries from previous years and the least recently used locations"""
+        cutoff = date((today or date.today()).year, 1, 1).isoformat()
+        for entry in self.locations.values():
+            stale = [day for day in entry["sunsets"] if day < cutoff]
+            for day in stale:
+                del entry["sunsets"][day]
+            self.dirty = self.dirty or bool(stale)
+
+        empty = [key for key, entry in self.locations.items() if not entry["sunsets"]]
+        by_age = sorted(self.locations, key=lambda key: self.locations[key]["last_used"])
+        for key in set(empty) | set(by_age[:max(0, len(by_age) - MAX_LOCATIONS)]):
+            del self.locations[key]
+            self.dirty = True
+
+    def save(self):
+        """Write the cache atomically (temporary file + rename) if it changed"""
+        if not self.dirty:
+            return
+        self.evict()
+        logger.debug(f"Saving sunset data to {self.path}")
+        try:
+            directory = os.path.dirname(self.path) or "."
+            with metrics.timer("iftar_disk_write_seconds", file="sunset_cache"):
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".iftar_clock.", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump({"version": CACHE_VERSION, "locations": self.locations,
+                                   "quarantine": self.quarantine}, f)
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            self.dirty = False
+            # Quarantined records are kept in one saved file for inspection, then dropped
+            self.quarantine = {}
+            logger.info(f"Saved {len(self)} sunset records")
+        except Exception as e:
+            logger.exception(f"Error saving sunset data: {e}")
+
+    def _entry(self, location: Location) -> Dict[str, Any]:
+        entry = self.locations.setdefault(self.location_key(location), {"last_used": 0.0, "sunsets": {}})
+        entry["last_used"] = time.time()
+        return entry
+
+    @staticmethod
+    def _parse(value: Any) -> Optional[datetime]:
+        try:
+            return datetime.fromisoformat(value)
+        except (ValueError, TypeError):
+            return None
@@ -1,50 +1,415 @@
 import os
-import json
-from datetime import datetime, timedelta
-import pytz
-from typing import Dict, Optional
+import time
+import logging
+import threading
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 from src.location_finder import LocationFinder, Location
 from src.sunset_finder import SunsetFinder
+from src.sunset_cache import SunsetCache
+from src.config import CONFIG_DIR, DEFAULTS, load_config
+from src.countdown import IFTAR, CountdownState, CountdownText
+from src.timezones import local_zone, now_local
+from src.metrics import metrics
 from src.logger import logger
 
+if TYPE_CHECKING:
+    # NumPy-backed, imported when the first table is built so the window appears sooner
+    from src.sunset_table import SunsetTable
+    from src.sunset_store import SunsetStore
+    from src.timeline import Timeline
+
+# While the tables don't cover the countdown, it is armed again this often until a refresh extends them
+TABLES_PENDING_RETRY = 60
+
+def parse_switchover(value) -> dt_time:
+    """
+    Parse the configured switchover time
+    Args:
+        value (str): Local time as "HH:MM"
+        
+    Returns:
+        time: The switchover time, the default one if the value is invalid
+    """
+    try:
+        return dt_time.fromisoformat(value)
+    except (TypeError, ValueError):
+        logger.error(f"Invalid switchover_time {value!r}, using {DEFAULTS['switchover_time']}")
+        return dt_time.fromisoformat(DEFAULTS["switchover_time"])
+
+def parse_prefetch_days(value) -> int:
+    """
+    Parse the configured prefetch window
+    Args:
+        value (int): Days after today to prefetch
+        
+    Returns:
+        int: The number of days (at least 1), the default if the value is invalid
+    """
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        logger.error(f"Invalid prefetch_days {value!r}, using {DEFAULTS['prefetch_days']}")
+        return DEFAULTS["prefetch_days"]
+
 class SunsetCalculator:
     def __init__(self):
         logger.info("Initializing SunsetCalculator")
         self.sunset = None
-        self.sunsets = {}
+        self.table: Optional["SunsetTable"] = None
+        # Following year's table, computed ahead when the prefetch window crosses New Year
+        self.next_table: Optional["SunsetTable"] = None
+        self.countdown = CountdownState()
+        # Suhoor-end and iftar instants of the next days, only in the "dual" countdown mode
+        self.timeline: Optional["Timeline"] = None
+        self._timeline_location: Optional[Tuple[float, float]] = None
+        # (switch epoch it takes over at, state, sunset) prepared ahead of the current switch
+        self._next_countdown: Optional[Tuple[float, CountdownState, Optional[datetime]]] = None
+        # Last string built by format_remaining_time, reused until the minute changes
+        self._display = CountdownText()
+        # When set, called instead of fetching inline so the caller can refresh in the background
+        self.on_refresh_needed = None
+        # Held while refresh or prefetch replace the tables and countdown; the tick never waits on it
+        self.lock = threading.RLock()
+        # Set when the countdown couldn't be armed because the tables don't reach its day
+        self._tables_short = False
         self.data_file = os.path.join(os.path.expanduser('~'), 'iftar_clock.json')
         logger.debug(f"Data file path: {self.data_file}")
+        self.cache = SunsetCache(self.data_file)
         
-        self.location_finder = LocationFinder()
+        self.config = load_config()
+        if self.config.get("metrics"):
+            metrics.enable()
+        self.switchover = parse_switchover(self.config.get("switchover_time"))
+        self.prefetch_days = parse_prefetch_days(self.config.get("prefetch_days"))
+        self.dual = self.config.get("countdown_mode") == "dual"
+        self.store: Optional["SunsetStore"] = None
+        if self.config.get("cache_backend") == "mmap":
+            from src.sunset_store import SunsetStore
+            self.store = SunsetStore(os.path.join(CONFIG_DIR, 'sunsets.bin'))
+            self.store.open()
+        
+        self.location_finder = LocationFinder(config=self.config)
         self.sunset_finder = SunsetFinder()
         
         # Load cached sunset data
         self.load_data()
     
+    def build_table(self, location: Optional[Location] = None, year: Optional[int] = None) -> bool:
+        """
+        Compute the whole-year sunset table for a location in one pass
+        Args:
+            location (Location, optional): Location to use (defaults to current location)
+            year (int, optional): Calendar year (defaults to the current year)
+            
+        Returns:
+            bool: True if the table was built
+        """
+        if location is None:
+            location = self.location_finder.get_current_location()
+            if not location:
+                logger.error("Cannot build sunset table without a location")
+                return False
+        year = year or datetime.now().year
+        
+        self.table = self._load_table(location, year)
+        self.next_table = None
+        self._next_countdown = None
+        return True
+    
+    def _load_table(self, location: Location, year: int) -> "SunsetTable":
+        """Whole-year table from the sunset store, or computed (and stored) if it isn't there"""
+        from src.sunset_table import SunsetTable
+        table = self.store.get_table(location, year) if self.store else None
+        if table is not None:
+            metrics.inc("iftar_sunset_store_hits_total")
+            logger.info(f"Loaded sunset table for {location.city} ({year}) from the sunset store")
+            return table
+        if self.store:
+            metrics.inc("iftar_sunset_store_misses_total")
+        table = SunsetTable.for_year(location, year)
+        logger.info(f"Built sunset table for {location.city} ({year}, {len(table)} days)")
+        if self.store:
+            try:
+                self.store.add_tables([table])
+            except Exception as e:
+                logger.exception(f"Error saving sunset table to the store: {e}")
+        return table
+    
+    def _memory_sunset(self, day: date) -> Optional[datetime]:
+        """Sunset from the tables already in memory, KeyError if neither covers the day"""
+        for table in (self.table, self.next_table):
+            if table is not None and day in table:
+                return table.sunset(day)
+        raise KeyError(day)
+    
+    def _switchover_at(self, now: datetime) -> datetime:
+        """The switchover instant on the same day as now"""
+        return now.replace(hour=self.switchover.hour, minute=self.switchover.minute,
+                           second=0, microsecond=0)
+    
+    def _countdown_for(self, now: datetime,
+                       lookup: Callable[[date], Optional[datetime]]) -> Tuple[CountdownState, Optional[datetime]]:
+        """
+        Pick today's sunset, or tomorrow's once it has passed and the switchover
+        time is reached, and the instant at which that choice has to be made again
+        Args:
+            now (datetime): Aware local time to pick the target for
+            lookup (Callable): Sunset for a day
+            
+        Returns:
+            Tuple[CountdownState, Optional[datetime]]: Armed state and its target sunset
+        """
+        today = now.date()
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        switchover = self._switchover_at(now)
+        
+        sunset = lookup(today)
+        state = CountdownState()
+        if sunset and sunset > now:
+            state.arm(sunset.timestamp(), sunset.timestamp())
+        elif now < switchover:
+            # Between sunset and the switchover there is nothing to count down to
+            state.arm(None, switchover.timestamp())
+        else:
+            sunset = lookup(today + timedelta(days=1))
+            # At midnight tomorrow's sunset becomes today's and loses its "T " prefix
+            state.arm(sunset.timestamp() if sunset else None, midnight.timestamp(), is_tomorrow=True)
+        return state, sunset
+    
+    def _arm_countdown(self):
+        """Arm the countdown for the current time and prepare the one that follows it"""
+        if self.timeline is not None:
+            self._arm_from_timeline()
+            return
+        try:
+            state, sunset = self._countdown_for(now_local(), self._memory_sunset)
+        except KeyError:
+            # A new year the tables don't reach yet: they are rebuilt by the next refresh,
+            # never here, since this also runs on the tick
+            logger.info("Sunset tables don't cover the countdown yet, waiting for a refresh")
+            state, sunset = CountdownState(), None
+            state.arm(None, time.time() + TABLES_PENDING_RETRY)
+            self._tables_short = True
+        else:
+            self._tables_short = False
+        self.sunset = sunset
+        # Swap in the new state in one assignment, readers never see a half-armed one
+        self.countdown = state
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Countdown armed: target=%s, switch at %s", sunset, datetime.fromtimestamp(state.switch_epoch))
+        self._prepare_next_countdown()
+    
+    def _arm_from_timeline(self):
+        """Arm the countdown to the next suhoor end or iftar; a bisect, no lookups or I/O"""
+        timeline = self.timeline
+        now = time.time()
+        state = CountdownState()
+        found = timeline.next_event(now)
+        if found is None:
+            # The timeline ran out (refresh overdue): look again in a minute
+            state.arm(None, now + 60)
+        else:
+            _, epoch, event = found
+            state.arm(epoch, epoch, event=event)
+        iftar = timeline.next_of(IFTAR, now)
+        self.sunset = datetime.fromtimestamp(iftar, timeline.tz) if iftar is not None else None
+        self.countdown = state
+        self._next_countdown = None
+        logger.debug("Countdown armed from the timeline: %s at %s", state.event, state.target_epoch)
+    
+    def _update_timeline(self, location: Location, days: int):
+        """Rebuild the suhoor/iftar timeline when it no longer covers the prefetch window or the location moved"""
+        from src.prayer_times import get_method
+        from src.timeline import Timeline, TIMELINE_DAYS
+        key = (location.lat, location.lng)
+        timeline = self.timeline
+        if timeline is not None and self._timeline_location == key and timeline.end > time.time() + days * 86400:
+            return
+        # A day past the window, so the timeline stays fresh for about a day of hourly prefetches
+        self.timeline = Timeline.build(location, get_method(self.config.get("prayer_method")),
+                                       max(days, TIMELINE_DAYS) + 1)
+        self._timeline_location = key
+        logger.info(f"Built suhoor and iftar timeline for {location.city} ({len(self.timeline)} events)")
+        self._arm_countdown()
+    
+    def _prepare_next_countdown(self):
+        """Arm, ahead of time, the countdown that takes over at the current switch instant"""
+        if self.timeline is not None:
+            # The next countdown is one bisect away, nothing to prepare
+            return
+        switch_epoch = self.countdown.switch_epoch
+        try:
+            state, sunset = self._countdown_for(datetime.fromtimestamp(switch_epoch, local_zone()),
+                                                self._memory_sunset)
+        except KeyError:
+            # Not prefetched yet; the next refresh extends the tables
+            self._next_countdown = None
+            return
+        self._next_countdown = (switch_epoch, state, sunset)
+    
+    def upcoming_countdowns(self, count: int) -> List[CountdownState]:
+        """
+        The current countdown followed by the ones that take over at each switch instant
+        Args:
+            count (int): Number of states to return
+            
+        Returns:
+            List[CountdownState]: States in order, the first one is current; fewer
+            than count if the prefetched tables run out
+        """
+        with self.lock:
+            if self.countdown.expired():
+                self._arm_countdown()
+        if self.timeline is not None:
+            return self._timeline_countdowns(count)
+        states = [self.countdown]
+        while len(states) < count:
+            switch = datetime.fromtimestamp(states[-1].switch_epoch, local_zone())
+            try:
+                state, _ = self._countdown_for(switch, self._memory_sunset)
+            except KeyError:
+                break
+            states.append(state)
+        return states
+    
+    def _timeline_countdowns(self, count: int) -> List[CountdownState]:
+        """upcoming_countdowns in the dual mode: one state per timeline event"""
+        found = self.timeline.next_event(time.time())
+        if found is None:
+            return [self.countdown]
+        i = found[0]
+        states = []
+        for epoch, event in zip(self.timeline.epochs[i:i + count], self.timeline.events[i:i + count]):
+            state = CountdownState()
+            state.arm(epoch, epoch, event=event)
+            states.append(state)
+        return states
+    
+    def _advance_countdown(self):
+        """Hand over to the prepared countdown at a switch instant, arming one from scratch if there is none"""
+        if self.timeline is not None:
+            self._arm_from_timeline()
+            return
+        prepared = self._next_countdown
+        if prepared is not None and prepared[0] == self.countdown.switch_epoch and prepared[1].switch_epoch > time.time():
+            _, state, sunset = prepared
+            state.resync()
+            self.sunset = sunset
+            self.countdown = state
+            logger.debug("Switched to the prepared countdown: target=%s", sunset)
+            self._prepare_next_countdown()
+        else:
+            self._arm_countdown()
+    
+    def prefetch(self, days: Optional[int] = None):
+        """
+        Compute or fetch sunsets for the days ahead and prepare the next countdown,
+        so the switch to the next target needs no I/O. Safe to run on a worker thread.
+        Args:
+            days (int, optional): Days after today to cover (defaults to prefetch_days)
+        """
+        with self.lock:
+            self._prefetch(self.prefetch_days if days is None else days)
+    
+    def _prefetch(self, days: int):
+        """prefetch with the lock held"""
+        today = date.today()
+        last = today + timedelta(days=days)
+        
+        if self.dual:
+            location = self.table.location if self.table is not None else self.location_finder.get_current_location()
+            if location:
+                self._update_timeline(location, days)
+        
+        if self.table is not None:
+            if today not in self.table and self.next_table is not None and today in self.next_table:
+                # The new year has started: the prefetched table becomes the current one
+                self.table, self.next_table = self.next_table, None
+            if last not in self.table and (self.next_table is None or last not in self.next_table):
+                self.next_table = self._load_table(self.table.location, last.year)
+            self._prepare_next_countdown()
+            return
+        
+        location = self.location_finder.get_current_location()
+        if not location:
+            logger.error("Cannot prefetch sunsets without a location")
+            return
+        for offset in range(days + 1):
+            self._get_sunset(location, today + timedelta(days=offset))
+        self.save_data()
+        logger.info(f"Prefetched sunsets up to {last}")
+    
+    def remaining_seconds(self) -> Optional[float]:
+        """Seconds until the sunset being counted down to, None if there is none"""
+        countdown = self.countdown
+        # While a refresh holds the lock it re-arms the countdown itself, so don't wait for it
+        if countdown.expired() and self.lock.acquire(blocking=False):
+            try:
+                self._advance_countdown()
+            finally:
+                self.lock.release()
+            countdown = self.countdown
+            if self._tables_short and self.on_refresh_needed:
+                self.on_refresh_needed()
+        remaining = countdown.remaining_seconds()
+        if remaining is not None and remaining > 0:
+            return remaining
+        return None
+    
+    def request_refresh(self):
+        """Ask for fresh sunset data: via on_refresh_needed if set, otherwise fetch now"""
+        if self.on_refresh_needed:
+            logger.debug("Requesting background sunset refresh")
+            self.on_refresh_needed()
+        else:
+            self.fetch_todays_sunset()
+    
+    def refresh(self, force: bool = False):
+        """
+        Fetch, compute and persist sunset data. Safe to run on a worker thread.
+        Args:
+            force (bool): Drop cached sunsets and location before refreshing
+        """
+        with self.lock:
+            if force:
+                self.cache.clear()
+                self.location_finder.clear_cache()
+            self.fetch_and_save_sunset()
+            self.prefetch()
+            if self._tables_short:
+                # Armed before prefetch loaded the table that covers the countdown
+                self._arm_countdown()
+    
     def get_remaining_time(self) -> Optional[timedelta]:
         """Get time remaining until sunset"""
         logger.debug("Getting remaining time until sunset")
         
+        # With a precomputed table the countdown is armed once, no refetching
+        if self.table is not None or self.timeline is not None:
+            remaining = self.remaining_seconds()
+            return timedelta(seconds=remaining) if remaining is not None else None
+        
         # If we have a current sunset time, check if it's still valid
         if self.sunset:
             try:
                 # Ensure we have timezone info
                 if self.sunset.tzinfo is None:
                     logger.warning("Sunset time has no timezone info, assuming local timezone")
-                    local_tz = datetime.now().astimezone().tzinfo
+                    local_tz = local_zone()
                     self.sunset = self.sunset.replace(tzinfo=local_tz)
                 
                 now = datetime.now(self.sunset.tzinfo)
                 
                 # Debug timezone information
-                logger.debug(f"Current time: {now}, Sunset time: {self.sunset}")
-                logger.debug(f"Current timezone: {now.tzinfo}, Sunset timezone: {self.sunset.tzinfo}")
+                logger.debug("Current time: %s, Sunset time: %s", now, self.sunset)
+                logger.debug("Current timezone: %s, Sunset timezone: %s", now.tzinfo, self.sunset.tzinfo)
                 
                 # Check if sunset is from today
                 if self.sunset.date() == now.date():
                     time_diff = self.sunset - now
                     if time_diff.total_seconds() > 0:
-                        logger.debug(f"Time remaining until today's sunset: {time_diff}")
+                        logger.debug("Time remaining until today's sunset: %s", time_diff)
                         return time_diff
                     else:
                         logger.debug("Today's sunset has already passed")
@@ -56,38 +421,38 @@ class SunsetCalculator:
                         logger.debug("Sunset time is from a future day, checking if it's tomorrow")
                         tomorrow = now + timedelta(days=1)
                         if self.sunset.date() == tomorrow.date():
-                            if (now.hour >= 20):  # After 8 PM, start showing tomorrow's time
-                                logger.debug("After 8 PM, showing tomorrow's sunset time")
+                            if now >= self._switchover_at(now):  # Start showing tomorrow's time
+                                logger.debug("After the switchover, showing tomorrow's sunset time")
                                 time_diff = self.sunset - now
-                                logger.debug(f"Time until tomorrow's sunset: {time_diff}")
+                                logger.debug("Time until tomorrow's sunset: %s", time_diff)
                                 return time_diff
                         
                 # If we get here, we need to refresh the sunset time
                 logger.debug("Need to refresh sunset data")
-                self.fetch_todays_sunset()
+                self.request_refresh()
                 
                 # Check again with fresh data
                 if self.sunset and self.sunset.date() == now.date():
                     time_diff = self.sunset - now
                     if time_diff.total_seconds() > 0:
-                        logger.debug(f"After refresh, time remaining: {time_diff}")
+                        logger.debug("After refresh, time remaining: %s", time_diff)
                         return time_diff
             
             except Exception as e:
-                logger.error(f"Error calculating remaining time: {e}")
+                logger.error("Error calculating remaining time: %s", e)
                 logger.exception("Detailed error calculating time")
         
         # If we don't have a sunset time or it's not valid, fetch it
         else:
             logger.debug("No sunset time set, fetching it now")
-            self.fetch_todays_sunset()
+            self.request_refresh()
             
             # Try again with the newly fetched sunset time
             if self.sunset:
                 now = datetime.now(self.sunset.tzinfo)
                 time_diff = self.sunset - now
                 if time_diff.total_seconds() > 0:
-                    logger.debug(f"After initial fetch, time remaining: {time_diff}")
+                    logger.debug("After initial fetch, time remaining: %s", time_diff)
                     return time_diff
         
         # If all else fails
@@ -100,104 +465,91 @@ class SunsetCalculator:
         # Get location
         location = self.location_finder.get_current_location()
         if location:
-            # Get today's sunset data
-            today = datetime.now().strftime('%Y-%m-%d')
-            logger.debug(f"Requesting sunset for date: {today}")
-            
-            sunset_data = self.sunset_finder.fetch_sunset(location, date=today)
-            if sunset_data:
-                sunset_time = self.sunset_finder.get_sunset_datetime(sunset_data)
-                if sunset_time:
-                    # Save to cache
-                    today_key = str(datetime.now().timetuple().tm_yday)
-                    self.sunsets[today_key] = sunset_time.isoformat()
-                    self.sunset = sunset_time
-                    logger.info(f"Updated today's sunset time: {self.sunset}")
-                    
-                    # Check if we need to show today's time or fetch tomorrow's
-                    now = datetime.now(sunset_time.tzinfo)
-                    if sunset_time < now:
-                        logger.info("Today's sunset has already passed, fetching tomorrow's")
-                        
-                        # If today's sunset already passed, get tomorrow's
-                        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-                        tomorrow_data = self.sunset_finder.fetch_sunset(location, date=tomorrow)
-                        if tomorrow_data:
-                            tomorrow_sunset = self.sunset_finder.get_sunset_datetime(tomorrow_data)
-                            if tomorrow_sunset:
-                                tomorrow_key = str((datetime.now() + timedelta(days=1)).timetuple().tm_yday)
-                                self.sunsets[tomorrow_key] = tomorrow_sunset.isoformat()
-                                
-                                # Only use tomorrow's time after 8 PM
-                                if now.hour >= 20:
-                                    self.sunset = tomorrow_sunset
-                                    logger.info(f"After 8 PM, using tomorrow's sunset: {self.sunset}")
-                                else:
-                                    logger.info(f"Stored tomorrow's sunset: {tomorrow_sunset}")
-                    
-                    self.save_data()
-                    return True
+            self.cache.bind_legacy(location)
+            today = datetime.now().date()
+            sunset_time = self._get_sunset(location, today)
+            if sunset_time:
+                self.sunset = sunset_time
+                logger.info(f"Updated today's sunset time: {self.sunset}")
+                
+                # Check if we need to show today's time or fetch tomorrow's
+                now = datetime.now(sunset_time.tzinfo)
+                if sunset_time < now:
+                    logger.info("Today's sunset has already passed, fetching tomorrow's")
+                    tomorrow_sunset = self._get_sunset(location, today + timedelta(days=1))
+                    if tomorrow_sunset:
+                        # Only use tomorrow's time after the switchover
+                        if now >= self._switchover_at(now):
+                            self.sunset = tomorrow_sunset
+                            logger.info(f"After the switchover, using tomorrow's sunset: {self.sunset}")
+                        else:
+                            logger.info(f"Stored tomorrow's sunset: {tomorrow_sunset}")
+                
+                self.save_data()
+                return True
         
         logger.error("Failed to fetch today's sunset time")
         return False
     
+    def _get_sunset(self, location: Location, day) -> Optional[datetime]:
+        """Sunset for a location and day from the cache, fetching and caching it on a miss"""
+        sunset_time = self.cache.get(location, day)
+        if sunset_time:
+            metrics.inc("iftar_sunset_cache_hits_total")
+            logger.debug("Sunset cache hit for %s", day)
+            return sunset_time
+        
+        metrics.inc("iftar_sunset_cache_misses_total")
+        logger.debug("Requesting sunset for date: %s", day)
+        sunset_data = self.sunset_finder.fetch_sunset(location, date=day.isoformat())
+        if sunset_data:
+            sunset_time = self.sunset_finder.get_sunset_datetime(sunset_data)
+            if sunset_time:
+                self.cache.put(location, day, sunset_time)
+                return sunset_time
+        return None
+    
     def is_sunset_already_got(self) -> bool:
         """Check if we already have sunset data for today"""
-        today_key = str(datetime.now().timetuple().tm_yday)  # Day of year
-        logger.debug(f"Checking if sunset data exists for day {today_key}")
+        location = self.location_finder.get_current_location()
+        if not location:
+            return False
+        self.cache.bind_legacy(location)
         
-        if today_key in self.sunsets:
-            try:
-                sunset_str = self.sunsets[today_key]
-                logger.debug(f"Found cached sunset time: {sunset_str}")
-                
-                # Verify the cached time is valid
-                try:
-                    dt = datetime.fromisoformat(sunset_str)
-                    
-                    # Ensure dt has timezone info
-                    if dt.tzinfo is None:
-                        # If no timezone, assume local timezone
-                        local_tz = datetime.now().astimezone().tzinfo
-                        dt = dt.replace(tzinfo=local_tz)
-                        
-                    now = datetime.now(dt.tzinfo)
-                    
-                    # Check if the cached sunset time is for today
-                    if dt.date() == now.date():
-                        # It's today's sunset
-                        self.sunset = dt
-                        
-                        # If sunset already passed and it's evening, check for tomorrow's sunset
-                        if dt < now and now.hour >= 20:
-                            tomorrow_key = str((now + timedelta(days=1)).timetuple().tm_yday)
-                            if tomorrow_key in self.sunsets:
-                                try:
-                                    tomorrow_sunset = datetime.fromisoformat(self.sunsets[tomorrow_key])
-                                    self.sunset = tomorrow_sunset
-                                    logger.info(f"After 8 PM, using cached tomorrow's sunset: {self.sunset}")
-                                except Exception as e:
-                                    logger.error(f"Error parsing tomorrow's sunset: {e}")
-                        else:
-                            logger.info(f"Using cached today's sunset: {self.sunset}")
-                        
-                        return True
-                    else:
-                        # Cached sunset is not for today, we need a refresh
-                        logger.warning("Cached sunset time is not for today")
-                        return False
-                        
-                except Exception as e:
-                    logger.error(f"Error parsing cached sunset time: {e}")
-            except (ValueError, TypeError) as e:
-                logger.error(f"Error parsing cached sunset time: {e}")
+        now = now_local()
+        sunset = self.cache.get(location, now.date())
+        if sunset is None:
+            logger.debug("No valid sunset data for today")
+            return False
         
-        logger.debug("No valid sunset data for today")
-        return False
+        self.sunset = sunset
+        # If sunset already passed and it's evening, check for tomorrow's sunset
+        if sunset < now and now >= self._switchover_at(now):
+            tomorrow_sunset = self.cache.get(location, now.date() + timedelta(days=1))
+            if tomorrow_sunset:
+                self.sunset = tomorrow_sunset
+                logger.info(f"After the switchover, using cached tomorrow's sunset: {self.sunset}")
+        else:
+            logger.info(f"Using cached today's sunset: {self.sunset}")
+        return True
     
     def fetch_and_save_sunset(self):
         """Fetch sunset time if not already cached"""
         logger.info("Fetching and saving sunset data")
+        if self.sunset_finder.offline and self.build_table():
+            # Sunsets are computed locally, keep the cache file in sync for other tools
+            self._arm_countdown()
+            if self.store is None:
+                # Also what the next start shows before anything is computed
+                location = self.table.location
+                today = date.today()
+                days = [today + timedelta(days=offset) for offset in range(self.prefetch_days + 1)]
+                self.cache.bind_legacy(location)
+                self.cache.put_many(location, [(day, self.table.sunset(day)) for day in days
+                                               if day in self.table and self.table.sunset(day)])
+                self.save_data()
+            return
+        
         if not self.is_sunset_already_got():
             # Get today's sunset
             self.fetch_todays_sunset()
@@ -210,54 +562,79 @@ class SunsetCalculator:
                 logger.warning("Cached sunset date doesn't match today, refreshing")
                 self.fetch_todays_sunset()
     
+    def load_first_frame(self) -> bool:
+        """
+        Pick the sunset to show at startup from the last known location and the
+        cached sunsets, without any network I/O or computation
+        Returns:
+            bool: True if a cached sunset to count down to was found
+        """
+        if self.dual:
+            # Whether suhoor or iftar comes next is only known once the timeline is computed
+            return False
+        location = self.location_finder.get_last_known_location()
+        if location is None:
+            return False
+        
+        def cached_sunset(day: date) -> Optional[datetime]:
+            if self.store is not None:
+                epoch = self.store.sunset_epoch(location, day)
+                return datetime.fromtimestamp(epoch, local_zone()) if epoch else None
+            return self.cache.get(location, day)
+        
+        state, sunset = self._countdown_for(now_local(), cached_sunset)
+        if state.target_epoch is None:
+            # Between sunset and the switchover the sunset found has already passed:
+            # nothing to show, and showing it would make the first tick refetch
+            return False
+        self.sunset = sunset
+        logger.info(f"First frame from cached sunset: {sunset}")
+        return True
+    
     def load_data(self):
         """Load cached sunset data from file"""
         logger.debug(f"Loading sunset data from {self.data_file}")
-        try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    self.sunsets = json.load(f)
-                    logger.info(f"Loaded {len(self.sunsets)} sunset records")
-                    
-                    # Verify and clean up data
-                    self._validate_sunset_data()
-            else:
-                logger.info("No cached data file exists yet")
-        except Exception as e:
-            logger.exception(f"Error loading sunset data: {e}")
-            self.sunsets = {}
-    
-    def _validate_sunset_data(self):
-        """Validate and clean up sunset data"""
-        to_remove = []
-        for day, sunset_str in self.sunsets.items():
-            try:
-                dt = datetime.fromisoformat(sunset_str)
-                # Keep the data if it's valid
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Invalid sunset time for day {day}: {sunset_str}")
-                to_remove.append(day)
-        
-        # Remove invalid entries
-        for day in to_remove:
-            del self.sunsets[day]
-            
-        if to_remove:
-            logger.info(f"Removed {len(to_remove)} invalid sunset records")
-            self.save_data()
+        self.cache.load()
     
     def save_data(self):
         """Save sunset data to file"""
-        logger.debug(f"Saving sunset data to {self.data_file}")
-        try:
-            with open(self.data_file, 'w') as f:
-                json.dump(self.sunsets, f)
-            logger.info(f"Saved {len(self.sunsets)} sunset records")
-        except Exception as e:
-            logger.exception(f"Error saving sunset data: {e}")
+        self.cache.save()
+    
+    def next_display_change(self, now: Optional[float] = None) -> float:
+        """
+        When the string returned by format_remaining_time will next change
+        Args:
+            now (float, optional): Current epoch time (defaults to time.time())
+            
+        Returns:
+            float: Epoch time of the next change
+        """
+        now = time.time() if now is None else now
+        if self.table is not None or self.timeline is not None:
+            # Once per wakeup, re-anchor the countdown in case the system slept
+            self.countdown.resync()
+            remaining = self.remaining_seconds()
+            if self.countdown.expired():
+                # A refresh is re-arming it, look again shortly rather than spin
+                return now + 1
+            if remaining is None:
+                return self.countdown.switch_epoch
+            return min(now + (remaining % 60 or 60), self.countdown.switch_epoch)
+        
+        remaining = self.get_remaining_time()
+        if remaining is None or not self.sunset:
+            # Nothing to count down to, check again at the next wall-clock minute
+            return (now // 60 + 1) * 60
+        # The display shows whole minutes, so it changes each time the remaining
+        # seconds cross a multiple of 60
+        seconds_left = self.sunset.timestamp() - now
+        return now + (seconds_left % 60 or 60)
     
     def format_remaining_time(self) -> str:
         """Format remaining time for display"""
+        if self.table is not None or self.timeline is not None:
+            return self._format_countdown()
+        
         try:
             remaining = self.get_remaining_time()
             if remaining and remaining.total_seconds() > 0:
@@ -270,12 +647,12 @@ class SunsetCalculator:
                     logger.debug("Showing time for tomorrow's sunset")
                     formatted_time = "T " + formatted_time  # Prefix with T for tomorrow
                 
-                logger.debug(f"Formatted remaining time: {formatted_time}")
+                logger.debug("Formatted remaining time: %s", formatted_time)
                 return formatted_time
             else:
                 # Force a refresh if time is invalid
                 logger.warning("Invalid remaining time, refreshing data")
-                self.fetch_todays_sunset()
+                self.request_refresh()
                 
                 # Try again after refresh
                 remaining = self.get_remaining_time()
@@ -288,7 +665,7 @@ class SunsetCalculator:
                     if self.sunset and self.sunset.date() > datetime.now().date():
                         formatted_time = "T " + formatted_time  # Prefix with T for tomorrow
                         
-                    logger.debug(f"After refresh, formatted time: {formatted_time}")
+                    logger.debug("After refresh, formatted time: %s", formatted_time)
                     return formatted_time
                 
                 logger.error("Failed to get valid time after refresh")
@@ -297,3 +674,8 @@ class SunsetCalculator:
         
         logger.debug("Using placeholder time string")
         return "--:--"
+    
+    def _format_countdown(self) -> str:
+        """Fast path of format_remaining_time: the string is only rebuilt when the minute changes"""
+        remaining = self.remaining_seconds()
+        return self._display.render(remaining, self.countdown.is_tomorrow)
@@ -1,14 +1,35 @@
-import requests
 from datetime import datetime, timedelta
-import pytz
 from typing import Dict, Any, Optional
 from src.location_finder import Location
+from src.http_client import HttpClient, get_default_client
+from src.timezones import get_zone
+from src.metrics import metrics
 from src.logger import logger
 
+# A day's sunset never changes, so API responses can be cached for a long time
+SUNSET_CACHE_TTL = 30 * 24 * 3600
+
 class SunsetFinder:
-    def __init__(self):
-        self.api_url = "https://api.sunrise-sunset.org/json"
-        logger.info("SunsetFinder initialized")
+    def __init__(self, offline: bool = True, api_url: str = "https://api.sunrise-sunset.org/json",
+                 client: Optional[HttpClient] = None):
+        """
+        Args:
+            offline (bool): Compute sunset locally with the solar position engine
+                instead of calling api.sunrise-sunset.org
+            api_url (str): Sunrise-sunset API endpoint (overridable for a local stub server)
+            client (HttpClient, optional): HTTP client, defaults to the shared one
+        """
+        self.api_url = api_url
+        self.offline = offline
+        # The shared client (and requests) is only created on the first request
+        self._client = client
+        logger.info(f"SunsetFinder initialized ({'offline' if offline else 'API'} mode)")
+    
+    @property
+    def client(self) -> HttpClient:
+        if self._client is None:
+            self._client = get_default_client()
+        return self._client
     
     def fetch_sunset(self, location: Location, date: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
@@ -20,13 +41,17 @@ class SunsetFinder:
         Returns:
             Dict: Dictionary with sunset information or None if failed
         """
+        if self.offline:
+            return self.compute_sunset(location, date)
+        
         logger.info(f"Fetching sunset data for location: {location.lat}, {location.lng}, date: {date if date else 'today'}")
         try:
             params = {
                 "lat": location.lat,
                 "lng": location.lng,
                 "formatted": 0,  # Return ISO8601 time format
-                "date": date if date else "today"
+                # Always send an explicit date so cached responses stay keyed by day
+                "date": date if date and date != "today" else datetime.now().strftime('%Y-%m-%d')
             }
             
             # Add timezone if available
@@ -34,9 +59,13 @@ class SunsetFinder:
                 params["tzid"] = location.timezone
                 
             logger.debug(f"Making API request with params: {params}")
-            response = requests.get(self.api_url, params=params)
+            with metrics.timer("iftar_sunset_fetch_seconds"):
+                response = self.client.get(self.api_url, params=params, cache_ttl=SUNSET_CACHE_TTL)
             
-            if response.status_code == 200:
+            if response is None:
+                logger.error("Error fetching sunset data: no response")
+                return None
+            elif response.status_code == 200:
                 data = response.json()
                 logger.debug(f"Received sunset data: {data}")
                 
@@ -54,6 +83,42 @@ class SunsetFinder:
             logger.exception(f"Exception in fetch_sunset: {e}")
             return None
     
+    def compute_sunset(self, location: Location, date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Computes sunset information locally, without any network access
+        Args:
+            location (Location): Location object with lat and lng attributes
+            date (str, optional): Date in YYYY-MM-DD format (defaults to today)
+            
+        Returns:
+            Dict: Dictionary shaped like the sunrise-sunset.org response or None if
+            the sun does not set on that day (polar day/night)
+        """
+        logger.debug(f"Computing sunset for location: {location.lat}, {location.lng}, date: {date if date else 'today'}")
+        # Loaded on first use, it pulls in NumPy
+        from src import solar_position
+        try:
+            day = datetime.strptime(date, '%Y-%m-%d').date() if date and date != "today" else datetime.now().date()
+            sunrise = solar_position.epoch_to_datetime(solar_position.sunrise_utc(day, location.lat, location.lng))
+            sunset = solar_position.epoch_to_datetime(solar_position.sunset_utc(day, location.lat, location.lng))
+            if sunset is None:
+                logger.error(f"No sunset on {day} at {location.lat}, {location.lng}")
+                return None
+            
+            data = {
+                "results": {
+                    "sunrise": sunrise.isoformat() if sunrise else None,
+                    "sunset": sunset.isoformat(),
+                },
+                "status": "OK",
+            }
+            if location.timezone:
+                data["tzid"] = location.timezone
+            return data
+        except Exception as e:
+            logger.exception(f"Exception in compute_sunset: {e}")
+            return None
+    
     def get_sunset_datetime(self, data: Dict[str, Any]) -> Optional[datetime]:
         """
         Extract sunset time from API response and convert to datetime
@@ -71,20 +136,9 @@ class SunsetFinder:
                 # Convert to datetime
                 dt = datetime.fromisoformat(sunset_str.replace("Z", "+00:00"))
                 
-                # Check if timezone is specified in the response
-                if "tzid" in data:
-                    try:
-                        # Try to use the timezone from the API response
-                        tz = pytz.timezone(data["tzid"])
-                        dt = dt.astimezone(tz)
-                        logger.debug(f"Using timezone from API: {data['tzid']}")
-                    except Exception as e:
-                        logger.warning(f"Failed to use timezone from API: {e}")
-                        # Fall back to local timezone
-                        dt = dt.astimezone(datetime.now().astimezone().tzinfo)
-                else:
-                    # If no timezone in response, convert to local timezone
-                    dt = dt.astimezone(datetime.now().astimezone().tzinfo)
+                # Use the timezone from the response if there is one (resolved once
+                # per zone name), otherwise the local timezone
+                dt = dt.astimezone(get_zone(data.get("tzid")))
                 
                 logger.info(f"Sunset time: {dt}")
                 return dt
@@ -0,0 +1,176 @@
+"""
+Compact binary sunset store backed by a memory-mapped file.
+
+Holds precomputed Fajr, sunrise and sunset instants for many locations and
+years as int32 minutes since the Unix epoch, so opening it costs an mmap and a
+small header parse rather than parsing thousands of ISO strings. Several clock
+processes on one host map the same file read-only and share its pages.
+
+Layout (little endian):
+    header   magic b"IFSS", version u16, event count u16, block count u32
+    index    per block: lat i32, lng i32 (degrees * 100), year u16, days u16,
+             data offset u32, CRC32 of the block data u32
+    data     per block: event count x days int32 epoch minutes, NO_EVENT when
+             the event doesn't happen on that day
+
+A block's checksum is verified the first time it is read rather than when the
+file is opened; a corrupt block, or one that runs past the end of a truncated
+file, is dropped from the index and recomputed.
+"""
+
+import os
+import mmap
+import zlib
+import struct
+import tempfile
+import numpy as np
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+from src.location_finder import Location
+from src.sunset_table import SunsetTable
+from src.metrics import metrics
+from src.logger import logger
+
+MAGIC = b"IFSS"
+STORE_VERSION = 2
+HEADER = struct.Struct("<4sHHI")
+INDEX_ENTRY = struct.Struct("<iiHHII")
+NO_EVENT = np.iinfo(np.int32).min
+# Rows stored per block, in this order
+EVENTS = ("fajr", "sunrise", "sunset")
+# Same rounding as the JSON cache: locations within ~1 km share a block
+COORD_SCALE = 100
+
+BlockKey = Tuple[int, int, int]
+
+class SunsetStore:
+    """Read-only view of a sunset store file, plus a writer that rebuilds it atomically"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self.index: Dict[BlockKey, Tuple[int, int, int]] = {}
+        # Blocks whose checksum has already been checked since the file was opened
+        self._verified = set()
+
+    @staticmethod
+    def block_key(location: Location, year: int) -> BlockKey:
+        return (round(location.lat * COORD_SCALE), round(location.lng * COORD_SCALE), year)
+
+    def open(self) -> bool:
+        """Map the store file and read its index, returns False if there is no usable file"""
+        self.close()
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < HEADER.size:
+            return False
+        try:
+            self._file = open(self.path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, events, count = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != STORE_VERSION or events != len(EVENTS):
+                logger.warning(f"Ignoring sunset store {self.path} with unknown format")
+                self.close()
+                return False
+            for i in range(count):
+                lat, lng, year, days, offset, crc = INDEX_ENTRY.unpack_from(self._mmap, HEADER.size + i * INDEX_ENTRY.size)
+                if offset + len(EVENTS) * days * 4 > len(self._mmap):
+                    logger.warning(f"Dropping truncated block {(lat, lng, year)} from sunset store {self.path}")
+                    continue
+                self.index[(lat, lng, year)] = (offset, days, crc)
+            logger.info(f"Opened sunset store with {count} blocks")
+            return True
+        except Exception as e:
+            logger.exception(f"Error opening sunset store {self.path}: {e}")
+            self.close()
+            return False
+
+    def close(self):
+        self.index = {}
+        self._verified = set()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A NumPy view still references the mapping; it is closed once that view is freed
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _block(self, key: BlockKey) -> Optional[np.ndarray]:
+        """events x days int32 view of a block, backed directly by the mapping"""
+        if self._mmap is None or key not in self.index:
+            return None
+        offset, days, crc = self.index[key]
+        block = np.frombuffer(self._mmap, dtype="<i4", count=len(EVENTS) * days,
+                              offset=offset).reshape(len(EVENTS), days)
+        if key not in self._verified:
+            if zlib.crc32(block) != crc:
+                logger.warning(f"Dropping corrupt block {key} from sunset store {self.path}")
+                del self.index[key]
+                return None
+            self._verified.add(key)
+        return block
+
+    def sunset_epoch(self, location: Location, day: date) -> Optional[float]:
+        """O(1) sunset lookup in seconds since the epoch, None if not stored or no sunset"""
+        block = self._block(self.block_key(location, day.year))
+        if block is None:
+            return None
+        minutes = block[EVENTS.index("sunset"), day.timetuple().tm_yday - 1]
+        return None if minutes == NO_EVENT else float(minutes) * 60.0
+
+    def get_table(self, location: Location, year: int) -> Optional[SunsetTable]:
+        """Whole-year table for a location from the store, None if it isn't stored"""
+        block = self._block(self.block_key(location, year))
+        if block is None:
+            return None
+        seconds = np.where(block == NO_EVENT, np.nan, block.astype(np.float64) * 60.0)
+        return SunsetTable(location, date(year, 1, 1), *seconds)
+
+    def _stored_blocks(self) -> Dict[BlockKey, np.ndarray]:
+        blocks = {key: self._block(key) for key in list(self.index)}
+        return {key: np.array(block) for key, block in blocks.items() if block is not None}
+
+    def add_tables(self, tables: Iterable[SunsetTable]):
+        """
+        Add whole-year tables to the store and rewrite the file
+        Args:
+            tables (Iterable[SunsetTable]): Tables starting on January 1st
+        """
+        blocks = self._stored_blocks()
+        for table in tables:
+            if table.start.month != 1 or table.start.day != 1:
+                raise ValueError("Only whole-year tables can be stored")
+            rows = np.vstack([table.fajr_epoch, table.sunrise_epoch, table.sunset_epoch])
+            minutes = np.where(np.isnan(rows), NO_EVENT, np.round(np.nan_to_num(rows) / 60.0)).astype("<i4")
+            blocks[self.block_key(table.location, table.start.year)] = minutes
+        self.write(blocks)
+        self.open()
+
+    @metrics.timed("iftar_disk_write_seconds", file="sunset_store")
+    def write(self, blocks: Dict[BlockKey, np.ndarray]):
+        """Write blocks to a temporary file and rename it over the store"""
+        data_start = HEADER.size + len(blocks) * INDEX_ENTRY.size
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".sunsets.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, STORE_VERSION, len(EVENTS), len(blocks)))
+                offset = data_start
+                data = {key: minutes.astype("<i4").tobytes() for key, minutes in blocks.items()}
+                for (lat, lng, year), minutes in blocks.items():
+                    raw = data[(lat, lng, year)]
+                    f.write(INDEX_ENTRY.pack(lat, lng, year, minutes.shape[1], offset, zlib.crc32(raw)))
+                    offset += len(raw)
+                for raw in data.values():
+                    f.write(raw)
+            # Release our mapping before replacing the file (required on Windows)
+            self.close()
+            os.replace(tmp_path, self.path)
+            logger.info(f"Wrote sunset store with {len(blocks)} blocks to {self.path}")
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
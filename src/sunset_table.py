@@ -0,0 +1,108 @@
+import numpy as np
+from datetime import date, datetime, timedelta
+from typing import Optional
+from src.location_finder import Location
+from src import solar_position, timezones
+from src.logger import logger
+
+# Sun 18 degrees below the horizon, the usual Fajr (dawn) twilight angle
+FAJR_ANGLE = 18.0
+
+class SunsetTable:
+    """
+    Sunrise, sunset and Fajr twilight instants for one location over a run of days.
+
+    All instants are stored as float64 seconds since the Unix epoch in parallel
+    arrays indexed by day offset from `start`, so a lookup is a single array read.
+    NaN marks days on which the event does not happen (polar day/night).
+    The location's UTC offset at each instant is precomputed the same way, so
+    local times are an add, with DST changes falling on the right days.
+    """
+
+    def __init__(self, location: Location, start: date, fajr: np.ndarray,
+                 sunrise: np.ndarray, sunset: np.ndarray):
+        self.location = location
+        self.start = start
+        self._start_ordinal = start.toordinal()
+        self.fajr_epoch = fajr
+        self.sunrise_epoch = sunrise
+        self.sunset_epoch = sunset
+        self.tz = timezones.get_zone(location.timezone)
+        self.fajr_offset = timezones.utc_offsets(self.tz, fajr)
+        self.sunrise_offset = timezones.utc_offsets(self.tz, sunrise)
+        self.sunset_offset = timezones.utc_offsets(self.tz, sunset)
+
+    @classmethod
+    def for_range(cls, location: Location, start: date, days: int,
+                  fajr_angle: float = FAJR_ANGLE) -> "SunsetTable":
+        """
+        Compute the table for `days` consecutive days in one vectorized pass
+        Args:
+            location (Location): Location to compute for
+            start (date): First day of the table
+            days (int): Number of days
+            fajr_angle (float): Sun depression angle for Fajr in degrees
+
+        Returns:
+            SunsetTable: The computed table
+        """
+        logger.debug(f"Computing sunset table for {location.lat}, {location.lng} from {start} ({days} days)")
+        epoch_days = solar_position.to_epoch_days(start) + np.arange(days)
+        fajr = solar_position.sun_event_utc(epoch_days, location.lat, location.lng,
+                                            90.0 + fajr_angle, rising=True)
+        sunrise = solar_position.sunrise_utc(epoch_days, location.lat, location.lng)
+        sunset = solar_position.sunset_utc(epoch_days, location.lat, location.lng)
+        return cls(location, start, fajr, sunrise, sunset)
+
+    @classmethod
+    def for_year(cls, location: Location, year: int, fajr_angle: float = FAJR_ANGLE) -> "SunsetTable":
+        """Compute the table for every day (365/366) of a calendar year"""
+        start = date(year, 1, 1)
+        return cls.for_range(location, start, (date(year + 1, 1, 1) - start).days, fajr_angle)
+
+    @property
+    def end(self) -> date:
+        """Last day covered by the table"""
+        return self.start + timedelta(days=len(self) - 1)
+
+    def __len__(self) -> int:
+        return len(self.sunset_epoch)
+
+    def __contains__(self, day: date) -> bool:
+        return 0 <= day.toordinal() - self._start_ordinal < len(self)
+
+    def index(self, day: date) -> int:
+        """Array index for a day, raises KeyError if the table doesn't cover it"""
+        i = day.toordinal() - self._start_ordinal
+        if not 0 <= i < len(self):
+            raise KeyError(f"{day} is outside table range {self.start}..{self.end}")
+        return i
+
+    def local_epoch(self, event: str) -> np.ndarray:
+        """
+        Local wall-clock times of an event for every day, as seconds since 1970-01-01 local
+        Args:
+            event (str): "fajr", "sunrise" or "sunset"
+
+        Returns:
+            np.ndarray: Epoch plus UTC offset, NaN where the event doesn't happen
+        """
+        return getattr(self, f"{event}_epoch") + getattr(self, f"{event}_offset")
+
+    def _to_datetime(self, epochs: np.ndarray, offsets: np.ndarray, i: int) -> Optional[datetime]:
+        seconds = epochs[i]
+        if np.isnan(seconds):
+            return None
+        return timezones.to_local_datetime(float(seconds), float(offsets[i]), self.tz)
+
+    def sunset(self, day: date) -> Optional[datetime]:
+        """Sunset for a day as an aware datetime, None if the sun doesn't set"""
+        return self._to_datetime(self.sunset_epoch, self.sunset_offset, self.index(day))
+
+    def sunrise(self, day: date) -> Optional[datetime]:
+        """Sunrise for a day as an aware datetime, None if the sun doesn't rise"""
+        return self._to_datetime(self.sunrise_epoch, self.sunrise_offset, self.index(day))
+
+    def fajr(self, day: date) -> Optional[datetime]:
+        """Start of Fajr twilight for a day, None if the sun never gets that low"""
+        return self._to_datetime(self.fajr_epoch, self.fajr_offset, self.index(day))
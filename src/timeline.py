@@ -0,0 +1,99 @@
+"""
+Timeline of the upcoming suhoor-end (Fajr) and iftar (Maghrib) instants.
+
+The instants of the next few days are merged into one sorted list when the
+prayer times are computed, so finding the next event at any moment is a
+`bisect` over it and switching from one countdown to the other needs no
+lookup, computation or I/O.
+"""
+
+import bisect
+import numpy as np
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+from src.countdown import IFTAR, SUHOOR
+from src.location_finder import Location
+from src.prayer_times import CalculationMethod, PrayerTimetable
+from src.logger import logger
+
+# Days ahead a timeline covers at least
+TIMELINE_DAYS = 7
+
+class Timeline:
+    """Sorted (epoch, event) pairs, event being IFTAR or SUHOOR"""
+
+    __slots__ = ("epochs", "events", "tz")
+
+    def __init__(self, epochs: List[float], events: List[str], tz=None):
+        self.epochs = epochs
+        self.events = events
+        # Zone of the location the events belong to
+        self.tz = tz
+
+    @classmethod
+    def from_timetable(cls, timetable: PrayerTimetable) -> "Timeline":
+        """
+        Merge a timetable's Fajr and Maghrib instants into one timeline
+        Args:
+            timetable (PrayerTimetable): Prayer times for a run of days
+
+        Returns:
+            Timeline: Events in time order, days without the event left out
+        """
+        fajr = timetable.epochs["fajr"]
+        maghrib = timetable.epochs["maghrib"]
+        epochs = np.concatenate((fajr, maghrib))
+        events = np.array([SUHOOR] * len(fajr) + [IFTAR] * len(maghrib))
+        keep = ~np.isnan(epochs)
+        epochs, events = epochs[keep], events[keep]
+        order = np.argsort(epochs, kind="stable")
+        # Plain lists: bisect on a list of floats beats a NumPy call for single lookups
+        return cls(epochs[order].tolist(), events[order].tolist(), timetable.tz)
+
+    @classmethod
+    def build(cls, location: Location, method: CalculationMethod, days: int = TIMELINE_DAYS,
+              start: Optional[date] = None) -> "Timeline":
+        """
+        Compute the timeline from yesterday (so the night in progress is covered) for `days` days ahead
+        Args:
+            location (Location): Location to compute for
+            method (CalculationMethod): Twilight angles for Fajr
+            days (int): Days after today to cover
+            start (date, optional): Today (defaults to the current date)
+
+        Returns:
+            Timeline: The computed timeline
+        """
+        start = (start or date.today()) - timedelta(days=1)
+        timeline = cls.from_timetable(PrayerTimetable.for_range(location, start, days + 2, method))
+        logger.debug(f"Built countdown timeline with {len(timeline)} events from {start}")
+        return timeline
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    @property
+    def end(self) -> float:
+        """Instant of the last event, -inf for an empty timeline"""
+        return self.epochs[-1] if self.epochs else float("-inf")
+
+    def next_event(self, now: float) -> Optional[Tuple[int, float, str]]:
+        """
+        First event strictly after an instant, found by bisection
+        Args:
+            now (float): Epoch seconds
+
+        Returns:
+            Tuple[int, float, str]: Index, epoch and kind of the event, None if the timeline has run out
+        """
+        i = bisect.bisect_right(self.epochs, now)
+        if i == len(self.epochs):
+            return None
+        return i, self.epochs[i], self.events[i]
+
+    def next_of(self, event: str, now: float) -> Optional[float]:
+        """Epoch of the first event of one kind after an instant, None if there is none"""
+        for i in range(bisect.bisect_right(self.epochs, now), len(self.epochs)):
+            if self.events[i] == event:
+                return self.epochs[i]
+        return None
@@ -0,0 +1,231 @@
+"""
+Streaming suhoor and iftar timetable export (CSV, iCalendar or JSON lines).
+
+The export is a generator pipeline: sites are read one at a time, each site's
+date range is computed a calendar year at a time with PrayerTimetable, and
+every day becomes one row handed straight to the writer. Only one year of one
+site is ever held in memory, so a decade-long export for hundreds of offices
+runs in constant memory.
+"""
+
+import os
+import csv
+import sys
+import json
+import argparse
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from src.location_finder import Location, LocationFinder
+from src.prayer_times import EVENTS, CalculationMethod, PrayerTimetable, get_method
+from src.logger import logger
+
+# Ranges longer than this are most likely a typo in a date
+MAX_EXPORT_DAYS = 100 * 366
+# Default length of an export: a Ramadan month
+DEFAULT_DAYS = 30
+# (location, day, {event: local time or None})
+Row = Tuple[Location, date, Dict[str, Optional[datetime]]]
+
+def iter_sites(path: str) -> Iterator[Location]:
+    """
+    Read sites from a CSV file with a header row of city, lat, lng and optionally timezone and country
+    (a missing timezone is looked up from the coordinates)
+    Args:
+        path (str): CSV file
+
+    Returns:
+        Iterator[Location]: One location per data row, read lazily
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, record in enumerate(csv.DictReader(f), start=2):
+            try:
+                yield Location(lat=float(record["lat"]), lng=float(record["lng"]),
+                               city=record.get("city") or "Unknown", country=record.get("country") or "Unknown",
+                               timezone=record.get("timezone") or "")
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping invalid site on line {line} of {path}: {e}")
+
+def iter_chunks(start: date, end: date) -> Iterator[Tuple[date, int]]:
+    """Split start..end (inclusive) into (first day, day count) pieces that don't cross New Year"""
+    while start <= end:
+        last = min(end, date(start.year, 12, 31))
+        yield start, (last - start).days + 1
+        start = last + timedelta(days=1)
+
+def iter_rows(locations: Iterable[Location], start: date, end: date,
+              method: CalculationMethod) -> Iterator[Row]:
+    """
+    Prayer times of every site and day, computed a year per site at a time
+    Args:
+        locations (Iterable[Location]): Sites, consumed lazily
+        start (date): First day
+        end (date): Last day (inclusive)
+        method (CalculationMethod): Twilight angles for Fajr and Isha
+
+    Returns:
+        Iterator[Row]: Rows ordered by site, then day
+    """
+    for location in locations:
+        for chunk_start, days in iter_chunks(start, end):
+            timetable = PrayerTimetable.for_range(location, chunk_start, days, method)
+            for offset in range(days):
+                day = chunk_start + timedelta(days=offset)
+                yield location, day, timetable.times(day)
+
+def _clock(value: Optional[datetime]) -> str:
+    return value.strftime("%H:%M") if value else ""
+
+def write_csv(rows: Iterable[Row], out: TextIO):
+    """One line per site and day, local times as HH:MM"""
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(["city", "date", *EVENTS, "timezone"])
+    for location, day, times in rows:
+        writer.writerow([location.city, day.isoformat(), *(_clock(times[event]) for event in EVENTS),
+                         location.timezone])
+
+def write_jsonl(rows: Iterable[Row], out: TextIO):
+    """One JSON object per site and day, times as ISO 8601 with their UTC offset"""
+    for location, day, times in rows:
+        record = {"city": location.city, "lat": location.lat, "lng": location.lng, "date": day.isoformat()}
+        record.update({event: value.isoformat(timespec="seconds") if value else None
+                       for event, value in times.items()})
+        out.write(json.dumps(record) + "\n")
+
+def _ics_text(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def _ics_time(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+# Calendar entries written per day: (event, summary)
+ICS_EVENTS = (("fajr", "Suhoor ends"), ("maghrib", "Iftar"))
+# RFC 5545 content lines are folded after this many octets
+ICS_LINE_OCTETS = 75
+
+def _ics_line(name: str, value: str) -> str:
+    """
+    A content line, folded onto continuation lines (CRLF and a space) at 75 octets
+    Args:
+        name (str): Property name
+        value (str): Property value, already escaped
+
+    Returns:
+        str: The line with its CRLF ending; multi-byte characters are never split
+    """
+    line = f"{name}:{value}"
+    if len(line.encode("utf-8")) <= ICS_LINE_OCTETS:
+        return line + "\r\n"
+    parts = []
+    current = ""
+    size = 0
+    # The space that starts a continuation line counts towards its 75 octets
+    limit = ICS_LINE_OCTETS
+    for char in line:
+        octets = len(char.encode("utf-8"))
+        if size + octets > limit:
+            parts.append(current)
+            current, size, limit = "", 0, ICS_LINE_OCTETS - 1
+        current += char
+        size += octets
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+def write_ics(rows: Iterable[Row], out: TextIO):
+    """An iCalendar file with a suhoor-end and an iftar event per site and day, in UTC"""
+    stamp = _ics_time(datetime.now(timezone.utc))
+    out.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Iftar Clock//Timetable//EN\r\n"
+              "CALSCALE:GREGORIAN\r\n")
+    for location, day, times in rows:
+        for event, summary in ICS_EVENTS:
+            value = times[event]
+            if value is None:
+                continue
+            out.write("".join((
+                "BEGIN:VEVENT\r\n",
+                _ics_line("UID", f"{day:%Y%m%d}-{event}-{location.lat:.4f}-{location.lng:.4f}@iftar-clock"),
+                _ics_line("DTSTAMP", stamp),
+                _ics_line("DTSTART", _ics_time(value)),
+                _ics_line("SUMMARY", _ics_text(f"{summary} ({location.city})")),
+                "END:VEVENT\r\n",
+            )))
+    out.write("END:VCALENDAR\r\n")
+
+WRITERS = {"csv": write_csv, "ics": write_ics, "jsonl": write_jsonl}
+
+def _default_location() -> Optional[Location]:
+    """The location the clock itself would use (pinned, cached or looked up)"""
+    return LocationFinder().get_current_location()
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export a suhoor and iftar timetable")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, default=None,
+                        help="first day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=None,
+                        help=f"last day, YYYY-MM-DD (default: {DEFAULT_DAYS} days from the first)")
+    parser.add_argument("--format", choices=sorted(WRITERS),
+                        help="output format (default: from the output file extension, else csv)")
+    parser.add_argument("--output", "-o", help="output file (default: standard output)")
+    parser.add_argument("--method", help="calculation method, e.g. MWL, ISNA, Makkah, Karachi "
+                                         "(default: prayer_method from the config)")
+    parser.add_argument("--lat", type=float, help="latitude of a single site")
+    parser.add_argument("--lng", type=float, help="longitude of a single site")
+    parser.add_argument("--tz", default="", help="IANA timezone of the site given by --lat/--lng "
+                                                 "(default: looked up from the coordinates)")
+    parser.add_argument("--city", help="name of the site given by --lat/--lng; on its own, a city to "
+                                       "look up offline, e.g. \"Karachi\" or \"London, CA\"")
+    parser.add_argument("--sites", help="CSV file of sites (city, lat, lng, timezone) to export")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point
+    Args:
+        argv (List[str], optional): Arguments (defaults to sys.argv[1:])
+
+    Returns:
+        int: Exit status
+    """
+    args = _parse_args(argv)
+    start = args.start or date.today()
+    end = args.end or start + timedelta(days=DEFAULT_DAYS - 1)
+    if not 0 <= (end - start).days < MAX_EXPORT_DAYS:
+        print(f"The range must run forwards and cover at most {MAX_EXPORT_DAYS} days", file=sys.stderr)
+        return 2
+
+    if args.sites:
+        locations: Iterable[Location] = iter_sites(args.sites)
+    elif args.lat is not None and args.lng is not None:
+        locations = [Location(lat=args.lat, lng=args.lng, city=args.city or "Unknown", timezone=args.tz)]
+    elif args.city:
+        from src.city_index import get_city_index
+        matches = get_city_index().search(args.city, limit=1)
+        if not matches:
+            print(f"No city matching {args.city!r}", file=sys.stderr)
+            return 1
+        locations = [matches[0].to_location()]
+    else:
+        location = _default_location()
+        if location is None:
+            print("Could not determine the location, pass --lat and --lng or --sites", file=sys.stderr)
+            return 1
+        locations = [location]
+
+    if args.method is None:
+        from src.config import load_config
+        args.method = load_config().get("prayer_method")
+    method = get_method(args.method)
+
+    fmt = args.format
+    if fmt is None and args.output:
+        fmt = os.path.splitext(args.output)[1].lstrip(".").lower()
+    writer = WRITERS.get(fmt, write_csv)
+
+    rows = iter_rows(locations, start, end, method)
+    logger.info(f"Exporting {method.name} timetable from {start} to {end} as {writer.__name__[6:]}")
+    if args.output:
+        # iCalendar lines end in CRLF already, don't let the platform translate them
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            writer(rows, out)
+    else:
+        writer(rows, sys.stdout)
+    return 0
@@ -0,0 +1,131 @@
+"""
+Offline coordinate-to-timezone lookup.
+
+The bundled `timezones.bin` is a grid of the world's timezone boundaries:
+0.05 degree latitude bands, each stored as runs of (first column, zone) with
+columns 1/160 of a degree of longitude wide. The file is memory-mapped on the
+first lookup, and a lookup is a bisect over the runs of one band, so it takes
+a couple of microseconds and only the pages touched are ever read.
+
+Layout (little endian):
+    header   magic b"IFTZ", version u16, zone count u16, row count u16,
+             columns per degree u16, run count u32, zone names length u32
+    names    zone names separated by NUL, padded to a multiple of 4 bytes
+    rows     (row count + 1) x u32, index of each band's first run
+    starts   run count x u16, first column of each run
+    zones    run count x u16, zone of each run
+"""
+
+import os
+import sys
+import math
+import mmap
+import bisect
+import struct
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+from src.logger import logger
+
+TIMEZONES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "timezones.bin")
+MAGIC = b"IFTZ"
+INDEX_VERSION = 1
+HEADER = struct.Struct("<4sHHHHII")
+
+# A band as (first column, zone name) runs in column order
+Band = Sequence[Tuple[int, str]]
+
+class TimezoneIndex:
+    """Memory-mapped timezone grid, see the module docstring for the layout"""
+
+    def __init__(self, path: str = TIMEZONES_FILE):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, zone_count, self.rows, self.columns_per_degree, run_count, names_size = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != INDEX_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} timezone index")
+        offset = HEADER.size
+        self.zones: List[str] = self._mm[offset:offset + names_size].decode("utf-8").split("\0")[:zone_count]
+        offset += (names_size + 3) & ~3
+        # Typed views straight into the mapping: nothing is copied or parsed up front
+        self._view = view = memoryview(self._mm)
+        self._row_starts = view[offset:offset + (self.rows + 1) * 4].cast("I")
+        offset += (self.rows + 1) * 4
+        self._run_starts = view[offset:offset + run_count * 2].cast("H")
+        offset += run_count * 2
+        self._run_zones = view[offset:offset + run_count * 2].cast("H")
+        logger.debug(f"Mapped timezone index {path} ({len(self.zones)} zones, {run_count} runs)")
+
+    def zone_at(self, lat: float, lng: float) -> Optional[str]:
+        """
+        IANA zone at a coordinate
+        Args:
+            lat (float): Latitude in degrees
+            lng (float): Longitude in degrees
+
+        Returns:
+            str: Zone name such as "Asia/Karachi" ("Etc/GMT+N" at sea), None if unknown
+        """
+        if not (math.isfinite(lat) and math.isfinite(lng) and -90.0 <= lat <= 90.0):
+            return None
+        row = min(self.rows - 1, int((lat + 90.0) * self.rows / 180.0))
+        column = int(((lng + 180.0) % 360.0) * self.columns_per_degree)
+        lo, hi = self._row_starts[row], self._row_starts[row + 1]
+        i = bisect.bisect_right(self._run_starts, column, lo, hi) - 1
+        return self.zones[self._run_zones[max(i, lo)]] or None
+
+    def close(self):
+        self._row_starts.release()
+        self._run_starts.release()
+        self._run_zones.release()
+        self._view.release()
+        self._mm.close()
+
+    @staticmethod
+    def write(path: str, bands: Sequence[Band], columns_per_degree: int):
+        """
+        Write an index file
+        Args:
+            path (str): Output file
+            bands (Sequence[Band]): Runs of each latitude band from the south pole up,
+                the first run of a band starting at column 0
+            columns_per_degree (int): Columns per degree of longitude
+        """
+        zones = sorted({zone for band in bands for _, zone in band})
+        zone_ids = {zone: i for i, zone in enumerate(zones)}
+        row_starts, run_starts, run_zones = [0], [], []
+        for band in bands:
+            for column, zone in band:
+                run_starts.append(column)
+                run_zones.append(zone_ids[zone])
+            row_starts.append(len(run_starts))
+        names = "\0".join(zones).encode("utf-8")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, INDEX_VERSION, len(zones), len(bands), columns_per_degree,
+                                len(run_starts), len(names)))
+            f.write(names + b"\0" * (-len(names) % 4))
+            f.write(struct.pack(f"<{len(row_starts)}I", *row_starts))
+            f.write(struct.pack(f"<{len(run_starts)}H", *run_starts))
+            f.write(struct.pack(f"<{len(run_zones)}H", *run_zones))
+        os.replace(tmp_path, path)
+
+@lru_cache(maxsize=1)
+def get_timezone_index() -> Optional[TimezoneIndex]:
+    """The bundled index, mapped on first use; None if it can't be read"""
+    if sys.byteorder != "little":
+        # The views read the file's little-endian integers in native order
+        logger.warning("Timezone index is not supported on big-endian machines")
+        return None
+    try:
+        return TimezoneIndex()
+    except (OSError, ValueError) as e:
+        logger.error(f"Cannot load the timezone index: {e}")
+        return None
+
+def zone_at(lat: float, lng: float) -> Optional[str]:
+    """IANA zone at a coordinate from the bundled index, None if unavailable"""
+    index = get_timezone_index()
+    return index.zone_at(lat, lng) if index is not None else None
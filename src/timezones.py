@@ -0,0 +1,145 @@
+"""
+Timezone layer: zones resolved once, offsets looked up from cached transition tables.
+
+Zones come from the standard `zoneinfo` module. Each (zone, year) pair gets a
+small table of the UTC instants at which the zone's offset changes (DST starts
+and ends), so the local time of a whole year of sunsets is one `searchsorted`
+and an add rather than a `tzinfo` call per instant.
+"""
+
+import os
+import time
+import calendar
+from datetime import datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from src.logger import logger
+
+if TYPE_CHECKING:
+    # Only needed for the vectorized paths, kept off the startup import chain
+    import numpy as np
+
+# Offsets are sampled this far apart when looking for transitions; zones never
+# change offset twice within this interval
+SAMPLE_STEP = 6 * 3600
+_EPOCH = datetime(1970, 1, 1)
+
+@lru_cache(maxsize=1)
+def _system_zone() -> Optional[ZoneInfo]:
+    """The system's IANA zone with its DST rules, None if it can't be determined"""
+    name = os.environ.get("TZ")
+    if name:
+        try:
+            return ZoneInfo(name.lstrip(":"))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    try:
+        with open("/etc/localtime", "rb") as f:
+            return ZoneInfo.from_file(f, key="localtime")
+    except (OSError, ValueError):
+        return None
+
+def local_zone() -> tzinfo:
+    """The system's zone with its DST rules, else its offset right now"""
+    zone = _system_zone()
+    if zone is not None:
+        return zone
+    # Windows: no zone database name is exposed. The offset has no DST rules,
+    # so it is read again on every call rather than cached
+    return datetime.now().astimezone().tzinfo
+
+@lru_cache(maxsize=32)
+def _named_zone(name: str) -> Optional[ZoneInfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        logger.warning(f"Unknown timezone {name}, using local time: {e}")
+        return None
+
+def get_zone(name: Optional[str]) -> tzinfo:
+    """
+    Resolve a zone name once
+    Args:
+        name (str, optional): IANA zone name such as "Asia/Karachi"
+
+    Returns:
+        tzinfo: The zone, or the local zone if the name is empty or unknown
+    """
+    zone = _named_zone(name) if name else None
+    return zone if zone is not None else local_zone()
+
+def _offset_at(zone: tzinfo, epoch: int) -> int:
+    return int(datetime.fromtimestamp(epoch, zone).utcoffset().total_seconds())
+
+@lru_cache(maxsize=64)
+def transitions(zone: tzinfo, year: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Offset changes of a zone during a calendar year (UTC)
+    Args:
+        zone (tzinfo): The zone
+        year (int): Calendar year
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Epoch seconds from which each offset applies
+        (the first is January 1st) and the offsets in seconds
+    """
+    import numpy as np
+    start = calendar.timegm((year, 1, 1, 0, 0, 0))
+    end = calendar.timegm((year + 1, 1, 1, 0, 0, 0))
+    starts, offsets = [start], [_offset_at(zone, start)]
+    previous = start
+    for sample in range(start + SAMPLE_STEP, end + SAMPLE_STEP, SAMPLE_STEP):
+        sample = min(sample, end - 1)
+        offset = _offset_at(zone, sample)
+        if offset != offsets[-1]:
+            # Narrow the change down to the second
+            lo, hi = previous, sample
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if _offset_at(zone, mid) == offsets[-1]:
+                    lo = mid
+                else:
+                    hi = mid
+            starts.append(hi)
+            offsets.append(offset)
+        previous = sample
+    return np.array(starts, dtype=np.float64), np.array(offsets, dtype=np.float64)
+
+def utc_offsets(zone: tzinfo, epochs: "np.ndarray") -> "np.ndarray":
+    """
+    UTC offsets in effect at many instants, vectorized
+    Args:
+        zone (tzinfo): The zone
+        epochs (np.ndarray): Epoch seconds, NaN allowed
+
+    Returns:
+        np.ndarray: Offsets in seconds (0 where the instant is NaN)
+    """
+    import numpy as np
+    epochs = np.asarray(epochs, dtype=np.float64)
+    finite = epochs[np.isfinite(epochs)]
+    if finite.size == 0:
+        return np.zeros(epochs.shape)
+    first = time.gmtime(finite.min()).tm_year
+    last = time.gmtime(finite.max()).tm_year
+    tables = [transitions(zone, year) for year in range(first, last + 1)]
+    starts = np.concatenate([table[0] for table in tables])
+    offsets = np.concatenate([table[1] for table in tables])
+    index = np.searchsorted(starts, np.nan_to_num(epochs, nan=starts[0]), side="right") - 1
+    result = offsets[np.clip(index, 0, None)]
+    result[~np.isfinite(epochs)] = 0.0
+    return result
+
+def to_local_datetime(epoch: float, offset: float, zone: tzinfo) -> datetime:
+    """Aware datetime for an instant whose UTC offset is already known, built from wall time"""
+    local = _EPOCH + timedelta(seconds=epoch + offset)
+    dt = local.replace(tzinfo=zone)
+    if dt.utcoffset() != timedelta(seconds=offset):
+        # Wall time repeated when clocks go back: the second occurrence
+        dt = dt.replace(fold=1)
+    return dt
+
+def now_local() -> datetime:
+    """Current time in the local zone"""
+    return datetime.now(local_zone())
@@ -1,17 +1,58 @@
 import os
 import sys
 import threading
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 import pystray
 from pystray import MenuItem as item
 import tkinter as tk
 from src.logger import logger
 
+ICON_SIZE = 64
+FONT_SIZE = 20
+# Rendered icons kept around; the countdown only shows one string per minute
+ICON_CACHE_SIZE = 32
+
+@lru_cache(maxsize=None)
+def load_font(size: int = FONT_SIZE):
+    """Load the icon font once, falling back to PIL's built-in font"""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except OSError:
+        logger.debug("arial.ttf not available, using the default font")
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=1)
+def icon_background() -> Image.Image:
+    """Transparent square with the black circle every icon is drawn on"""
+    image = Image.new('RGBA', (ICON_SIZE, ICON_SIZE), color=(0, 0, 0, 0))
+    ImageDraw.Draw(image).ellipse((0, 0, ICON_SIZE, ICON_SIZE), fill=(0, 0, 0, 255))
+    return image
+
+@lru_cache(maxsize=ICON_CACHE_SIZE)
+def render_icon(time_text: str) -> Image.Image:
+    """
+    Icon image showing a countdown string; repeated strings come from the cache
+    Args:
+        time_text (str): Text to draw, e.g. "05:42"
+
+    Returns:
+        Image.Image: The rendered icon, shared between callers so it must not be modified
+    """
+    image = icon_background().copy()
+    draw = ImageDraw.Draw(image)
+    font = load_font()
+    text_width = draw.textlength(time_text, font=font)
+    draw.text(((ICON_SIZE - text_width) / 2, 20), time_text, font=font, fill=(0, 255, 0, 255))
+    return image
+
 class TrayIconApp:
     def __init__(self, app_instance):
         self.app = app_instance
         self.root = self.app.root
         self.time_var = self.app.time_var
+        # Text currently shown in the tray, the icon is only replaced when it changes
+        self.shown_text = None
         
         # Create the icon
         self.create_icon()
@@ -41,46 +82,23 @@ class TrayIconApp:
         # Create the tray icon
         self.tray_icon = pystray.Icon("iftar_clock", self.icon, "Iftar Clock", self.menu)
         
-        # Update the icon every 30 seconds
-        self.root.after(30000, self.update_icon)
+        # The clock's scheduler sets time_var when the displayed minute changes;
+        # follow it instead of sampling on a timer of our own
+        self.time_var.trace_add("write", self.update_icon)
     
     def create_time_icon(self, time_text):
         """Create an icon image with the current countdown time"""
-        # Create a blank image for icon (64x64 with transparent background)
-        image = Image.new('RGBA', (64, 64), color=(0, 0, 0, 0))
-        draw = ImageDraw.Draw(image)
-        
-        # Add a circle background
-        draw.ellipse((0, 0, 64, 64), fill=(0, 0, 0, 255))
-        
-        # Try to load a font
-        try:
-            font = ImageFont.truetype("arial.ttf", 20)
-        except:
-            font = ImageFont.load_default()
-        
-        # Draw the time text
-        text_width = draw.textlength(time_text, font=font)
-        text_x = (64 - text_width) / 2
-        draw.text((text_x, 20), time_text, font=font, fill=(0, 255, 0, 255))
-        
-        return image
+        self.shown_text = time_text
+        return render_icon(time_text)
     
-    def update_icon(self):
-        """Update the tray icon with the current time"""
+    def update_icon(self, *args):
+        """Update the tray icon if the displayed time changed"""
         try:
-            # Get the current countdown time
             time_text = self.time_var.get()
-            
-            # Update the icon
-            new_icon = self.create_time_icon(time_text)
-            self.tray_icon.icon = new_icon
-            
-            logger.debug(f"Updated tray icon with time: {time_text}")
-            
-            # Schedule next update
-            if self.root.winfo_exists():  # Check if root still exists
-                self.root.after(30000, self.update_icon)
+            if time_text == self.shown_text:
+                return
+            self.tray_icon.icon = self.create_time_icon(time_text)
+            logger.debug("Updated tray icon with time: %s", time_text)
         except Exception as e:
             logger.error(f"Error updating tray icon: {e}")
     
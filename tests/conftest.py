@@ -0,0 +1,40 @@
+"""
+Fixtures for the correctness tests. Run from the project root:
+python -m pytest tests
+
+Tests run against a throwaway home directory and never touch the network:
+sunsets and prayer times are computed locally from the pinned test location.
+"""
+
+import os
+import logging
+import tempfile
+
+# Before anything from src is imported: config, caches and logs go here
+HOME = tempfile.mkdtemp(prefix="iftar-tests-")
+os.environ["HOME"] = HOME
+os.environ["USERPROFILE"] = HOME
+
+import pytest
+from src.location_finder import Location
+from src.sunset_calculator import SunsetCalculator
+
+LAHORE = Location(lat=31.5204, lng=74.3587, city="Lahore", country="Pakistan", timezone="Asia/Karachi")
+
+@pytest.fixture(scope="session", autouse=True)
+def quiet_logs():
+    logging.getLogger("iftar_clock").setLevel(logging.WARNING)
+
+@pytest.fixture
+def location():
+    return LAHORE
+
+@pytest.fixture
+def calculator(location):
+    """Calculator on the table path with the prefetch window computed, no network involved"""
+    calculator = SunsetCalculator()
+    calculator.on_refresh_needed = lambda: None
+    calculator.build_table(location)
+    calculator.prefetch()
+    calculator._arm_countdown()
+    return calculator
@@ -0,0 +1,58 @@
+"""Offline city search and nearest-city lookup"""
+
+import numpy as np
+import pytest
+from src.city_index import EARTH_RADIUS_KM, CityIndex, fold, get_city_index
+
+@pytest.fixture(scope="module")
+def index():
+    return get_city_index()
+
+def test_fold():
+    assert fold("São Paulo") == "sao paulo"
+    assert fold("  Rawalpindi-Cantt. ") == "rawalpindi cantt"
+
+def test_prefix_search_ranks_by_population(index):
+    results = index.search("lah")
+    assert results[0].label() == "Lahore, Pakistan"
+    populations = [city.population for city in results if city.name.lower().startswith("lah")]
+    assert populations == sorted(populations, reverse=True)
+
+def test_country_filter(index):
+    assert index.search("London")[0].country_code == "GB"
+    assert index.search("London, CA")[0].country_code == "CA"
+    assert index.search("Hyderabad, Pakistan")[0].country_code == "PK"
+    assert all(city.country_code == "IN" for city in index.search("Hyderabad, IN", limit=5))
+
+def test_fuzzy_search_finds_typos(index):
+    assert index.search("Karachy")[0].name == "Karachi"
+    assert index.search("") == []
+
+def test_prepare_builds_fuzzy_index_once(index):
+    assert index.prepare() is index
+    trigrams = index._trigram_index
+    assert trigrams is not None
+    index.search("Londn, CA")
+    assert index._trigram_index is trigrams
+
+def test_city_to_location(index):
+    location = index.search("Karachi")[0].to_location()
+    assert (location.city, location.country, location.timezone) == ("Karachi", "Pakistan", "Asia/Karachi")
+
+def test_nearest_matches_brute_force(index: CityIndex):
+    rng = np.random.default_rng(7)
+    lat = np.radians(index.lat)
+    lng = np.radians(index.lng)
+    for query_lat, query_lng in zip(rng.uniform(-89, 89, 300), rng.uniform(-180, 180, 300)):
+        q_lat, q_lng = np.radians(query_lat), np.radians(query_lng)
+        # Haversine distance to every city
+        a = np.sin((lat - q_lat) / 2) ** 2 + np.cos(q_lat) * np.cos(lat) * np.sin((lng - q_lng) / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        city, km = index.nearest(query_lat, query_lng)
+        assert km == pytest.approx(distances.min(), abs=1e-3)
+        assert city == index.city(int(np.argmin(distances)))
+
+def test_nearest_across_the_antimeridian(index):
+    # Suva, Fiji lies at 178.4 E; approached from the west of the date line
+    city, km = index.nearest(-18.14, -179.99)
+    assert city.country_code == "FJ" and km < 400
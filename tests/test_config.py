@@ -0,0 +1,24 @@
+"""Config values the calculator parses, including invalid ones"""
+
+import pytest
+from datetime import time
+from src.config import DEFAULTS
+from src.sunset_calculator import parse_prefetch_days, parse_switchover
+
+@pytest.mark.parametrize("value,expected", [(5, 5), ("3", 3), (0, 1), (-2, 1),
+                                            ("two", DEFAULTS["prefetch_days"]), (None, DEFAULTS["prefetch_days"]),
+                                            ([2], DEFAULTS["prefetch_days"])])
+def test_parse_prefetch_days(value, expected):
+    assert parse_prefetch_days(value) == expected
+
+@pytest.mark.parametrize("value,expected", [("19:30", time(19, 30)), ("7pm", time(20, 0)), (None, time(20, 0))])
+def test_parse_switchover(value, expected):
+    assert parse_switchover(value) == expected
+
+def test_calculator_starts_with_invalid_values(monkeypatch):
+    from src import sunset_calculator
+    config = dict(DEFAULTS, prefetch_days="two", switchover_time=None)
+    monkeypatch.setattr(sunset_calculator, "load_config", lambda: config)
+    calculator = sunset_calculator.SunsetCalculator()
+    assert calculator.prefetch_days == DEFAULTS["prefetch_days"]
+    assert calculator.switchover == time(20, 0)
@@ -0,0 +1,74 @@
+"""Countdown target selection and display text"""
+
+import re
+import pytest
+from datetime import date, datetime, timedelta
+from src import sunset_calculator
+from src.countdown import SUHOOR, CountdownState, CountdownText
+from src.timezones import get_zone
+
+ZONE = get_zone("Asia/Karachi")
+DAY = date(2026, 3, 1)
+SUNSETS = {DAY: datetime(2026, 3, 1, 18, 0, tzinfo=ZONE), DAY + timedelta(days=1): datetime(2026, 3, 2, 18, 1, tzinfo=ZONE)}
+
+def at(hour, minute=0):
+    return datetime(2026, 3, 1, hour, minute, tzinfo=ZONE)
+
+def test_render():
+    text = CountdownText()
+    assert text.render(None) == "--:--"
+    assert text.render(3 * 3600 + 5 * 60 + 59) == "03:05"
+    assert text.render(3 * 3600 + 5 * 60 + 1) == "03:05"
+    assert text.render(59) == "00:00"
+    assert text.render(3600, tomorrow=True) == "T 01:00"
+
+def test_state_counts_down_to_target():
+    state = CountdownState()
+    assert state.expired() and state.remaining_seconds() is None
+    now = datetime.now().timestamp()
+    state.arm(now + 100, now + 100, event=SUHOOR)
+    assert not state.expired()
+    assert state.remaining_seconds() == pytest.approx(100, abs=0.5)
+    assert state.label() == "Suhoor ends in"
+
+def test_before_sunset_counts_to_today(calculator):
+    state, sunset = calculator._countdown_for(at(15), SUNSETS.get)
+    assert sunset == SUNSETS[DAY]
+    assert state.target_epoch == state.switch_epoch == SUNSETS[DAY].timestamp()
+    assert not state.is_tomorrow and state.label() == "Iftar in"
+
+def test_between_sunset_and_switchover_has_no_target(calculator):
+    # Default switchover is 20:00
+    state, _ = calculator._countdown_for(at(19), SUNSETS.get)
+    assert state.target_epoch is None
+    assert state.switch_epoch == at(20).timestamp()
+
+def test_after_switchover_counts_to_tomorrow(calculator):
+    state, sunset = calculator._countdown_for(at(21), SUNSETS.get)
+    assert sunset == SUNSETS[DAY + timedelta(days=1)]
+    assert state.is_tomorrow and state.label() == "Tomorrow's Iftar in"
+    # At midnight tomorrow's sunset becomes today's
+    assert state.switch_epoch == datetime(2026, 3, 2, tzinfo=ZONE).timestamp()
+
+def test_calculator_display_follows_countdown(calculator):
+    text = calculator.format_remaining_time()
+    if calculator.remaining_seconds() is None:
+        assert text == "--:--"
+    else:
+        assert re.fullmatch(r"(T )?\d\d:\d\d", text)
+    assert calculator.next_display_change() <= calculator.countdown.switch_epoch
+
+@pytest.fixture
+def cold_calculator(calculator, location, monkeypatch):
+    """A calculator as at startup: no table yet, today's and tomorrow's sunsets in the cache"""
+    calculator.table = None
+    calculator.cache.put_many(location, SUNSETS.items())
+    monkeypatch.setattr(calculator.location_finder, "get_last_known_location", lambda: location)
+    return calculator
+
+@pytest.mark.parametrize("hour,expected", [(15, SUNSETS[DAY]), (19, None), (21, SUNSETS[DAY + timedelta(days=1)])])
+def test_first_frame_only_counts_down_to_future_sunsets(cold_calculator, monkeypatch, hour, expected):
+    monkeypatch.setattr(sunset_calculator, "now_local", lambda: at(hour))
+    assert cold_calculator.load_first_frame() is (expected is not None)
+    if expected is not None:
+        assert cold_calculator.sunset == expected
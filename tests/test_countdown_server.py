@@ -0,0 +1,113 @@
+"""Countdown server routing and HTTP/1.1 connection handling"""
+
+import json
+import time
+import asyncio
+import threading
+import pytest
+from datetime import date, timedelta
+from src import countdown_server
+from src.countdown_server import MAX_RANGE_DAYS, CountdownServer
+
+@pytest.fixture
+def server(calculator):
+    server = CountdownServer(calculator, port=0)
+    server._rebuild()
+    return server
+
+def get(server, target):
+    status, body = server.route(target)
+    return status, json.loads(body)
+
+def test_countdown(server, calculator):
+    status, body = get(server, "/countdown")
+    assert status == 200
+    assert body["display"] == calculator.format_remaining_time()
+    assert body["event"] == "iftar"
+    assert body["switch_at"] == calculator.countdown.switch_epoch
+
+def test_countdown_before_data_is_loaded(calculator):
+    calculator.table = None
+    assert CountdownServer(calculator).route("/countdown")[0] == 503
+
+def test_sunset_for_one_day(server, calculator):
+    day = calculator.table.start + timedelta(days=40)
+    status, body = get(server, f"/sunset?date={day}")
+    assert status == 200
+    assert body["date"] == day.isoformat()
+    assert body["sunset"] == calculator.table.sunset(day).isoformat()
+    assert get(server, "/sunset?date=01-02-2026")[0] == 400
+    assert get(server, "/sunset?date=1999-01-01")[0] == 404
+
+def test_sunset_range(server, calculator):
+    start = calculator.table.start
+    status, body = get(server, f"/sunsets?from={start}&to={start + timedelta(days=6)}")
+    assert status == 200
+    assert [record["date"] for record in body["sunsets"]] == \
+        [(start + timedelta(days=i)).isoformat() for i in range(7)]
+    assert body["location"]["city"] == calculator.table.location.city
+    assert get(server, f"/sunsets?from={start}&to={start - timedelta(days=1)}")[0] == 400
+    assert get(server, f"/sunsets?from={start}&to={start + timedelta(days=MAX_RANGE_DAYS)}")[0] == 400
+    assert get(server, "/sunsets?from=2026-01-01")[0] == 400
+
+def test_unknown_path(server):
+    assert get(server, "/nope") == (404, {"error": "unknown path /nope"})
+
+async def exchange(server, request: bytes) -> bytes:
+    """Send raw bytes on one connection and read until the server closes it"""
+    listener = await asyncio.start_server(server._handle, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+    return response
+
+def test_keep_alive_serves_several_requests(server):
+    today = date.today()
+    response = asyncio.run(exchange(server, b"GET /countdown HTTP/1.1\r\nHost: x\r\n\r\n"
+                                            b"GET /sunset?date=%s HTTP/1.1\r\nConnection: close\r\n\r\n"
+                                            % today.isoformat().encode()))
+    assert response.count(b"HTTP/1.1 200 OK") == 2
+    assert response.rstrip().endswith(b"}")
+    assert b"Connection: keep-alive" in response and b"Connection: close" in response
+
+def test_malformed_request_line_closes(server):
+    response = asyncio.run(exchange(server, b"HELLO\r\n\r\nGET /countdown HTTP/1.1\r\n\r\n"))
+    assert response.startswith(b"HTTP/1.1 400 Bad Request") and response.count(b"HTTP/1.1") == 1
+
+def test_request_with_body_closes_connection(server):
+    # The body must not be read as a second request on the same connection
+    response = asyncio.run(exchange(server, b"POST /countdown HTTP/1.1\r\nContent-Length: 22\r\n\r\n"
+                                            b"GET /nope HTTP/1.1\r\n\r\n"))
+    assert response.startswith(b"HTTP/1.1 405 Method Not Allowed")
+    assert b"Connection: close" in response and response.count(b"HTTP/1.1") == 1
+
+def test_get_with_body_closes_connection(server):
+    response = asyncio.run(exchange(server, b"GET /countdown HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+                                            b"0\r\n\r\n"))
+    assert response.startswith(b"HTTP/1.1 200 OK") and response.count(b"HTTP/1.1") == 1
+
+def test_empty_body_keeps_connection_alive(server):
+    response = asyncio.run(exchange(server, b"GET /countdown HTTP/1.1\r\nContent-Length: 0\r\n\r\n"
+                                            b"GET /countdown HTTP/1.1\r\nConnection: close\r\n\r\n"))
+    assert response.count(b"HTTP/1.1 200 OK") == 2
+
+def test_stalled_headers_close_connection(server, monkeypatch):
+    monkeypatch.setattr(countdown_server, "HEADER_TIMEOUT", 0.2)
+    # Request line, one header, then nothing: closed without a response
+    assert asyncio.run(exchange(server, b"GET /countdown HTTP/1.1\r\nHost: x\r\n")) == b""
+
+def test_countdown_answered_during_refresh(server, calculator):
+    calculator.countdown.arm(None, time.time() - 1)
+    with calculator.lock:
+        # Held as by a refresh on the executor: served without waiting or re-arming
+        done = []
+        thread = threading.Thread(target=lambda: done.append(server.route("/countdown")))
+        thread.start()
+        thread.join(5)
+        assert done and done[0][0] == 200
+        assert calculator.countdown.expired()
+    assert get(server, "/countdown")[0] == 200
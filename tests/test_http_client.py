@@ -0,0 +1,108 @@
+"""HttpClient caching and conditional revalidation against a local server"""
+
+import os
+import threading
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src import http_client
+from src.http_client import HttpClient
+
+class ValidatorHandler(BaseHTTPRequestHandler):
+    """Serves one document with validators spelled as the test asks, answering 304 when they match"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, don't let delayed ACKs stall keep-alive requests
+    disable_nagle_algorithm = True
+    etag_header = "ETag"
+    modified_header = "Last-Modified"
+    requests_seen = []
+
+    def do_GET(self):
+        ValidatorHandler.requests_seen.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b'{"status": "OK"}'
+        self.send_response(200)
+        self.send_header(self.etag_header, '"v1"')
+        self.send_header(self.modified_header, "Sun, 01 Mar 2026 12:00:00 GMT")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ValidatorHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def server_url(server):
+    ValidatorHandler.requests_seen = []
+    return f"http://127.0.0.1:{server.server_address[1]}/doc"
+
+@pytest.mark.parametrize("etag_header,modified_header", [("ETag", "Last-Modified"), ("etag", "last-modified"),
+                                                         ("ETAG", "LAST-MODIFIED")])
+def test_stale_entry_is_revalidated(server_url, tmp_path, monkeypatch, etag_header, modified_header):
+    monkeypatch.setattr(ValidatorHandler, "etag_header", etag_header)
+    monkeypatch.setattr(ValidatorHandler, "modified_header", modified_header)
+    client = HttpClient(cache_dir=str(tmp_path), retries=0)
+
+    first = client.get(server_url, cache_ttl=60)
+    assert first.status_code == 200 and not first.from_cache
+    assert first.headers == {"ETag": '"v1"', "Last-Modified": "Sun, 01 Mar 2026 12:00:00 GMT"}
+
+    # Fresh: served from the cache without a request
+    assert client.get(server_url, cache_ttl=60).from_cache
+    assert len(ValidatorHandler.requests_seen) == 1
+
+    # Stale: revalidated with a conditional request, the server answers 304
+    now = http_client.clock()
+    monkeypatch.setattr(http_client, "clock", lambda: now + 120)
+    revalidated = client.get(server_url, cache_ttl=60)
+    assert revalidated.from_cache and revalidated.json() == {"status": "OK"}
+    request = ValidatorHandler.requests_seen[-1]
+    assert request["If-None-Match"] == '"v1"'
+    assert request["If-Modified-Since"] == "Sun, 01 Mar 2026 12:00:00 GMT"
+
+@pytest.mark.parametrize("error", [requests.TooManyRedirects("loop"), requests.exceptions.ContentDecodingError("gzip"),
+                                   requests.exceptions.InvalidURL("bad")])
+def test_request_errors_fall_back_to_stale_cache(server_url, tmp_path, monkeypatch, error):
+    client = HttpClient(cache_dir=str(tmp_path), retries=2, backoff=0)
+    assert client.get(server_url, cache_ttl=60).status_code == 200
+    attempts = []
+
+    def fail(*args, **kwargs):
+        attempts.append(args)
+        raise error
+    monkeypatch.setattr(client.session, "get", fail)
+    # Not retried, and served from the stale cache like a network failure
+    now = http_client.clock()
+    monkeypatch.setattr(http_client, "clock", lambda: now + 120)
+    stale = client.get(server_url, cache_ttl=60)
+    assert stale.from_cache and stale.json() == {"status": "OK"}
+    assert len(attempts) == 1
+    # Without a cached copy the call reports failure instead of raising
+    assert client.get(server_url + "?other", cache_ttl=60) is None
+
+def test_cache_is_pruned(server_url, tmp_path, monkeypatch):
+    monkeypatch.setattr(http_client, "CACHE_MAX_ENTRIES", 3)
+    client = HttpClient(cache_dir=str(tmp_path), retries=0)
+    old = tmp_path / "old.json"
+    old.write_text("{}")
+    month_ago = http_client.clock() - http_client.CACHE_MAX_AGE - 1
+    os.utime(old, (month_ago, month_ago))
+    for i in range(5):
+        client.get(server_url, params={"page": i}, cache_ttl=60)
+    kept = sorted(os.listdir(tmp_path))
+    assert len(kept) == 3 and "old.json" not in kept
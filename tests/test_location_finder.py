@@ -0,0 +1,100 @@
+"""Location finder: config parsing, the cached location and API failures, with a fake client"""
+
+import json
+import pytest
+import requests
+from src.config import DEFAULTS
+from src.http_client import HttpResponse
+from src.location_finder import Location, LocationFinder, parse_location_ttl
+
+IPAPI = {"ip": "203.0.113.7", "latitude": 31.5204, "longitude": 74.3587, "city": "Lahore",
+         "country_name": "Pakistan", "timezone": "Asia/Karachi"}
+
+class FakeClient:
+    """Answers each path from a table; a response may also be an exception to raise"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.paths = []
+
+    def get(self, url, timeout=None, **kwargs):
+        path = url.split("ipapi.test", 1)[1]
+        self.paths.append(path)
+        response = self.responses.get(path)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+def ok(body):
+    return HttpResponse(200, body if isinstance(body, str) else json.dumps(body))
+
+@pytest.fixture
+def finder(tmp_path):
+    def make(responses, **config):
+        finder = LocationFinder(api_url="http://ipapi.test", client=FakeClient(responses), config=config)
+        finder.cache_file = str(tmp_path / "location.json")
+        return finder
+    return make
+
+@pytest.mark.parametrize("value,hours", [(24, 24), ("1.5", 1.5), (0, 0), (None, 24), ("abc", 24),
+                                         (-1, 24), (float("inf"), 24), ([], 24)])
+def test_parse_location_ttl(value, hours):
+    assert parse_location_ttl(value) == hours * 3600
+
+@pytest.mark.parametrize("value", [None, "abc"])
+def test_invalid_ttl_does_not_stop_the_calculator(monkeypatch, value):
+    from src import sunset_calculator
+    config = dict(DEFAULTS, location_ttl_hours=value)
+    monkeypatch.setattr(sunset_calculator, "load_config", lambda: config)
+    assert sunset_calculator.SunsetCalculator().location_finder.ttl == 24 * 3600
+
+def test_location_resolved_once_and_cached(finder):
+    first = finder({"/json/": ok(IPAPI)})
+    location = first.get_current_location()
+    assert (location.city, location.timezone) == ("Lahore", "Asia/Karachi")
+    assert first.get_current_location() is location
+    assert first.client.paths == ["/json/"]
+
+    # A new process loads it from disk without a request
+    second = finder({})
+    second.cache_file = first.cache_file
+    assert second.get_current_location() == location
+    assert second.client.paths == []
+
+def test_expired_location_kept_behind_same_ip(finder):
+    first = finder({"/json/": ok(IPAPI)})
+    location = first.get_current_location()
+    expired = finder({"/ip/": ok(IPAPI["ip"])}, location_ttl_hours=0)
+    expired.cache_file = first.cache_file
+    assert expired.get_current_location() == location
+    assert expired.client.paths == ["/ip/"]
+
+def test_pinned_location_needs_no_request(finder):
+    pinned = finder({}, location={"lat": "21.42", "lng": "39.83", "city": "Makkah"})
+    location = pinned.get_current_location()
+    assert (location.lat, location.city, location.timezone) == (21.42, "Makkah", "Asia/Riyadh")
+    assert pinned.client.paths == []
+
+def test_error_status_is_logged_and_lat_lng_used(finder, caplog):
+    # requests.Response is falsy for error statuses, which must still be reported as such
+    error = requests.Response()
+    error.status_code = 503
+    fallback = finder({"/json/": error, "/latlong": ok("31.5204,74.3587")})
+    location = fallback.get_current_location()
+    assert (location.lat, location.lng) == (31.5204, 74.3587)
+    assert "Error response from API: 503" in caplog.text
+
+@pytest.mark.parametrize("lat_lng,city", [("31.53,74.35", "Lahore"), ("0.0,-140.0", "")])
+def test_lat_lng_location_named_after_nearest_city(finder, lat_lng, city):
+    location = finder({"/latlong": ok(lat_lng)}).get_current_location()
+    # Only cities within a short distance name a location, mid-ocean stays unnamed
+    assert location.city == city
+
+@pytest.mark.parametrize("error", [requests.ConnectionError("down"), requests.TooManyRedirects("loop")])
+def test_public_ip_failure_returns_none(finder, error):
+    assert finder({"/ip/": error}).get_public_ip() is None
+
+def test_lat_lng_string():
+    assert Location.from_lat_lng_string("31.5, 74.3") == Location(31.5, 74.3, "", "", "Asia/Karachi")
+    assert Location.from_lat_lng_string("31.5") is None
+    assert Location.from_lat_lng_string("a,b") is None
@@ -0,0 +1,52 @@
+"""Queued logger: lazy formatting, the listener thread and the rotating log file"""
+
+import os
+import time
+import logging
+import logging.handlers
+from src.logger import LOG_BACKUP_COUNT, LOG_MAX_BYTES, logger
+
+class CountingArg:
+    """Counts how often a log argument is turned into text"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "arg"
+
+def read_log(marker, timeout=5):
+    """Log file contents once the listener thread has written the marker"""
+    path = os.path.join(logger.log_dir, "iftar_clock.log")
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            if marker in text:
+                return text
+        time.sleep(0.01)
+    raise AssertionError(f"{marker!r} never reached {path}")
+
+def test_single_instance():
+    from src.logger import IftarLogger
+    assert IftarLogger() is logger
+
+def test_disabled_messages_are_not_formatted():
+    arg = CountingArg()
+    assert not logger.isEnabledFor(logging.DEBUG)
+    logger.debug("value: %s", arg)
+    assert arg.formatted == 0
+
+def test_records_go_through_the_queue_to_the_file():
+    # The calling thread only enqueues; console and file I/O happen on the listener
+    assert [type(h) for h in logger.logger.handlers] == [logging.handlers.QueueHandler]
+    logger.warning("queued %s", "marker-1")
+    assert "WARNING - queued marker-1" in read_log("marker-1")
+
+def test_log_file_is_rotated_by_size():
+    files = [h for h in logger.listener.handlers if isinstance(h, logging.handlers.RotatingFileHandler)]
+    assert len(files) == 1
+    assert files[0].maxBytes == LOG_MAX_BYTES and files[0].backupCount == LOG_BACKUP_COUNT
+    assert files[0].level == logging.DEBUG
@@ -0,0 +1,68 @@
+"""Metrics registry: collection switch, histograms and both export formats"""
+
+import json
+import pytest
+from src.metrics import BUCKETS, Metrics
+
+@pytest.fixture
+def registry():
+    registry = Metrics()
+    registry.enable()
+    return registry
+
+def test_disabled_registry_records_nothing():
+    registry = Metrics()
+    registry.enabled = False
+    registry.inc("hits_total")
+    registry.observe("tick_seconds", 0.1)
+    with registry.timer("tick_seconds"):
+        pass
+    assert registry.timed("tick_seconds")(lambda: 7)() == 7
+    assert registry.counters == {} and registry.histograms == {}
+
+def test_counters_are_kept_per_label_set(registry):
+    registry.inc("hits_total", file="cache")
+    registry.inc("hits_total", 2, file="cache")
+    registry.inc("hits_total", file="store")
+    values = {tuple(c["labels"].items()): c["value"] for c in registry.snapshot()["counters"]}
+    assert values == {(("file", "cache"),): 3, (("file", "store"),): 1}
+
+def test_histogram_buckets_are_cumulative(registry):
+    for seconds in (0.0002, 0.003, 0.003, 20.0):
+        registry.observe("tick_seconds", seconds)
+    histogram = next(iter(registry.histograms.values()))
+    assert histogram.count == 4 and histogram.max == 20.0
+    assert histogram.buckets[BUCKETS.index(0.0005)] == 1
+    assert histogram.buckets[BUCKETS.index(0.005)] == 3
+    # Beyond the last bound: only in the +Inf bucket, i.e. the count
+    assert histogram.buckets[-1] == 3
+
+def test_timer_and_decorator(registry):
+    with registry.timer("block_seconds", part="a"):
+        pass
+
+    @registry.timed("call_seconds")
+    def add(a, b):
+        return a + b
+    assert add(2, 3) == 5
+    with pytest.raises(ZeroDivisionError):
+        registry.timed("call_seconds")(lambda: 1 / 0)()
+    counts = {h["name"]: h["count"] for h in registry.snapshot()["histograms"]}
+    # A call that raises is still timed
+    assert counts == {"block_seconds": 1, "call_seconds": 2}
+
+def test_prometheus_text(registry):
+    registry.inc("hits_total", file="cache")
+    registry.observe("tick_seconds", 0.002)
+    text = registry.to_prometheus()
+    lines = text.splitlines()
+    assert "# TYPE hits_total counter" in lines and 'hits_total{file="cache"} 1' in lines
+    assert "# TYPE tick_seconds histogram" in lines
+    assert 'tick_seconds_bucket{le="0.001"} 0' in lines and 'tick_seconds_bucket{le="0.005"} 1' in lines
+    assert 'tick_seconds_bucket{le="+Inf"} 1' in lines and "tick_seconds_count 1" in lines
+
+def test_json_snapshot(registry):
+    registry.observe("tick_seconds", 0.5)
+    data = json.loads(registry.to_json())
+    assert data["enabled"] and data["uptime"] >= 0
+    assert data["histograms"][0]["mean"] == 0.5
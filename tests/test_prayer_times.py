@@ -0,0 +1,53 @@
+"""Prayer times: twilight methods and the high-latitude rule"""
+
+import math
+import pytest
+from datetime import date, timedelta
+from src.location_finder import Location
+from src.prayer_times import EVENTS, METHODS, PrayerTimetable, get_method, timetable_for_year
+
+MAKKAH = Location(lat=21.4225, lng=39.8262, city="Makkah", timezone="Asia/Riyadh")
+LONDON = Location(lat=51.5074, lng=-0.1278, city="London", timezone="Europe/London")
+
+def test_makkah_matches_umm_al_qura():
+    # Umm al-Qura calendar for 21 June 2024: Fajr 04:11, Maghrib 19:05 (sunset), Isha 90 minutes later
+    day = date(2024, 6, 21)
+    times = PrayerTimetable.for_range(MAKKAH, day, 1, METHODS["Makkah"]).times(day)
+    assert times["fajr"].strftime("%H:%M") == "04:11"
+    assert times["maghrib"].strftime("%H:%M") == "19:05"
+    assert times["isha"] - times["maghrib"] == timedelta(minutes=90)
+
+def test_events_are_in_order(location):
+    timetable = PrayerTimetable.for_year(location, 2026, METHODS["Karachi"])
+    assert len(timetable) == 365
+    for offset in range(0, 365, 7):
+        times = timetable.times(date(2026, 1, 1) + timedelta(days=offset))
+        values = [times[event] for event in EVENTS]
+        assert values == sorted(values)
+        assert all(value.utcoffset() == timedelta(hours=5) for value in values)
+
+def test_higher_fajr_angle_is_earlier(location):
+    day = date(2026, 3, 1)
+    fajr = {name: PrayerTimetable.for_range(location, day, 1, METHODS[name]).event("fajr", day)
+            for name in ("ISNA", "MWL", "Egypt")}
+    # 15, 18 and 19.5 degrees below the horizon
+    assert fajr["Egypt"] < fajr["MWL"] < fajr["ISNA"]
+
+def test_angle_based_rule_when_twilight_never_ends():
+    # At midsummer the sun never gets 18 degrees below London's horizon: Fajr is
+    # sunrise minus 18/60 of the night
+    day = date(2024, 6, 21)
+    timetable = PrayerTimetable.for_range(LONDON, day, 1, METHODS["MWL"])
+    night = timetable.epochs["sunrise"][0] - PrayerTimetable.for_range(LONDON, day - timedelta(days=1), 1).epochs["maghrib"][0]
+    assert timetable.epochs["fajr"][0] == pytest.approx(timetable.epochs["sunrise"][0] - night * 18 / 60, abs=1)
+    assert not math.isnan(timetable.epochs["isha"][0])
+
+def test_get_method():
+    assert get_method("isna") is METHODS["ISNA"]
+    assert get_method(None) is METHODS["MWL"]
+    assert get_method("no such method") is METHODS["MWL"]
+
+def test_timetable_for_year_is_cached(location):
+    assert timetable_for_year(location, 2026, "MWL") is timetable_for_year(location, 2026, "mwl")
+    with pytest.raises(KeyError):
+        timetable_for_year(location, 2026).index(date(2027, 1, 1))
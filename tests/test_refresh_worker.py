@@ -0,0 +1,116 @@
+"""Background refreshes: the worker's callbacks and the calculator state it shares with the tick"""
+
+import threading
+import time
+import pytest
+from dataclasses import asdict
+from datetime import date
+from src.refresh_worker import RefreshWorker
+from src.sunset_table import SunsetTable
+
+class FakeRoot:
+    """Collects after() callbacks; run() plays the part of the Tk event loop"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, delay_ms, func, *args):
+        self.callbacks.append((func, args))
+
+    def run(self, timeout=5):
+        deadline = time.monotonic() + timeout
+        while self.callbacks and time.monotonic() < deadline:
+            func, args = self.callbacks.pop(0)
+            func(*args)
+            time.sleep(0.001)
+
+@pytest.fixture
+def worker():
+    root = FakeRoot()
+    worker = RefreshWorker(root, poll_interval_ms=1)
+    yield worker
+    worker.shutdown()
+
+def test_results_delivered_on_the_polling_thread(worker):
+    delivered = []
+    job_threads = []
+
+    def job():
+        job_threads.append(threading.current_thread())
+        return 42
+    worker.submit(job, callback=lambda result: delivered.append((result, threading.current_thread())))
+    worker.root.run()
+    assert job_threads[0] is not threading.current_thread()
+    assert delivered == [(42, threading.current_thread())]
+    # Nothing pending: the queue is no longer polled
+    assert not worker._polling and worker.root.callbacks == []
+
+def test_errors_go_to_the_error_callback(worker):
+    errors = []
+    worker.submit(lambda: 1 / 0, callback=lambda result: pytest.fail("no result expected"),
+                  error_callback=errors.append)
+    worker.root.run()
+    assert isinstance(errors[0], ZeroDivisionError)
+
+def test_failing_callback_does_not_stop_delivery(worker):
+    delivered = []
+
+    def broken(result):
+        raise RuntimeError("callback bug")
+    worker.submit(lambda: 1, callback=broken)
+    worker.submit(lambda: 2, callback=delivered.append)
+    worker.root.run()
+    assert delivered == [2]
+
+@pytest.fixture
+def short_calculator(calculator, location):
+    """Calculator whose tables end before today, as on the first tick of a new year"""
+    calculator.config["location"] = asdict(location)
+    calculator.table = SunsetTable.for_year(location, date.today().year - 1)
+    calculator.next_table = None
+    return calculator
+
+def test_tick_never_rebuilds_tables(short_calculator, monkeypatch):
+    requests = []
+    short_calculator.on_refresh_needed = lambda: requests.append(threading.current_thread())
+    monkeypatch.setattr(short_calculator, "build_table", lambda *args: pytest.fail("built on the tick"))
+    short_calculator.countdown.arm(None, time.time() - 1)
+    # Pending: nothing shown, and the worker is asked for the tables
+    assert short_calculator.remaining_seconds() is None
+    assert short_calculator.format_remaining_time() == "--:--"
+    assert short_calculator.countdown.target_epoch is None and not short_calculator.countdown.expired()
+    assert requests == [threading.current_thread()]
+
+def test_refresh_arms_the_pending_countdown(short_calculator):
+    short_calculator._arm_countdown()
+    assert short_calculator._tables_short
+    short_calculator.refresh()
+    assert not short_calculator._tables_short
+    assert date.today() in short_calculator.table
+    assert short_calculator.countdown.switch_epoch > time.time() + 1
+
+def test_tick_does_not_wait_for_a_refresh(calculator):
+    calculator.countdown.arm(None, time.time() - 1)
+    held = threading.Event()
+    release = threading.Event()
+
+    def refresh():
+        with calculator.lock:
+            held.set()
+            release.wait(5)
+    thread = threading.Thread(target=refresh)
+    thread.start()
+    held.wait(5)
+    try:
+        started = time.monotonic()
+        assert calculator.remaining_seconds() is None
+        now = time.time()
+        # Left for the refresh to re-arm, and the display looks again shortly instead of spinning
+        assert calculator.countdown.expired()
+        assert calculator.next_display_change(now) == now + 1
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+        thread.join()
+    calculator.remaining_seconds()
+    assert not calculator.countdown.expired()
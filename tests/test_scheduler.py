@@ -0,0 +1,97 @@
+"""TkScheduler against a fake Tk root and a fake clock"""
+
+import pytest
+from src import scheduler
+from src.scheduler import MIN_INTERVAL, WAKE_SLACK, TkScheduler
+
+class FakeRoot:
+    """Records after() calls instead of running a Tk event loop"""
+
+    def __init__(self):
+        self.pending = {}
+        self._next_id = 0
+
+    def after(self, delay_ms, func, *args):
+        self._next_id += 1
+        after_id = f"after#{self._next_id}"
+        self.pending[after_id] = (delay_ms, func, args)
+        return after_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def fire(self, after_id):
+        _, func, args = self.pending.pop(after_id)
+        func(*args)
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(1000.25)
+    monkeypatch.setattr(scheduler.time, "time", clock.time)
+    return clock
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+def only_pending(root):
+    assert len(root.pending) == 1
+    after_id = next(iter(root.pending))
+    return after_id, root.pending[after_id][0]
+
+def test_every_wakes_on_wall_clock_multiples(root, clock):
+    runs = []
+    TkScheduler(root).every("tick", 60, lambda: runs.append(clock.now))
+    after_id, delay_ms = only_pending(root)
+    # Next multiple of 60 after 1000.25 is 1020
+    assert delay_ms == pytest.approx((1020 - 1000.25 + WAKE_SLACK) * 1000, abs=1)
+    clock.now = 1020.01
+    root.fire(after_id)
+    assert runs == [1020.01]
+    _, delay_ms = only_pending(root)
+    assert delay_ms == pytest.approx((1080 - 1020.01 + WAKE_SLACK) * 1000, abs=1)
+
+def test_early_wakeup_sleeps_the_rest(root, clock):
+    runs = []
+    TkScheduler(root).add_job("job", lambda: runs.append(1), lambda now: 1010.0)
+    after_id, _ = only_pending(root)
+    clock.now = 1009.5
+    root.fire(after_id)
+    assert runs == []
+    _, delay_ms = only_pending(root)
+    assert delay_ms == pytest.approx((0.5 + WAKE_SLACK) * 1000, abs=1)
+
+def test_past_due_time_uses_min_interval(root, clock):
+    TkScheduler(root).add_job("job", lambda: None, lambda now: now - 5)
+    _, delay_ms = only_pending(root)
+    assert delay_ms == pytest.approx((MIN_INTERVAL + WAKE_SLACK) * 1000, abs=1)
+
+def test_failing_job_keeps_running(root, clock):
+    calls = []
+
+    def job():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    TkScheduler(root).every("job", 10, job)
+    for _ in range(3):
+        after_id, _ = only_pending(root)
+        clock.now += 10
+        root.fire(after_id)
+    assert len(calls) == 3
+    only_pending(root)
+
+def test_cancel_and_replace(root, clock):
+    tk_scheduler = TkScheduler(root)
+    tk_scheduler.every("job", 10, lambda: None)
+    tk_scheduler.every("job", 20, lambda: None)
+    only_pending(root)
+    tk_scheduler.cancel_all()
+    assert root.pending == {} and tk_scheduler.jobs == {}
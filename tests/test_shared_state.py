@@ -0,0 +1,172 @@
+"""Shared-memory countdown state: publisher to reader round trip"""
+
+import os
+import math
+import uuid
+import struct
+import pytest
+from multiprocessing import resource_tracker
+from datetime import date, timedelta
+from src import shared_state
+from src.shared_state import MAX_STATES, SHARED_DAYS, SharedCountdown, SharedStatePublisher
+
+@pytest.fixture
+def publisher(calculator):
+    publisher = SharedStatePublisher(calculator, name=f"iftar_test_{os.getpid()}_{uuid.uuid4().hex[:8]}")
+    publisher.calculator.prefetch(days=SHARED_DAYS)
+    publisher.open()
+    yield publisher
+    publisher.close()
+
+@pytest.fixture
+def reader(publisher):
+    publisher.publish()
+    reader = SharedCountdown.attach(publisher.name)
+    # Reader and producer share this process: give the producer back the resource
+    # tracker registration the reader dropped, so close() can unlink cleanly
+    resource_tracker.register(reader.segment._name, "shared_memory")
+    yield reader
+    reader.close()
+
+def test_no_segment_without_publisher():
+    assert SharedCountdown.attach(f"iftar_test_missing_{uuid.uuid4().hex[:8]}") is None
+
+def test_reader_sees_published_countdowns(publisher, reader):
+    expected = publisher.calculator.upcoming_countdowns(MAX_STATES)
+    _, states, start, days = reader.snapshot()
+    assert [(target, switch, tomorrow) for target, switch, tomorrow, _ in states] == \
+        [(state.target_epoch, state.switch_epoch, state.is_tomorrow) for state in expected]
+    assert start == date.today().toordinal()
+    assert len(days) == SHARED_DAYS
+    assert reader.countdown.switch_epoch == publisher.calculator.countdown.switch_epoch
+    assert reader.format_remaining_time() == publisher.calculator.format_remaining_time()
+
+def test_reader_events_match_table(publisher, reader):
+    table = publisher.calculator.table
+    today = date.today()
+    fajr, sunrise, sunset = reader.events(today)
+    if today in table:
+        assert sunset == table.sunset(today) and fajr == table.fajr(today)
+    assert reader.events(today + timedelta(days=SHARED_DAYS)) is None
+
+def test_republish_bumps_sequence(publisher, reader):
+    sequence = publisher._sequence
+    publisher.publish()
+    assert publisher._sequence == sequence + 2 and publisher._sequence % 2 == 0
+    assert not math.isnan(reader.snapshot()[0])
+
+class PublishInterrupted(Exception):
+    pass
+
+class InterruptingStruct(struct.Struct):
+    """A Struct whose pack_into stops the publish after a given number of stores"""
+
+    budget = None
+
+    def pack_into(self, buffer, offset, *values):
+        if InterruptingStruct.budget is not None:
+            if InterruptingStruct.budget == 0:
+                raise PublishInterrupted()
+            InterruptingStruct.budget -= 1
+        super().pack_into(buffer, offset, *values)
+
+@pytest.fixture
+def interruptible(monkeypatch):
+    for name in ("SEQUENCE", "HEADER", "STATE", "DAY"):
+        monkeypatch.setattr(shared_state, name, InterruptingStruct(getattr(shared_state, name).format))
+    yield
+    InterruptingStruct.budget = None
+
+def test_snapshot_taken_mid_publish_is_rejected(publisher, reader, interruptible, monkeypatch):
+    calculator = publisher.calculator
+    before = reader.snapshot()
+    # The next publish differs in the header (day ordinal), the states and the days
+    tomorrow = date.today() + timedelta(days=1)
+    monkeypatch.setattr(shared_state, "date", type("Tomorrow", (date,), {"today": classmethod(lambda cls: tomorrow)}))
+    calculator.countdown.arm(None, calculator.countdown.switch_epoch)
+    stores = 3 + len(calculator.upcoming_countdowns(MAX_STATES)) + SHARED_DAYS
+    retries = []
+
+    def finish_publish(_):
+        # The reader saw an odd sequence and backs off; the producer completes meanwhile
+        retries.append(1)
+        if len(retries) > 3:
+            raise AssertionError("reader never saw a consistent segment")
+        publisher.publish()
+
+    monkeypatch.setattr(shared_state.time, "sleep", finish_publish)
+    for budget in range(1, stores):
+        # Stop the producer after `budget` stores: nothing written so far may be read as consistent
+        InterruptingStruct.budget = budget
+        with pytest.raises(PublishInterrupted):
+            publisher.publish()
+        InterruptingStruct.budget = None
+        retries.clear()
+        _, states, start, _ = reader.snapshot()
+        assert retries, f"snapshot accepted a publish interrupted after {budget} stores"
+        assert start == before[2] + 1
+        assert states[0][0] is None
+
+def test_publish_writes_even_sequence_last(publisher, interruptible, monkeypatch):
+    stores = []
+    original = InterruptingStruct.pack_into
+
+    def record(self, buffer, offset, *values):
+        stores.append((offset, values))
+        original(self, buffer, offset, *values)
+
+    monkeypatch.setattr(InterruptingStruct, "pack_into", record)
+    publisher.publish()
+    assert stores[-1] == (shared_state.SEQUENCE_OFFSET, (publisher._sequence,))
+    assert publisher._sequence % 2 == 0
+    # Every earlier store ran with the sequence odd
+    assert stores[0] == (shared_state.SEQUENCE_OFFSET, (publisher._sequence - 1,))
+
+def age_segment(publisher, seconds):
+    """Make the segment look published `seconds` ago, as when its producer stopped"""
+    offset = struct.calcsize("<4sHHQ")
+    published = struct.unpack_from("<d", publisher.segment.buf, offset)[0]
+    struct.pack_into("<d", publisher.segment.buf, offset, published - seconds)
+
+def test_dead_producer_makes_reader_stale(publisher, reader):
+    requests = []
+    reader.on_refresh_needed = lambda: requests.append(1)
+    age_segment(publisher, shared_state.STALE_AFTER + 60)
+    reader.countdown.arm(None, 0)
+    reader.remaining_seconds()
+    assert reader.stale and requests == [1]
+
+def test_segment_left_by_dead_producer_is_not_attached(publisher):
+    publisher.publish()
+    age_segment(publisher, shared_state.STALE_AFTER + 60)
+    assert SharedCountdown.attach(publisher.name) is None
+    resource_tracker.register(publisher.segment._name, "shared_memory")
+
+def test_reader_reattaches_to_restarted_producer(publisher, reader):
+    age_segment(publisher, shared_state.STALE_AFTER + 60)
+    publisher.close()
+    restarted = SharedStatePublisher(publisher.calculator, name=publisher.name)
+    restarted.open()
+    try:
+        restarted.publish()
+        reader.refresh()
+        resource_tracker.register(reader.segment._name, "shared_memory")
+        assert not reader.stale
+        assert reader.countdown.switch_epoch == publisher.calculator.countdown.switch_epoch
+    finally:
+        restarted.close()
+
+def test_clock_falls_back_to_local_calculator(publisher, reader, location, monkeypatch):
+    from dataclasses import asdict
+    from types import SimpleNamespace
+    from src import sunset_calculator
+    from src.config import DEFAULTS
+    from src.iftar_app import IftarApp
+    config = dict(DEFAULTS, location=asdict(location))
+    monkeypatch.setattr(sunset_calculator, "load_config", lambda: config)
+    app = SimpleNamespace(sunset_calculator=reader)
+    assert IftarApp.refresh_calculator(app) is reader
+    age_segment(publisher, shared_state.STALE_AFTER + 60)
+    reader.refresh()
+    replacement = IftarApp.refresh_calculator(app)
+    assert isinstance(replacement, sunset_calculator.SunsetCalculator) and replacement.table is not None
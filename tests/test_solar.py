@@ -0,0 +1,61 @@
+"""Sunrise and sunset from the NOAA engine against published almanac times"""
+
+import numpy as np
+import pytest
+from datetime import date, datetime, timedelta
+from src.location_finder import Location
+from src.solar_position import sunrise_utc, sunset_utc
+from src.sunset_batch import compute_sunset_matrix, date_range
+from src.sunset_table import SunsetTable
+from src.timezones import get_zone
+
+LONDON = Location(lat=51.5074, lng=-0.1278, city="London", timezone="Europe/London")
+NEW_YORK = Location(lat=40.7128, lng=-74.0060, city="New York", timezone="America/New_York")
+TROMSO = Location(lat=69.6492, lng=18.9553, city="Tromsø", timezone="Europe/Oslo")
+
+# (location, day, sunrise, sunset) in local time, from timeanddate.com
+ALMANAC = [
+    (LONDON, date(2024, 6, 21), "04:43", "21:21"),
+    (LONDON, date(2024, 12, 21), "08:03", "15:53"),
+    (NEW_YORK, date(2024, 12, 21), "07:17", "16:32"),
+    (NEW_YORK, date(2024, 6, 20), "05:25", "20:31"),
+]
+
+def local_minutes(epoch: float, zone: str) -> float:
+    local = datetime.fromtimestamp(float(epoch), get_zone(zone))
+    return local.hour * 60 + local.minute + local.second / 60
+
+def clock_minutes(text: str) -> int:
+    hours, minutes = text.split(":")
+    return int(hours) * 60 + int(minutes)
+
+@pytest.mark.parametrize("location,day,sunrise,sunset", ALMANAC)
+def test_sunrise_and_sunset_match_almanac(location, day, sunrise, sunset):
+    # The almanac rounds to the minute
+    assert abs(local_minutes(sunrise_utc(day, location.lat, location.lng), location.timezone)
+               - clock_minutes(sunrise)) <= 1.5
+    assert abs(local_minutes(sunset_utc(day, location.lat, location.lng), location.timezone)
+               - clock_minutes(sunset)) <= 1.5
+
+def test_no_sunset_during_polar_day():
+    assert np.isnan(sunset_utc(date(2026, 6, 21), TROMSO.lat, TROMSO.lng))
+
+def test_table_matches_single_day_engine(location):
+    table = SunsetTable.for_year(location, 2026)
+    assert len(table) == 365 and table.end == date(2026, 12, 31)
+    for day in (date(2026, 1, 1), date(2026, 3, 20), date(2026, 12, 31)):
+        expected = float(sunset_utc(day, location.lat, location.lng))
+        assert table.sunset(day).timestamp() == pytest.approx(expected, abs=1)
+        assert table.sunset(day).utcoffset() == timedelta(hours=5)
+
+def test_batch_matrix_matches_single_location():
+    locations = [LONDON, NEW_YORK, TROMSO]
+    dates = date_range(date(2026, 6, 19), 5)
+    matrix = compute_sunset_matrix(locations, dates, chunk_size=2)
+    for row, location in enumerate(locations):
+        for column, day in enumerate(dates):
+            expected = sunset_utc(day, location.lat, location.lng)
+            if np.isnan(expected):
+                assert np.isnan(matrix[row, column])
+            else:
+                assert matrix[row, column] == pytest.approx(float(expected), abs=1e-3)
@@ -0,0 +1,157 @@
+"""Sunset cache: round trip, migration and recovery from damaged files"""
+
+import os
+import json
+import pytest
+from datetime import date, datetime, timedelta
+from src.sunset_cache import CACHE_VERSION, SunsetCache
+from src.timezones import get_zone
+
+DAY = date(2026, 3, 1)
+SUNSET = datetime(2026, 3, 1, 18, 0, 35, tzinfo=get_zone("Asia/Karachi"))
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "iftar_clock.json")
+
+def write(path, data):
+    with open(path, "w") as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+
+def test_round_trip(path, location):
+    cache = SunsetCache(path)
+    cache.put(location, DAY, SUNSET)
+    cache.save()
+    loaded = SunsetCache(path)
+    loaded.load()
+    assert loaded.get(location, DAY) == SUNSET
+    assert loaded.get(location, DAY + timedelta(days=1)) is None
+    with open(path) as f:
+        assert json.load(f)["version"] == CACHE_VERSION
+
+def test_version_2_is_checksummed_on_load(path, location):
+    key = SunsetCache.location_key(location)
+    write(path, {"version": 2, "locations": {key: {"last_used": 1.0, "sunsets": {
+        DAY.isoformat(): SUNSET.isoformat(), "2026-03-02": "not a time"}}}})
+    cache = SunsetCache(path)
+    cache.load()
+    assert cache.get(location, DAY) == SUNSET
+    assert list(cache.quarantine) == [f"{key} 2026-03-02"]
+
+def test_version_1_is_bound_to_location(path, location):
+    write(path, {"60": SUNSET.isoformat()})
+    cache = SunsetCache(path)
+    cache.load()
+    assert cache.get(location, DAY) is None
+    cache.bind_legacy(location)
+    assert cache.get(location, DAY) == SUNSET
+
+@pytest.mark.parametrize("content", [
+    "{not json",
+    "[1, 2, 3]",
+    '"a string"',
+    json.dumps({"version": 2, "locations": {"31.52,74.36": {"sunsets": ["2026-03-01"]}}}),
+    json.dumps({"version": 2, "locations": {"31.52,74.36": "garbage"}}),
+])
+def test_unreadable_file_is_moved_aside(path, location, content):
+    write(path, content)
+    cache = SunsetCache(path)
+    cache.load()
+    assert len(cache) == 0 and cache.get(location, DAY) is None
+    assert not os.path.exists(path)
+    with open(path + ".corrupt") as f:
+        assert f.read() == content
+    # The next save starts a fresh file
+    cache.put(location, DAY, SUNSET)
+    cache.save()
+    reloaded = SunsetCache(path)
+    reloaded.load()
+    assert reloaded.get(location, DAY) == SUNSET
+
+def test_calculator_starts_with_damaged_cache(location):
+    from src.sunset_calculator import SunsetCalculator
+    write(SunsetCalculator().data_file, "[]")
+    calculator = SunsetCalculator()
+    assert len(calculator.cache) == 0
+    os.remove(calculator.data_file + ".corrupt")
+
+def saved(path):
+    with open(path) as f:
+        return json.load(f)
+
+def test_checksum_mismatch_is_quarantined_then_dropped(path, location):
+    key = SunsetCache.location_key(location)
+    cache = SunsetCache(path)
+    cache.put_many(location, [(DAY, SUNSET), (DAY + timedelta(days=1), SUNSET + timedelta(days=1, minutes=1))])
+    cache.save()
+
+    # Flip the stored time without updating its checksum
+    data = saved(path)
+    data["locations"][key]["sunsets"][DAY.isoformat()][0] = SUNSET.replace(hour=17).isoformat()
+    write(path, data)
+
+    cache = SunsetCache(path)
+    cache.load()
+    assert cache.get(location, DAY) is None
+    assert cache.get(location, DAY + timedelta(days=1)) is not None
+    assert f"{key} {DAY}" in cache.quarantine
+
+    # Kept in the next saved file for inspection...
+    cache.save()
+    data = saved(path)
+    assert DAY.isoformat() not in data["locations"][key]["sunsets"]
+    assert list(data["quarantine"]) == [f"{key} {DAY}"]
+
+    # ...and dropped from the one after it
+    cache = SunsetCache(path)
+    cache.load()
+    cache.put(location, DAY, SUNSET)
+    cache.save()
+    assert saved(path)["quarantine"] == {}
+    assert cache.get(location, DAY) == SUNSET
+
+@pytest.mark.parametrize("record", ["2026-03-01T18:00:35+05:00", ["2026-03-01T18:00:35+05:00"],
+                                    [123, 456], ["2026-03-01T18:00:35+05:00", "crc"], None])
+def test_malformed_record_is_quarantined_on_load(path, location, record):
+    key = SunsetCache.location_key(location)
+    cache = SunsetCache(path)
+    cache.put(location, DAY + timedelta(days=1), SUNSET + timedelta(days=1))
+    cache.save()
+    data = saved(path)
+    data["locations"][key]["sunsets"][DAY.isoformat()] = record
+    write(path, data)
+
+    cache = SunsetCache(path)
+    cache.load()
+    assert cache.quarantine == {f"{key} {DAY}": record}
+    assert cache.get(location, DAY) is None
+    assert cache.get(location, DAY + timedelta(days=1)) == SUNSET + timedelta(days=1)
+
+@pytest.mark.parametrize("entry", ["garbage", {"last_used": 1.0}, {"sunsets": ["2026-03-01"]}])
+def test_malformed_entry_is_quarantined_on_load(path, location, entry):
+    write(path, {"version": CACHE_VERSION, "locations": {"0.00,0.00": entry}, "quarantine": []})
+    cache = SunsetCache(path)
+    cache.load()
+    assert cache.locations == {} and cache.quarantine == {"0.00,0.00": entry}
+    cache.put(location, DAY, SUNSET)
+    cache.save()
+    assert list(saved(path)["locations"]) == [SunsetCache.location_key(location)]
+
+def test_bad_last_used_is_reset(path, location):
+    cache = SunsetCache(path)
+    cache.put(location, DAY, SUNSET)
+    cache.save()
+    data = saved(path)
+    data["locations"][SunsetCache.location_key(location)]["last_used"] = "yesterday"
+    write(path, data)
+    cache = SunsetCache(path)
+    cache.load()
+    cache.put(location, DAY + timedelta(days=1), SUNSET)
+    cache.evict(DAY)
+    assert cache.get(location, DAY) == SUNSET
+
+def test_locations_not_an_object_moves_file_aside(path):
+    write(path, {"version": CACHE_VERSION, "locations": ["31.52,74.36"]})
+    cache = SunsetCache(path)
+    cache.load()
+    assert len(cache) == 0 and os.path.exists(path + ".corrupt")
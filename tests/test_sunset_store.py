@@ -0,0 +1,94 @@
+"""Memory-mapped sunset store: round trip and recovery from damaged files"""
+
+import os
+import pytest
+from datetime import date
+from src.sunset_store import SunsetStore
+from src.sunset_table import SunsetTable
+
+YEAR = 2026
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "sunsets.bin")
+
+@pytest.fixture
+def table(location):
+    return SunsetTable.for_year(location, YEAR)
+
+def stored(path, table):
+    store = SunsetStore(path)
+    store.add_tables([table])
+    store.close()
+    return path
+
+def test_round_trip(path, location, table):
+    store = SunsetStore(stored(path, table))
+    assert store.open()
+    day = date(YEAR, 3, 1)
+    # Stored to the minute
+    assert store.sunset_epoch(location, day) == pytest.approx(table.sunset(day).timestamp(), abs=30)
+    loaded = store.get_table(location, YEAR)
+    assert len(loaded) == len(table)
+    assert store.get_table(location, YEAR + 1) is None
+    store.close()
+
+def test_missing_file_is_not_opened(path):
+    assert not SunsetStore(path).open()
+
+def test_truncated_block_is_dropped(path, location, table):
+    stored(path, table)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 100)
+    store = SunsetStore(path)
+    assert store.open()
+    assert store.sunset_epoch(location, date(YEAR, 3, 1)) is None
+    assert store.get_table(location, YEAR) is None
+    # Rewriting the store recovers it
+    store.add_tables([table])
+    assert store.get_table(location, YEAR) is not None
+    store.close()
+
+def test_corrupt_block_is_dropped(path, location, table):
+    stored(path, table)
+    with open(path, "r+b") as f:
+        f.seek(-4, os.SEEK_END)
+        f.write(b"\x00\x00\x00\x01")
+    store = SunsetStore(path)
+    assert store.open()
+    assert store.get_table(location, YEAR) is None
+    assert store.index == {}
+    store.close()
+
+def test_calculator_rebuilds_truncated_store(location, table):
+    from src.config import CONFIG_DIR
+    from src.sunset_calculator import SunsetCalculator
+    path = stored(os.path.join(CONFIG_DIR, "sunsets.bin"), table)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 100)
+    calculator = SunsetCalculator()
+    calculator.store = SunsetStore(path)
+    calculator.store.open()
+    calculator.build_table(location, YEAR)
+    reopened = SunsetStore(path)
+    assert reopened.open() and reopened.get_table(location, YEAR) is not None
+    reopened.close()
+    calculator.store.close()
+    os.remove(path)
+
+def test_checksums_are_verified_lazily(path, location, table):
+    store = SunsetStore(path)
+    store.add_tables([table, SunsetTable.for_year(location, YEAR + 1)])
+    store.close()
+    # Corrupt the block written last, i.e. the next year's
+    with open(path, "r+b") as f:
+        f.seek(-4, os.SEEK_END)
+        f.write(b"\x00\x00\x00\x01")
+    store = SunsetStore(path)
+    assert store.open()
+    # Opening only reads the index; the bad block is found when it is first read
+    assert len(store.index) == 2
+    assert store.get_table(location, YEAR) is not None
+    assert store.get_table(location, YEAR + 1) is None
+    assert list(store.index) == [SunsetStore.block_key(location, YEAR)]
+    store.close()
@@ -0,0 +1,75 @@
+"""Dual countdown timeline: merge, bisect and the suhoor/iftar handover"""
+
+import math
+import numpy as np
+import pytest
+from datetime import date, timedelta
+from src import sunset_calculator
+from src.countdown import IFTAR, SUHOOR
+from src.prayer_times import METHODS, PrayerTimetable
+from src.timeline import TIMELINE_DAYS, Timeline
+
+class FakeTimetable:
+    def __init__(self, fajr, maghrib):
+        self.epochs = {"fajr": np.array(fajr), "maghrib": np.array(maghrib)}
+        self.tz = None
+
+def test_merge_sorts_and_drops_missing_events():
+    timeline = Timeline.from_timetable(FakeTimetable([100.0, math.nan, 300.0], [200.0, 250.0, 400.0]))
+    assert timeline.epochs == [100.0, 200.0, 250.0, 300.0, 400.0]
+    assert timeline.events == [SUHOOR, IFTAR, IFTAR, SUHOOR, IFTAR]
+    assert timeline.end == 400.0
+
+def test_next_event_is_strictly_after():
+    timeline = Timeline([100.0, 200.0, 300.0], [SUHOOR, IFTAR, SUHOOR])
+    assert timeline.next_event(50.0) == (0, 100.0, SUHOOR)
+    assert timeline.next_event(100.0) == (1, 200.0, IFTAR)
+    assert timeline.next_event(299.9) == (2, 300.0, SUHOOR)
+    assert timeline.next_event(300.0) is None
+    assert timeline.next_of(IFTAR, 150.0) == 200.0
+    assert timeline.next_of(IFTAR, 200.0) is None
+    assert Timeline([], []).end == float("-inf")
+
+def test_built_timeline_alternates(location):
+    start = date(2026, 3, 1)
+    timeline = Timeline.build(location, METHODS["Karachi"], days=3, start=start)
+    timetable = PrayerTimetable.for_range(location, start - timedelta(days=1), 5, METHODS["Karachi"])
+    # Yesterday to three days ahead, a suhoor end and an iftar each day
+    assert timeline.events == [SUHOOR, IFTAR] * 5
+    assert timeline.epochs[::2] == timetable.epochs["fajr"].tolist()
+    assert timeline.epochs[1::2] == timetable.epochs["maghrib"].tolist()
+
+@pytest.fixture
+def dual_calculator(calculator):
+    calculator.dual = True
+    calculator.prefetch()
+    return calculator
+
+def test_handover_from_suhoor_to_iftar(dual_calculator, monkeypatch):
+    timeline = dual_calculator.timeline
+    i, fajr, event = timeline.next_event(timeline.next_of(IFTAR, timeline.epochs[0]))
+    assert event == SUHOOR
+    maghrib = timeline.epochs[i + 1]
+
+    monkeypatch.setattr(sunset_calculator.time, "time", lambda: fajr - 60)
+    dual_calculator._arm_from_timeline()
+    assert (dual_calculator.countdown.event, dual_calculator.countdown.target_epoch) == (SUHOOR, fajr)
+    assert dual_calculator.countdown.label() == "Suhoor ends in"
+    assert dual_calculator.sunset.timestamp() == pytest.approx(maghrib, abs=1e-3)
+
+    # At Fajr the countdown hands over to the same day's Maghrib
+    monkeypatch.setattr(sunset_calculator.time, "time", lambda: fajr)
+    dual_calculator._advance_countdown()
+    assert (dual_calculator.countdown.event, dual_calculator.countdown.target_epoch) == (IFTAR, maghrib)
+    assert dual_calculator.countdown.label() == "Iftar in"
+
+    states = dual_calculator.upcoming_countdowns(4)
+    assert [state.event for state in states] == [IFTAR, SUHOOR, IFTAR, SUHOOR]
+
+@pytest.mark.parametrize("prefetch_days", [2, TIMELINE_DAYS, 10])
+def test_prefetch_keeps_a_fresh_timeline(dual_calculator, prefetch_days):
+    dual_calculator.prefetch_days = prefetch_days
+    dual_calculator.prefetch()
+    timeline = dual_calculator.timeline
+    dual_calculator.prefetch()
+    assert dual_calculator.timeline is timeline
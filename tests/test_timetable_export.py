@@ -0,0 +1,100 @@
+"""Timetable export: CSV, iCalendar and JSON lines output and the command line"""
+
+import io
+import csv
+import json
+import pytest
+from datetime import date, datetime
+from src import timetable_export
+from src.location_finder import Location
+from src.prayer_times import EVENTS, get_method
+from src.timetable_export import ICS_LINE_OCTETS, iter_chunks, iter_rows, iter_sites, main
+
+START = date(2026, 12, 30)
+END = date(2027, 1, 2)
+
+@pytest.fixture
+def rows(location):
+    return list(iter_rows([location], START, END, get_method("Karachi")))
+
+def test_chunks_split_at_new_year():
+    assert list(iter_chunks(START, END)) == [(START, 2), (date(2027, 1, 1), 2)]
+    assert list(iter_chunks(END, START)) == []
+
+def test_rows_cover_every_site_and_day(location, rows):
+    assert [day for _, day, _ in rows] == [date(2026, 12, 30), date(2026, 12, 31), date(2027, 1, 1), date(2027, 1, 2)]
+    for _, day, times in rows:
+        assert set(times) == set(EVENTS)
+        assert times["fajr"] < times["maghrib"] and times["maghrib"].date() == day
+
+def test_sites_file(tmp_path):
+    path = tmp_path / "sites.csv"
+    path.write_text("city,lat,lng,timezone\nKarachi,24.86,67.00,Asia/Karachi\nBroken,north,67\nLahore,31.52,74.36,\n",
+                    encoding="utf-8")
+    sites = list(iter_sites(str(path)))
+    assert [site.city for site in sites] == ["Karachi", "Lahore"]
+    # A missing timezone comes from the coordinates
+    assert sites[1].timezone == "Asia/Karachi"
+
+def test_csv(rows):
+    out = io.StringIO()
+    timetable_export.write_csv(rows, out)
+    records = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert len(records) == len(rows)
+    first = records[0]
+    assert first["city"] == "Lahore" and first["date"] == "2026-12-30" and first["timezone"] == "Asia/Karachi"
+    assert first["maghrib"] == rows[0][2]["maghrib"].strftime("%H:%M")
+
+def test_jsonl(rows):
+    out = io.StringIO()
+    timetable_export.write_jsonl(rows, out)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [record["date"] for record in records] == [day.isoformat() for _, day, _ in rows]
+    # Times keep their UTC offset
+    assert datetime.fromisoformat(records[0]["maghrib"]) == rows[0][2]["maghrib"].replace(microsecond=0)
+    assert records[0]["maghrib"].endswith("+05:00")
+
+def unfold(text):
+    return text.replace("\r\n ", "")
+
+def test_ics(rows):
+    out = io.StringIO()
+    timetable_export.write_ics(rows, out)
+    text = out.getvalue()
+    assert text.startswith("BEGIN:VCALENDAR\r\n") and text.endswith("END:VCALENDAR\r\n")
+    assert "\n" not in text.replace("\r\n", "")
+    lines = unfold(text).split("\r\n")
+    assert lines.count("BEGIN:VEVENT") == lines.count("END:VEVENT") == 2 * len(rows)
+    assert "SUMMARY:Iftar (Lahore)" in lines and "SUMMARY:Suhoor ends (Lahore)" in lines
+    maghrib = rows[0][2]["maghrib"]
+    assert f"DTSTART:{timetable_export._ics_time(maghrib)}" in lines
+
+def test_ics_lines_are_folded():
+    name = "Sāo José dos Campos, Região Metropolitana do Vale do Paraíba; Litoral Norte"
+    site = Location(lat=-23.18, lng=-45.88, city=name, timezone="America/Sao_Paulo")
+    out = io.StringIO()
+    timetable_export.write_ics(iter_rows([site], START, START, get_method("MWL")), out)
+    raw = out.getvalue().encode("utf-8")
+    assert max(len(line) for line in raw.split(b"\r\n")) <= ICS_LINE_OCTETS
+    # Folding never splits a character and unfolds to the escaped summary
+    lines = unfold(raw.decode("utf-8")).split("\r\n")
+    assert "SUMMARY:Iftar (" + timetable_export._ics_text(name) + ")" in lines
+
+def test_main_writes_the_format_of_the_extension(tmp_path):
+    path = tmp_path / "karachi.ics"
+    assert main(["--lat", "24.86", "--lng", "67.00", "--city", "Karachi", "--from", "2026-03-01",
+                 "--to", "2026-03-03", "-o", str(path), "--method", "Karachi"]) == 0
+    text = path.read_bytes().decode("utf-8")
+    assert text.count("BEGIN:VEVENT") == 6 and "\r\n" in text
+
+def test_main_rejects_backwards_range():
+    assert main(["--lat", "1", "--lng", "1", "--from", "2026-03-02", "--to", "2026-03-01"]) == 2
+
+def test_main_defaults_to_the_clock_location(tmp_path, location, monkeypatch):
+    class Finder:
+        def get_current_location(self):
+            return location
+    monkeypatch.setattr(timetable_export, "LocationFinder", Finder)
+    path = tmp_path / "out.jsonl"
+    assert main(["--from", "2026-03-01", "--to", "2026-03-01", "-o", str(path)]) == 0
+    assert json.loads(path.read_text())["city"] == "Lahore"
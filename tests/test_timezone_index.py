@@ -0,0 +1,59 @@
+"""Coordinate-to-timezone lookup from the bundled grid"""
+
+import pytest
+from src.timezone_index import TimezoneIndex, get_timezone_index, zone_at
+
+@pytest.mark.parametrize("lat,lng,zone", [
+    (31.5204, 74.3587, "Asia/Karachi"),      # Lahore
+    (21.4225, 39.8262, "Asia/Riyadh"),       # Makkah
+    (51.5074, -0.1278, "Europe/London"),
+    (40.7128, -74.0060, "America/New_York"),
+    (35.6762, 139.6503, "Asia/Tokyo"),
+    (-33.8688, 151.2093, "Australia/Sydney"),
+    (-23.5505, -46.6333, "America/Sao_Paulo"),
+    (64.1466, -21.9426, "Atlantic/Reykjavik"),
+    (0.0, -30.0, "Etc/GMT+2"),                # Mid-Atlantic
+])
+def test_known_zones(lat, lng, zone):
+    assert zone_at(lat, lng) == zone
+
+def test_longitude_wraps_around():
+    assert zone_at(35.6762, 139.6503 - 360) == "Asia/Tokyo"
+
+def test_out_of_range_coordinates():
+    assert zone_at(91.0, 0.0) is None
+    assert zone_at(float("nan"), 0.0) is None
+    assert zone_at(0.0, float("nan")) is None
+    assert zone_at(10.0, float("inf")) is None
+    assert zone_at(10.0, float("-inf")) is None
+    assert zone_at(float("inf"), 0.0) is None
+
+def test_location_with_non_finite_coordinates():
+    from src.location_finder import Location
+    assert Location(lat=10.0, lng=float("inf")).timezone == ""
+
+def test_bundled_zones_are_known_to_zoneinfo():
+    from zoneinfo import ZoneInfo
+    for zone in get_timezone_index().zones:
+        if zone:
+            ZoneInfo(zone)
+
+def test_write_and_read_back(tmp_path):
+    path = str(tmp_path / "zones.bin")
+    # Two bands, two columns per degree: the northern band changes zone at 0 degrees
+    bands = [[(0, "Etc/GMT")], [(0, "America/New_York"), (360, "Europe/London")]]
+    TimezoneIndex.write(path, bands, 2)
+    index = TimezoneIndex(path)
+    try:
+        assert index.zone_at(-45.0, 10.0) == "Etc/GMT"
+        assert index.zone_at(45.0, -0.1) == "America/New_York"
+        assert index.zone_at(45.0, 0.0) == "Europe/London"
+        assert index.zone_at(45.0, 179.9) == "Europe/London"
+    finally:
+        index.close()
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "zones.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        TimezoneIndex(str(path))
@@ -0,0 +1,55 @@
+"""Zone resolution and the cached offset transition tables"""
+
+import calendar
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from zoneinfo import ZoneInfo
+from src import timezones
+
+LONDON = ZoneInfo("Europe/London")
+
+def test_transitions_find_dst_changes_to_the_second():
+    starts, offsets = timezones.transitions(LONDON, 2024)
+    # Clocks go forward on 31 March and back on 27 October, both at 01:00 UTC
+    assert starts.tolist() == [calendar.timegm((2024, 1, 1, 0, 0, 0)),
+                               calendar.timegm((2024, 3, 31, 1, 0, 0)),
+                               calendar.timegm((2024, 10, 27, 1, 0, 0))]
+    assert offsets.tolist() == [0, 3600, 0]
+
+def test_zone_without_dst_has_one_offset():
+    starts, offsets = timezones.transitions(ZoneInfo("Asia/Karachi"), 2026)
+    assert offsets.tolist() == [5 * 3600]
+
+def test_utc_offsets_match_zoneinfo():
+    rng = np.random.default_rng(1)
+    epochs = rng.uniform(calendar.timegm((2023, 6, 1, 0, 0, 0)), calendar.timegm((2026, 6, 1, 0, 0, 0)), 2000)
+    epochs[::100] = np.nan
+    offsets = timezones.utc_offsets(LONDON, epochs)
+    for epoch, offset in zip(epochs, offsets):
+        if np.isnan(epoch):
+            assert offset == 0
+        else:
+            assert offset == datetime.fromtimestamp(epoch, LONDON).utcoffset().total_seconds()
+
+def test_to_local_datetime_in_repeated_hour():
+    # 01:30 BST and 01:30 GMT on 27 October 2024 are an hour apart
+    first = calendar.timegm((2024, 10, 27, 0, 30, 0))
+    for epoch, offset in ((first, 3600), (first + 3600, 0)):
+        local = timezones.to_local_datetime(epoch, offset, LONDON)
+        assert (local.hour, local.minute) == (1, 30)
+        assert local.timestamp() == epoch
+
+def test_get_zone_falls_back_to_local():
+    assert timezones.get_zone("Asia/Karachi") == ZoneInfo("Asia/Karachi")
+    assert timezones.get_zone("") is timezones.local_zone()
+    assert timezones.get_zone("No/Such_Zone") is timezones.local_zone()
+
+def test_fixed_offset_fallback_is_not_cached():
+    # Without an IANA zone the current offset is used, and read again on each call
+    with mock.patch.object(timezones, "_system_zone", return_value=None), \
+         mock.patch.object(timezones, "datetime") as fake_datetime:
+        fake_datetime.now.return_value.astimezone.return_value.tzinfo = timezone(timedelta(hours=1))
+        assert timezones.local_zone().utcoffset(None) == timedelta(hours=1)
+        fake_datetime.now.return_value.astimezone.return_value.tzinfo = timezone(timedelta(hours=2))
+        assert timezones.local_zone().utcoffset(None) == timedelta(hours=2)
@@ -0,0 +1,56 @@
+"""Tray icon rendering cache and change-only updates (needs pystray and Pillow)"""
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("pystray")
+
+from src import tray_icon
+from src.tray_icon import ICON_SIZE, TrayIconApp, render_icon
+
+def test_rendered_icons_are_cached():
+    render_icon.cache_clear()
+    first = render_icon("05:42")
+    assert render_icon("05:42") is first
+    assert render_icon("05:41") is not first
+    assert render_icon.cache_info().hits == 1
+    assert first.size == (ICON_SIZE, ICON_SIZE) and first.mode == "RGBA"
+
+def test_text_is_drawn_on_the_background():
+    background = tray_icon.icon_background()
+    assert render_icon("12:00").tobytes() != background.tobytes()
+    # The shared background itself is never drawn on
+    assert tray_icon.icon_background() is background
+    assert background.getpixel((ICON_SIZE // 2, ICON_SIZE // 2)) == (0, 0, 0, 255)
+
+class FakeVar:
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+class FakeIcon:
+    def __init__(self):
+        self.assigned = []
+
+    @property
+    def icon(self):
+        return self.assigned[-1] if self.assigned else None
+
+    @icon.setter
+    def icon(self, image):
+        self.assigned.append(image)
+
+def test_icon_only_replaced_when_the_text_changes():
+    # Skip __init__: no tray thread or Tk window
+    app = TrayIconApp.__new__(TrayIconApp)
+    app.time_var = FakeVar("--:--")
+    app.tray_icon = FakeIcon()
+    app.shown_text = None
+    app.update_icon()
+    app.update_icon()
+    app.time_var.value = "01:15"
+    app.update_icon()
+    first, second = app.tray_icon.assigned
+    assert first is render_icon("--:--") and second is render_icon("01:15")